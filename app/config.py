@@ -14,19 +14,48 @@ class Settings:
     llm_model: str
     llm_temperature: float
     llm_max_new_tokens: int
+    llm_token_planner: bool
     db_path: str
     history_limit: int
     llm_timeout: float
     gen_max_retries: int
     gen_retry_delay_sec: float
+    gen_repair_race: bool
     log_level: str
     cache_ttl_sec: float
     cache_size: int
+    cache_max_mb: float
+    cache_stale_grace_sec: float
+    cache_near_dup: bool
+    cache_near_dup_threshold: float
     admin_ids: tuple[int, ...]
     log_file: str
     log_max_bytes: int
     log_backup_count: int
     backup_dir: str
+    llm_pool_limit: int
+    llm_pool_limit_per_host: int
+    llm_keepalive_sec: float
+    llm_max_in_flight: int
+    llm_format: str
+    llm_keep_alive: str
+    llm_warmup: bool
+    llm_keeper_interval_sec: float
+    llm_keeper_hours: str
+    llm_probe_interval_sec: float
+    llm_breaker_failures: int
+    llm_breaker_reset_sec: float
+    llm_breaker_half_open_probes: int
+    llm_connect_timeout: float
+    llm_first_token_timeout: float
+    llm_idle_timeout: float
+    llm_timeout_mode: str
+    llm_hedge_percentile: float
+    llm_hedge_min_delay_sec: float
+    cache_persist: bool
+    cache_db_path: str
+    cache_persist_ttl_sec: float
+    cache_persist_max_entries: int
 
 
 def _float_env(name: str, default: float) -> float:
@@ -43,6 +72,13 @@ def _int_env(name: str, default: int) -> int:
         return default
 
 
+def _bool_env(name: str, default: bool) -> bool:
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    return raw.strip().lower() in {"1", "true", "yes", "on"}
+
+
 def get_settings() -> Settings:
     def _parse_admin_ids() -> tuple[int, ...]:
         raw = os.getenv("ADMIN_IDS", "").strip()
@@ -70,17 +106,60 @@ def get_settings() -> Settings:
         llm_model=os.getenv("LLM_MODEL", "phi3:mini"),
         llm_temperature=_float_env("LLM_TEMPERATURE", 0.6),
         llm_max_new_tokens=_int_env("LLM_MAX_NEW_TOKENS", 800),
+        # Off by default: tighter num_predict budgets make truncated replies more likely
+        llm_token_planner=_bool_env("LLM_TOKEN_PLANNER", False),
         db_path=os.getenv("DB_PATH", "./data/bot.db"),
         history_limit=_int_env("HISTORY_LIMIT", 5),
         llm_timeout=_float_env("LLM_TIMEOUT", 120.0),
         gen_max_retries=_int_env("GEN_MAX_RETRIES", 2),
         gen_retry_delay_sec=_float_env("GEN_RETRY_DELAY_SEC", 0.5),
+        # On invalid JSON, race LLM repair against a regeneration when a spare slot is free
+        gen_repair_race=_bool_env("GEN_REPAIR_RACE", False),
         log_level=os.getenv("LOG_LEVEL", "INFO"),
         cache_ttl_sec=_float_env("CACHE_TTL_SEC", 600.0),
         cache_size=_int_env("CACHE_SIZE", 128),
+        # Memory budget of the in-memory card cache (0 = entry count only)
+        cache_max_mb=_float_env("CACHE_MAX_MB", 16.0),
+        # Serve expired cards this much longer while one refresh runs in the background
+        cache_stale_grace_sec=_float_env("CACHE_STALE_GRACE_SEC", 0.0),
+        # Serve cached cards for near-identical product text (token-set Jaccard)
+        cache_near_dup=_bool_env("CACHE_NEAR_DUP", False),
+        cache_near_dup_threshold=_float_env("CACHE_NEAR_DUP_THRESHOLD", 0.8),
         admin_ids=_parse_admin_ids(),
         log_file=os.getenv("LOG_FILE", "./logs/bot.log"),
         log_max_bytes=_int_env("LOG_MAX_BYTES", 1024 * 1024),
         log_backup_count=_int_env("LOG_BACKUP_COUNT", 5),
         backup_dir=os.getenv("BACKUP_DIR", "./backups"),
+        llm_pool_limit=_int_env("LLM_POOL_LIMIT", 10),
+        llm_pool_limit_per_host=_int_env("LLM_POOL_LIMIT_PER_HOST", 4),
+        llm_keepalive_sec=_float_env("LLM_KEEPALIVE_SEC", 30.0),
+        llm_max_in_flight=_int_env("LLM_MAX_IN_FLIGHT", 2),
+        # Opt-in Ollama output constraint: "" (off), "json" or "schema" (per-platform JSON schema)
+        llm_format=os.getenv("LLM_FORMAT", "").strip().lower(),
+        llm_keep_alive=os.getenv("LLM_KEEP_ALIVE", "30m").strip(),
+        llm_warmup=_bool_env("LLM_WARMUP", True),
+        # 0 disables the background keeper; hours like "9-21" limit it to business hours
+        llm_keeper_interval_sec=_float_env("LLM_KEEPER_INTERVAL_SEC", 240.0),
+        llm_keeper_hours=os.getenv("LLM_KEEPER_HOURS", "").strip(),
+        # Backend health probing (LLM_BASE_URL may list several hosts, comma-separated)
+        llm_probe_interval_sec=_float_env("LLM_PROBE_INTERVAL_SEC", 15.0),
+        llm_breaker_failures=_int_env("LLM_BREAKER_FAILURES", 5),
+        llm_breaker_reset_sec=_float_env("LLM_BREAKER_RESET_SEC", 30.0),
+        llm_breaker_half_open_probes=_int_env("LLM_BREAKER_HALF_OPEN_PROBES", 1),
+        # Per-phase deadlines (0 disables); LLM_TIMEOUT still caps the whole call.
+        # "adaptive" derives first-token/idle deadlines from recent p99 latencies.
+        llm_connect_timeout=_float_env("LLM_CONNECT_TIMEOUT", 5.0),
+        llm_first_token_timeout=_float_env("LLM_FIRST_TOKEN_TIMEOUT", 60.0),
+        llm_idle_timeout=_float_env("LLM_IDLE_TIMEOUT", 15.0),
+        llm_timeout_mode=os.getenv("LLM_TIMEOUT_MODE", "fixed").strip().lower(),
+        # With several backends, duplicate a request whose first token is later
+        # than this TTFT percentile (0 disables hedging)
+        llm_hedge_percentile=_float_env("LLM_HEDGE_PERCENTILE", 95.0),
+        llm_hedge_min_delay_sec=_float_env("LLM_HEDGE_MIN_DELAY_SEC", 2.0),
+        # Persistent cache tier in SQLite (defaults to DB_PATH), survives restarts
+        cache_persist=_bool_env("CACHE_PERSIST", True),
+        cache_db_path=os.getenv("CACHE_DB_PATH", "").strip(),
+        # Defaults to CACHE_TTL_SEC so both tiers expire cards alike
+        cache_persist_ttl_sec=_float_env("CACHE_PERSIST_TTL_SEC", _float_env("CACHE_TTL_SEC", 600.0)),
+        cache_persist_max_entries=_int_env("CACHE_PERSIST_MAX_ENTRIES", 5000),
     )
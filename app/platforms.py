@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict
+from functools import lru_cache
+from typing import Dict, Iterable, Tuple
 
 
 @dataclass(frozen=True)
@@ -31,9 +32,50 @@ PROFILES: Dict[str, PlatformProfile] = {
 }
 
 
+# Joins platform codes into one fan-out target, e.g. "ozon+wb+etsy+shopify"
+FANOUT_SEP = "+"
+
+
+def fanout_codes(code: str | None) -> Tuple[str, ...]:
+    """Known platform codes of a (possibly combined) platform value, in order."""
+    out: list[str] = []
+    for part in (code or "").lower().split(FANOUT_SEP):
+        part = part.strip()
+        if part in PROFILES and part not in out:
+            out.append(part)
+    return tuple(out)
+
+
+@lru_cache(maxsize=64)
+def _superset(codes: Tuple[str, ...]) -> PlatformProfile:
+    profiles = [PROFILES[c] for c in codes]
+    return PlatformProfile(
+        code=FANOUT_SEP.join(codes),
+        name=" / ".join(p.name for p in profiles),
+        # A title cannot be cut down without losing words: use the strictest limit
+        title_max=min(p.title_max for p in profiles),
+        # Description and bullets are trimmed per platform afterwards
+        description_max=max(p.description_max for p in profiles),
+        bullets_min=max(p.bullets_min for p in profiles),
+        bullets_max=max(p.bullets_max for p in profiles),
+    )
+
+
+def superset_profile(codes: Iterable[str]) -> PlatformProfile:
+    """Profile of one card that can be trimmed to fit each of ``codes``."""
+    known = fanout_codes(FANOUT_SEP.join(codes))
+    if not known:
+        return PROFILES["ozon"]
+    if len(known) == 1:
+        return PROFILES[known[0]]
+    return _superset(known)
+
+
 def get_profile(code: str | None) -> PlatformProfile:
     if not code:
         return PROFILES["ozon"]
+    if FANOUT_SEP in code:
+        return superset_profile(code.split(FANOUT_SEP))
     return PROFILES.get(code, PROFILES["ozon"])
 
 
@@ -1,27 +1,27 @@
+import hashlib
 import logging
+import os
 import re
-from functools import lru_cache
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Tuple, Union
 
 
 _PROMPTS_DIR = Path(__file__).resolve().parent
+_SECTION_RE = re.compile(r"\[(\w+)\]\s*$")
 logger = logging.getLogger("productcard")
 
 
-@lru_cache(maxsize=None)
-def _read_raw(name: str) -> str:
-    path = _PROMPTS_DIR / f"{name}.txt"
-    return path.read_text(encoding="utf-8")
-
-
 def _split_sections(raw: str) -> dict[str, str]:
     """Parse [lang] sections into a dict."""
     sections: dict[str, str] = {}
     current = "default"
     buf: list[str] = []
     for line in raw.splitlines():
-        m = re.match(r"\[(\w+)\]\s*$", line.strip())
+        m = _SECTION_RE.match(line.strip())
         if m:
             if buf:
                 sections[current] = "\n".join(buf).strip()
@@ -34,27 +34,157 @@ def _split_sections(raw: str) -> dict[str, str]:
     return {k: v for k, v in sections.items() if v}
 
 
+@dataclass(frozen=True)
+class Slot:
+    """Placeholder line ``prefix + value`` filled per request.
+
+    An ``optional`` slot drops its whole line when the value is empty.
+    """
+
+    field: str
+    prefix: str = ""
+    optional: bool = False
+
+
+class PromptTemplate:
+    """Prompt whose fixed lines are joined once; only slots are filled per call."""
+
+    def __init__(self, lines: Sequence[Union[str, Slot]]):
+        chunks: list[Union[str, Slot]] = []
+        static: list[str] = []
+        for line in lines:
+            if isinstance(line, Slot):
+                if static:
+                    chunks.append("\n".join(static))
+                    static = []
+                chunks.append(line)
+            else:
+                static.append(line)
+        if static:
+            chunks.append("\n".join(static))
+        self._chunks: Tuple[Union[str, Slot], ...] = tuple(chunks)
+
+    def render(self, **values: Any) -> str:
+        parts: list[str] = []
+        for chunk in self._chunks:
+            if isinstance(chunk, Slot):
+                value = values.get(chunk.field)
+                if chunk.optional and not value:
+                    continue
+                parts.append(f"{chunk.prefix}{value}")
+            else:
+                parts.append(chunk)
+        return "\n".join(parts)
+
+
+class PromptRegistry:
+    """Prompt files with [lang] sections plus a cache of compiled templates.
+
+    Files are re-read when their mtime/size changes (checked at most every
+    ``reload_interval`` seconds), so prompt edits apply without a restart.
+    ``version()`` hashes the current contents; compiled templates are
+    dropped whenever it changes.
+    """
+
+    def __init__(self, directory: Path, *, reload_interval: float = 1.0, max_templates: int = 512):
+        self.directory = directory
+        self.reload_interval = reload_interval
+        self.max_templates = max_templates
+        self._lock = threading.Lock()
+        self._checked_at: Optional[float] = None
+        self._signature: Tuple[Tuple[str, int, int], ...] = ()
+        self._version = ""
+        # name -> (raw text, parsed sections)
+        self._files: Dict[str, Tuple[str, Dict[str, str]]] = {}
+        self._templates: "OrderedDict[Hashable, PromptTemplate]" = OrderedDict()
+        self.reloads = 0
+
+    def _scan(self) -> Tuple[Tuple[str, int, int], ...]:
+        sig = []
+        for path in sorted(self.directory.glob("*.txt")):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            sig.append((path.name, st.st_mtime_ns, st.st_size))
+        return tuple(sig)
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.reload_interval:
+            return
+        with self._lock:
+            self._checked_at = now
+            sig = self._scan()
+            if sig == self._signature and self._version:
+                return
+            files: Dict[str, Tuple[str, Dict[str, str]]] = {}
+            h = hashlib.sha256()
+            for name, _, _ in sig:
+                try:
+                    data = (self.directory / name).read_bytes()
+                except OSError as e:
+                    logger.warning("Failed to read prompt %s: %s", name, e)
+                    continue
+                h.update(name.encode("utf-8"))
+                h.update(data)
+                raw = data.decode("utf-8", errors="replace")
+                files[os.path.splitext(name)[0]] = (raw, _split_sections(raw))
+            if self._version:
+                logger.info("Prompt files changed; reloading")
+                self.reloads += 1
+            self._signature = sig
+            self._files = files
+            self._version = h.hexdigest()[:12]
+            self._templates.clear()
+
+    def version(self) -> str:
+        """Short hash of all prompt files; changes whenever a prompt is edited."""
+        self._refresh()
+        return self._version
+
+    def text(self, name: str, *, language: Optional[str] = None, default: str = "") -> str:
+        self._refresh()
+        entry = self._files.get(name)
+        if entry is None:
+            logger.warning("Prompt file not found: %s.txt; using default", name)
+            return default
+        raw, sections = entry
+        if not raw.strip():
+            return default
+        if language and sections:
+            return sections.get(language.lower()) or sections.get("default") or default or raw
+        return raw
+
+    def template(self, key: Hashable, build: Callable[[], Sequence[Union[str, Slot]]]) -> PromptTemplate:
+        """Compiled template for ``key``, built once per prompt version."""
+        self._refresh()
+        tpl = self._templates.get(key)
+        if tpl is not None:
+            self._templates.move_to_end(key)
+            return tpl
+        tpl = PromptTemplate(build())
+        self._templates[key] = tpl
+        while len(self._templates) > self.max_templates:
+            self._templates.popitem(last=False)
+        return tpl
+
+
+registry = PromptRegistry(_PROMPTS_DIR)
+
+
+def fingerprint() -> str:
+    """Short hash of all prompt files; changes whenever a prompt is edited."""
+    return registry.version()
+
+
 def load_prompt(name: str, *, language: Optional[str] = None, default: str = "") -> str:
     """Load prompt text from app/prompts/<name>.txt with optional [lang] blocks.
 
     Falls back to the provided default string if file is missing or empty.
     """
     try:
-        raw = _read_raw(name)
-    except FileNotFoundError:
-        logger.warning("Prompt file not found: %s.txt; using default", name)
-        return default
+        return registry.text(name, language=language, default=default)
     except Exception as e:
         logger.warning("Failed to read prompt %s: %s", name, e)
         return default
-
-    if not raw.strip():
-        return default
-
-    if language:
-        sections = _split_sections(raw)
-        lang_key = language.lower()
-        if sections:
-            return sections.get(lang_key) or sections.get("default") or default or raw
-
-    return raw
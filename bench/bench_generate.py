@@ -0,0 +1,112 @@
+"""Throughput and tail-latency benchmark of ``generate_product_card``.
+
+Runs the real service (client, scheduler, parsing, repair) against an
+in-process fake Ollama, so results are reproducible without a model::
+
+    python -m bench.bench_generate --requests 200 --concurrency 20 --tps 60 --seed 1
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List
+from unittest import mock
+
+from bench.fake_ollama import add_config_args, config_from_args, serve
+from bench.report import format_summary, latency_summary
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    # Measure generation, not the persistent cache left by an earlier run
+    env = {"LLM_MODEL": args.model, "LLM_MAX_IN_FLIGHT": str(args.max_in_flight), "CACHE_PERSIST": "0"}
+    async with serve(config_from_args(args)) as fake:
+        # Settings are read from the environment on every call
+        with mock.patch.dict(os.environ, {**env, "LLM_BASE_URL": fake.url}):
+            return await _run(args, fake)
+
+
+async def _run(args: argparse.Namespace, fake: Any) -> Dict[str, Any]:
+    from services import generation_service, metrics
+
+    metrics.reset()
+    sem = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+    failures = 0
+
+    async def _noop_progress(_: float) -> None:
+        return None
+
+    async def _one(i: int) -> None:
+        nonlocal failures
+        async with sem:
+            started = time.perf_counter()
+            try:
+                await generation_service.generate_product_card(
+                    product_name=f"Bench item {i}",
+                    features="quiet clicks; 2.4 GHz",
+                    platform=args.platform,
+                    language=args.language,
+                    user_id=i % args.users,
+                    progress_cb=_noop_progress if args.stream else None,
+                )
+            except Exception:
+                failures += 1
+            latencies.append(time.perf_counter() - started)
+
+    wall_started = time.perf_counter()
+    try:
+        await asyncio.gather(*(_one(i) for i in range(args.requests)))
+    finally:
+        await generation_service.close_client()
+    wall = time.perf_counter() - wall_started
+
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "wall_sec": wall,
+        "throughput_rps": args.requests / wall if wall else 0.0,
+        "failures": failures,
+        "latency": latency_summary(latencies),
+        "fallbacks": metrics.get("gen_fallbacks"),
+        "llm_repairs": metrics.get("gen_llm_repairs"),
+        "server": {
+            "requests": fake.stats.requests,
+            "max_active": fake.stats.max_active,
+            "tokens": fake.stats.tokens,
+            "malformed": fake.stats.malformed,
+            "errors": fake.stats.errors,
+            "cancelled": fake.stats.cancelled,
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark generate_product_card against a fake Ollama")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--users", type=int, default=10, help="Distinct user ids (scheduler fairness)")
+    parser.add_argument("--max-in-flight", type=int, default=2)
+    parser.add_argument("--platform", default="ozon")
+    parser.add_argument("--language", default="ru")
+    parser.add_argument("--stream", action="store_true", help="Use the streaming (progress) path")
+    parser.add_argument("--json", action="store_true", help="Print the raw result as JSON")
+    add_config_args(parser)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(
+        f"requests={result['requests']} concurrency={result['concurrency']} "
+        f"wall={result['wall_sec']:.2f}s throughput={result['throughput_rps']:.2f} req/s "
+        f"failures={result['failures']} fallbacks={result['fallbacks']} llm_repairs={result['llm_repairs']}"
+    )
+    print(format_summary("end-to-end", result["latency"]))
+    print("server: " + " ".join(f"{k}={v}" for k, v in result["server"].items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""Micro-benchmark of card JSON extraction and local repair.
+
+Compares the single-pass scanner (``services.json_scan.extract_card``)
+with the previous regex cascade on a seeded corpus of realistic replies:
+clean, fenced, pretty-printed, wrapped in prose with stray braces,
+trailing commas, a second object, long trailing chatter and truncation.
+A second corpus of mechanically broken replies (smart/single quotes,
+unescaped quotes and newlines, missing brackets, cut-off strings, bullets
+as a string, plain garbage) measures ``services.json_repair.repair_card``::
+
+    python -m bench.bench_json_extract --cases 300 --repeat 20
+
+Prints per-kind accuracy/success and mean time per call.
+"""
+
+import argparse
+import json
+import random
+import re
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from services.json_repair import repair_card
+from services.json_scan import CARD_KEYS, extract_card
+
+
+KINDS = (
+    "clean",
+    "pretty",
+    "fenced",
+    "prose",
+    "prose_braces",
+    "trailing_comma",
+    "two_objects",
+    "long_chatter",
+    "truncated",
+)
+
+BROKEN_KINDS = (
+    "smart_quotes",
+    "single_quotes",
+    "unescaped_quotes",
+    "raw_newlines",
+    "missing_brackets",
+    "unterminated_string",
+    "bullets_string",
+    "garbage",
+)
+
+_ALPHABET = "abcdefghijklmnopqrstuvwxyz мышьклавиатура0123456789 ,.-:;!?%"
+_TRICKY = ('"', "\\", "{", "}", "[", "]", ",}", "\\n", "’", "{x}", '\\"')
+
+
+def legacy_extract(text: str) -> Dict[str, Any]:
+    """The regex cascade previously used by generation_service._extract_json."""
+    try:
+        return json.loads(text)
+    except Exception:
+        pass
+    m = re.search(r"\{[\s\S]*\}", text)
+    if m:
+        chunk = m.group(0)
+        try:
+            return json.loads(chunk)
+        except Exception:
+            chunk_nc = re.sub(r",\s*([}\]])", r"\1", chunk)
+            try:
+                return json.loads(chunk_nc)
+            except Exception:
+                try:
+                    title_m = re.search(r'"title"\s*:\s*"([^"]*)"', chunk)
+                    desc_m = re.search(r'"short_description"\s*:\s*"([^"]*)"', chunk)
+                    bullets_m = re.search(r'"bullets"\s*:\s*\[([\s\S]*?)\]', chunk)
+                    if not (title_m or desc_m or bullets_m):
+                        raise ValueError("no fields matched")
+                    result: Dict[str, Any] = {
+                        "title": title_m.group(1).strip() if title_m else "",
+                        "short_description": desc_m.group(1).strip() if desc_m else "",
+                        "bullets": [],
+                    }
+                    if bullets_m:
+                        items = re.findall(r'"([^"]+)"', bullets_m.group(1))
+                        result["bullets"] = [s.strip() for s in items if s.strip()]
+                    return result
+                except Exception:
+                    pass
+    return {"title": "", "short_description": text.strip(), "bullets": []}
+
+
+def scanner_extract(text: str) -> Dict[str, Any]:
+    """The scanner as the generation pipeline uses it: partial cards are repaired."""
+    card = extract_card(text)
+    if card is not None and not all(k in card for k in CARD_KEYS):
+        card = repair_card(text) or card
+    if card is not None:
+        return card
+    return {"title": "", "short_description": text.strip(), "bullets": []}
+
+
+def _words(rng: random.Random, lo: int, hi: int, tricky: float) -> str:
+    out = []
+    for _ in range(rng.randint(lo, hi)):
+        if rng.random() < tricky:
+            out.append(rng.choice(_TRICKY))
+        else:
+            out.append("".join(rng.choice(_ALPHABET) for _ in range(rng.randint(2, 9))))
+    return " ".join(out).strip() or "x"
+
+
+def _card(rng: random.Random, tricky: float) -> Dict[str, Any]:
+    return {
+        "title": _words(rng, 2, 8, tricky),
+        "short_description": _words(rng, 10, 40, tricky),
+        "bullets": [_words(rng, 2, 6, tricky) for _ in range(rng.randint(3, 6))],
+    }
+
+
+def _prose(rng: random.Random, words: int) -> str:
+    fillers = ("Sure!", "Here is", 'the "card"', "{name}", "as requested", "I hope", "this helps.", "{ ok }", "]")
+    return " ".join(rng.choice(fillers) for _ in range(words))
+
+
+def make_case(kind: str, rng: random.Random, tricky: float = 0.15) -> Tuple[str, Dict[str, Any]]:
+    """One synthetic model reply of ``kind`` and the card it should yield."""
+    card = _card(rng, tricky)
+    text = json.dumps(card, ensure_ascii=False)
+    if kind == "clean":
+        return text, card
+    if kind == "pretty":
+        return json.dumps(card, ensure_ascii=False, indent=2), card
+    if kind == "fenced":
+        return f"```json\n{text}\n```", card
+    if kind == "prose":
+        return f"Sure! Here is the card:\n{text}\nHope this helps.", card
+    if kind == "prose_braces":
+        return f"{_prose(rng, 8)}\n{text}\n{_prose(rng, 8)}", card
+    if kind == "trailing_comma":
+        # Cards end with the bullets array: ...]} -> ...,],}
+        return text[:-2] + ",],}", card
+    if kind == "two_objects":
+        other = json.dumps(_card(rng, tricky), ensure_ascii=False)
+        return f"{text}\n\nAlternative version:\n{other}", card
+    if kind == "long_chatter":
+        return f"{_prose(rng, 20)}\n{text}\n{_prose(rng, rng.randint(800, 2000))}", card
+    if kind == "truncated":
+        # Cut off right after the first bullet: it must survive
+        head = json.dumps({**card, "bullets": card["bullets"][:1]}, ensure_ascii=False)
+        return head[:-2] + ", ", {**card, "bullets": card["bullets"][:1]}
+    raise ValueError(kind)
+
+
+def _quoted(card: Dict[str, Any], left: str, right: str) -> str:
+    def q(value: str) -> str:
+        return f"{left}{value}{right}"
+
+    bullets = ", ".join(q(b) for b in card["bullets"])
+    return (
+        f"{{{q('title')}: {q(card['title'])}, {q('short_description')}: {q(card['short_description'])}, "
+        f"{q('bullets')}: [{bullets}]}}"
+    )
+
+
+def make_broken_case(kind: str, rng: random.Random) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """One damaged reply of ``kind`` and the card a repair should recover.
+
+    For cut-off replies only the title and bullets are compared (the tail of
+    the description is gone); ``garbage`` expects no card at all.
+    """
+    card = _card(rng, 0.0)
+    if kind == "smart_quotes":
+        return _quoted(card, "“", "”"), card
+    if kind == "single_quotes":
+        return _quoted(card, "'", "'"), card
+    if kind == "unescaped_quotes":
+        card["title"] = f'{card["title"]} "{_words(rng, 1, 2, 0.0)}"'
+        return json.dumps(card, ensure_ascii=False).replace('\\"', '"'), card
+    if kind == "raw_newlines":
+        card["short_description"] = card["short_description"] + "\n" + _words(rng, 3, 8, 0.0)
+        return json.dumps(card, ensure_ascii=False, indent=2).replace("\\n", "\n"), card
+    if kind == "missing_brackets":
+        text = json.dumps(card, ensure_ascii=False)
+        return text[: -rng.choice((1, 2))], card
+    if kind == "unterminated_string":
+        text = json.dumps({**card, "bullets": card["bullets"]}, ensure_ascii=False)
+        text = text[: text.index('"bullets"')].rstrip(", ")
+        cut = rng.randint(1, 4)
+        return text[:-cut], {**card, "bullets": []}
+    if kind == "bullets_string":
+        # Separators must not occur inside the items themselves
+        card["bullets"] = [re.sub(r"[^\w ]", "", b).strip() or "x" for b in card["bullets"]]
+        return json.dumps({**card, "bullets": "; ".join(card["bullets"])}, ensure_ascii=False), card
+    if kind == "garbage":
+        return _prose(rng, rng.randint(5, 40)), None
+    raise ValueError(kind)
+
+
+def repair_matches(got: Optional[Dict[str, Any]], expected: Optional[Dict[str, Any]], kind: str) -> bool:
+    if expected is None:
+        return got is None
+    if got is None:
+        return False
+    if kind == "unterminated_string":
+        return got["title"] == expected["title"] and expected["short_description"].startswith(
+            got["short_description"]
+        )
+    return got == expected
+
+
+def broken_corpus(cases: int, seed: int = 7) -> List[Tuple[str, str, Optional[Dict[str, Any]]]]:
+    rng = random.Random(seed)
+    items = []
+    for i in range(cases):
+        kind = BROKEN_KINDS[i % len(BROKEN_KINDS)]
+        text, expected = make_broken_case(kind, rng)
+        items.append((kind, text, expected))
+    return items
+
+
+def corpus(cases: int, seed: int = 7, kinds: Tuple[str, ...] = KINDS) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """Seeded list of ``(kind, text, expected)``."""
+    rng = random.Random(seed)
+    items = []
+    for i in range(cases):
+        kind = kinds[i % len(kinds)]
+        text, expected = make_case(kind, rng)
+        items.append((kind, text, expected))
+    return items
+
+
+def _measure(
+    fn: Callable[[str], Dict[str, Any]], items: List[Tuple[str, str, Dict[str, Any]]], repeat: int
+) -> Dict[str, Dict[str, float]]:
+    by_kind: Dict[str, Dict[str, float]] = defaultdict(lambda: {"n": 0, "ok": 0, "sec": 0.0})
+    for kind, text, expected in items:
+        row = by_kind[kind]
+        started = time.perf_counter()
+        for _ in range(repeat):
+            got = fn(text)
+        row["sec"] += (time.perf_counter() - started) / repeat
+        row["n"] += 1
+        row["ok"] += got == expected
+    return by_kind
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    items = corpus(args.cases, seed=args.seed)
+    result: Dict[str, Any] = {}
+    for name, fn in (("legacy", legacy_extract), ("scanner", scanner_extract)):
+        result[name] = {
+            kind: {"accuracy": row["ok"] / row["n"], "us_per_call": row["sec"] / row["n"] * 1e6}
+            for kind, row in _measure(fn, items, args.repeat).items()
+        }
+    repair: Dict[str, Dict[str, float]] = defaultdict(lambda: {"n": 0, "ok": 0, "sec": 0.0})
+    for kind, text, expected in broken_corpus(args.cases, seed=args.seed):
+        row = repair[kind]
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            got = repair_card(text)
+        row["sec"] += (time.perf_counter() - started) / args.repeat
+        row["n"] += 1
+        row["ok"] += repair_matches(got, expected, kind)
+    result["repair"] = {
+        kind: {"success": row["ok"] / row["n"], "us_per_call": row["sec"] / row["n"] * 1e6}
+        for kind, row in repair.items()
+    }
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark card JSON extraction")
+    parser.add_argument("--cases", type=int, default=270)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print the raw result as JSON")
+    args = parser.parse_args(argv)
+    result = run(args)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"{'kind':<16}{'legacy ok':>10}{'legacy us':>11}{'scanner ok':>12}{'scanner us':>12}")
+    for kind in KINDS:
+        old, new = result["legacy"].get(kind), result["scanner"].get(kind)
+        if old is None:
+            continue
+        print(
+            f"{kind:<16}{old['accuracy']:>10.0%}{old['us_per_call']:>11.1f}"
+            f"{new['accuracy']:>12.0%}{new['us_per_call']:>12.1f}"
+        )
+    print(f"\n{'broken kind':<20}{'repaired':>10}{'us':>9}")
+    for kind in BROKEN_KINDS:
+        row = result["repair"].get(kind)
+        if row is not None:
+            print(f"{kind:<20}{row['success']:>10.0%}{row['us_per_call']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
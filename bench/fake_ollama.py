@@ -0,0 +1,254 @@
+"""Local stand-in for the Ollama HTTP API, for offline benchmarks and tests.
+
+Serves ``/api/generate`` (streaming NDJSON and non-streaming) and
+``/api/tags`` with a product-card JSON reply whose pacing and failure modes
+are configurable: time-to-first-token, tokens per second, jitter,
+malformed-JSON rate and injected HTTP errors/stalls.
+
+Run standalone and point the bot/CLI at it::
+
+    python -m bench.fake_ollama --port 11500 --tps 40 --ttft 0.3
+    LLM_BASE_URL=http://127.0.0.1:11500 python -m cli "Мышь Logitech"
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from aiohttp import web
+
+
+_NAME_RE = re.compile(r"^(?:Product name|Название товара):\s*(.+)$", re.MULTILINE)
+
+
+@dataclass
+class FakeOllamaConfig:
+    model: str = "phi3:mini"
+    # Decoding speed and delay before the first token (seconds)
+    tokens_per_sec: float = 50.0
+    ttft: float = 0.2
+    # Relative random spread applied to every delay (0.2 → ±20%)
+    jitter: float = 0.0
+    # Probability of replying with broken JSON / an HTTP error / a mid-stream stall
+    malformed_rate: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 500
+    stall_rate: float = 0.0
+    stall_sec: float = 30.0
+    # Extra delay and load_duration reported on the first request (cold start)
+    load_sec: float = 0.0
+    # Characters per emitted token
+    chars_per_token: int = 4
+    seed: Optional[int] = None
+
+
+@dataclass
+class FakeOllamaStats:
+    requests: int = 0
+    streamed: int = 0
+    errors: int = 0
+    malformed: int = 0
+    stalls: int = 0
+    cancelled: int = 0
+    active: int = 0
+    max_active: int = 0
+    tokens: int = 0
+    bodies: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def _card_text(prompt: str) -> str:
+    m = _NAME_RE.search(prompt or "")
+    name = (m.group(1).strip() if m else "Product")[:80]
+    card = {
+        "title": name,
+        "short_description": f"{name}: a reliable choice for everyday use with a clean, practical design.",
+        "bullets": ["Reliable build", "Easy to use", "Compact size", "Everyday comfort"],
+    }
+    return json.dumps(card, ensure_ascii=False)
+
+
+def _break_json(text: str, rng: random.Random) -> str:
+    mode = rng.choice(("prose", "trailing_comma", "truncated"))
+    if mode == "prose":
+        return f"Sure! Here is the card:\n{text}\nHope this helps."
+    if mode == "trailing_comma":
+        return text[:-1] + ",}"
+    return text[: max(1, len(text) * 2 // 3)]
+
+
+class FakeOllama:
+    """aiohttp application emulating the subset of Ollama the bot uses."""
+
+    def __init__(self, config: Optional[FakeOllamaConfig] = None):
+        self.config = config or FakeOllamaConfig()
+        self.stats = FakeOllamaStats()
+        self._rng = random.Random(self.config.seed)
+        self._loaded = False
+        # Set by serve(); empty when the app is run some other way
+        self.url = ""
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/api/generate", self._generate)
+        app.router.add_get("/api/tags", self._tags)
+        return app
+
+    def _delay(self, base: float) -> float:
+        j = self.config.jitter
+        if base <= 0 or j <= 0:
+            return max(0.0, base)
+        return max(0.0, base * (1 + self._rng.uniform(-j, j)))
+
+    async def _tags(self, request: web.Request) -> web.Response:
+        return web.json_response({"models": [{"name": self.config.model, "model": self.config.model}]})
+
+    def _final_frame(self, prompt: str, tokens: int, started: float, load_sec: float, first_at: float) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "model": self.config.model,
+            "response": "",
+            "done": True,
+            "done_reason": "stop",
+            "prompt_eval_count": max(1, len(prompt) // self.config.chars_per_token),
+            "prompt_eval_duration": int(max(0.0, first_at - started - load_sec) * 1e9),
+            "eval_count": tokens,
+            "eval_duration": int((now - first_at) * 1e9),
+            "load_duration": int(load_sec * 1e9),
+            "total_duration": int((now - started) * 1e9),
+        }
+
+    async def _generate(self, request: web.Request) -> web.StreamResponse:
+        cfg = self.config
+        body = await request.json()
+        stats = self.stats
+        stats.requests += 1
+        stats.bodies.append(body)
+        if cfg.error_rate and self._rng.random() < cfg.error_rate:
+            stats.errors += 1
+            return web.json_response({"error": "injected failure"}, status=cfg.error_status)
+
+        started = time.monotonic()
+        prompt = body.get("prompt") or ""
+        load_sec = 0.0
+        if not self._loaded:
+            self._loaded = True
+            load_sec = cfg.load_sec
+        if not prompt:
+            # Warm-up request: load only
+            await asyncio.sleep(load_sec)
+            return web.json_response(self._final_frame("", 0, started, load_sec, time.monotonic()))
+
+        text = _card_text(prompt)
+        if cfg.malformed_rate and self._rng.random() < cfg.malformed_rate:
+            stats.malformed += 1
+            text = _break_json(text, self._rng)
+        step = max(1, cfg.chars_per_token)
+        tokens = [text[i : i + step] for i in range(0, len(text), step)]
+        num_predict = (body.get("options") or {}).get("num_predict")
+        if num_predict:
+            tokens = tokens[: int(num_predict)]
+        stall_at = self._rng.randrange(len(tokens)) if cfg.stall_rate and self._rng.random() < cfg.stall_rate else None
+        per_token = 1.0 / cfg.tokens_per_sec if cfg.tokens_per_sec > 0 else 0.0
+
+        stats.active += 1
+        stats.max_active = max(stats.max_active, stats.active)
+        try:
+            await asyncio.sleep(load_sec + self._delay(cfg.ttft))
+            first_at = time.monotonic()
+            if not body.get("stream", True):
+                await asyncio.sleep(sum(self._delay(per_token) for _ in tokens))
+                stats.tokens += len(tokens)
+                frame = self._final_frame(prompt, len(tokens), started, load_sec, first_at)
+                frame["response"] = "".join(tokens)
+                return web.json_response(frame)
+
+            stats.streamed += 1
+            resp = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+            await resp.prepare(request)
+            for i, tok in enumerate(tokens):
+                if i == stall_at:
+                    stats.stalls += 1
+                    await asyncio.sleep(cfg.stall_sec)
+                elif i:
+                    await asyncio.sleep(self._delay(per_token))
+                frame = {"model": cfg.model, "response": tok, "done": False}
+                await resp.write((json.dumps(frame, ensure_ascii=False) + "\n").encode())
+                stats.tokens += 1
+            final = self._final_frame(prompt, len(tokens), started, load_sec, first_at)
+            await resp.write((json.dumps(final) + "\n").encode())
+            await resp.write_eof()
+            return resp
+        except (asyncio.CancelledError, ConnectionResetError):
+            # Client went away (early abort, hedge loser, deadline)
+            stats.cancelled += 1
+            raise
+        finally:
+            stats.active -= 1
+
+
+@asynccontextmanager
+async def serve(
+    config: Optional[FakeOllamaConfig] = None, host: str = "127.0.0.1", port: int = 0
+) -> AsyncIterator[FakeOllama]:
+    """Run a fake server for the duration of the block; ``fake.url`` is its base URL."""
+    fake = FakeOllama(config)
+    runner = web.AppRunner(fake.app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound = site._server.sockets[0].getsockname()[1]
+    fake.url = f"http://{host}:{bound}"
+    try:
+        yield fake
+    finally:
+        await runner.cleanup()
+
+
+def add_config_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--model", default="phi3:mini")
+    parser.add_argument("--tps", type=float, default=50.0, help="Tokens per second")
+    parser.add_argument("--ttft", type=float, default=0.2, help="Time to first token, seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Relative delay spread, e.g. 0.2")
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--stall-rate", type=float, default=0.0)
+    parser.add_argument("--stall-sec", type=float, default=30.0)
+    parser.add_argument("--load-sec", type=float, default=0.0, help="Cold-start delay on first request")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def config_from_args(args: argparse.Namespace) -> FakeOllamaConfig:
+    return FakeOllamaConfig(
+        model=args.model,
+        tokens_per_sec=args.tps,
+        ttft=args.ttft,
+        jitter=args.jitter,
+        malformed_rate=args.malformed_rate,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        stall_rate=args.stall_rate,
+        stall_sec=args.stall_sec,
+        load_sec=args.load_sec,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake Ollama server for offline benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    add_config_args(parser)
+    args = parser.parse_args()
+    fake = FakeOllama(config_from_args(args))
+    web.run_app(fake.app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""End-to-end load test of the Telegram handler flow with virtual users.
+
+Each virtual user walks the real ``bot/handlers.py`` flow
+(``on_language`` → ``on_platform`` → ``on_tone`` → ``on_length`` →
+``on_input`` → ``on_export``) with fake Message/CallbackQuery objects, a
+fake Bot API that records every call, aiogram's in-memory FSM storage and a
+throwaway SQLite DB. The LLM is the in-process fake Ollama unless
+``--llm-url`` points at a real one::
+
+    python -m bench.load_test --users 50 --iterations 2 --tps 40 --ttft 0.3
+
+Reports flow throughput, p50/p95/p99 per stage and Telegram call rates
+(edits in particular, which Telegram throttles per chat).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from collections import Counter, defaultdict
+from contextlib import AsyncExitStack
+from typing import Any, Dict, List, Optional
+from unittest import mock
+
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from bench.fake_ollama import add_config_args, config_from_args, serve
+from bench.report import format_summary, latency_summary
+
+
+STAGES = ("language", "platform", "tone", "length", "generate", "export")
+
+
+class FakeBot:
+    """Records Bot API calls (method, chat, time) with an optional per-call delay."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: List[tuple] = []
+        self._next_message_id = 0
+
+    async def call(self, method: str, chat_id: int) -> int:
+        self.calls.append((method, chat_id, time.perf_counter()))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self._next_message_id += 1
+        return self._next_message_id
+
+    def counts(self) -> Dict[str, int]:
+        return dict(Counter(method for method, _, _ in self.calls))
+
+    def max_edits_per_chat_second(self) -> int:
+        """Worst 1-second window of editMessageText calls within a single chat."""
+        per_chat: Dict[int, List[float]] = defaultdict(list)
+        for method, chat_id, at in self.calls:
+            if method == "editMessageText":
+                per_chat[chat_id].append(at)
+        worst = 0
+        for times in per_chat.values():
+            times.sort()
+            lo = 0
+            for hi, at in enumerate(times):
+                while at - times[lo] > 1.0:
+                    lo += 1
+                worst = max(worst, hi - lo + 1)
+        return worst
+
+
+class FakeUser:
+    def __init__(self, user_id: int):
+        self.id = user_id
+        self.language_code = "en"
+
+
+class FakeMessage:
+    def __init__(self, bot: FakeBot, user: FakeUser, text: str = "", reply_markup: Any = None):
+        self.bot = bot
+        self.from_user = user
+        self.chat_id = user.id
+        self.text = text
+        self.reply_markup = reply_markup
+        self.sent: List["FakeMessage"] = []
+
+    async def answer(self, text: str, reply_markup: Any = None, **kwargs: Any) -> "FakeMessage":
+        await self.bot.call("sendMessage", self.chat_id)
+        msg = FakeMessage(self.bot, self.from_user, text, reply_markup)
+        self.sent.append(msg)
+        return msg
+
+    async def edit_text(self, text: str, reply_markup: Any = None, **kwargs: Any) -> "FakeMessage":
+        await self.bot.call("editMessageText", self.chat_id)
+        self.text = text
+        self.reply_markup = reply_markup
+        return self
+
+    async def answer_document(self, document: Any, **kwargs: Any) -> "FakeMessage":
+        await self.bot.call("sendDocument", self.chat_id)
+        msg = FakeMessage(self.bot, self.from_user, "", None)
+        self.sent.append(msg)
+        return msg
+
+
+class FakeCallback:
+    def __init__(self, bot: FakeBot, user: FakeUser, data: str, message: FakeMessage):
+        self.bot = bot
+        self.from_user = user
+        self.data = data
+        self.message = message
+
+    async def answer(self, *args: Any, **kwargs: Any) -> None:
+        await self.bot.call("answerCallbackQuery", self.from_user.id)
+
+
+def _find_callback_data(messages: List[FakeMessage], prefix: str) -> Optional[str]:
+    for msg in reversed(messages):
+        markup = msg.reply_markup
+        for row in getattr(markup, "inline_keyboard", None) or []:
+            for button in row:
+                data = getattr(button, "callback_data", None) or ""
+                if data.startswith(prefix):
+                    return data
+    return None
+
+
+async def _virtual_user(
+    idx: int,
+    args: argparse.Namespace,
+    bot: FakeBot,
+    storage: MemoryStorage,
+    timings: Dict[str, List[float]],
+    errors: Counter,
+) -> int:
+    from bot import handlers
+
+    user = FakeUser(100_000 + idx)
+    state = FSMContext(storage=storage, key=StorageKey(bot_id=1, chat_id=user.id, user_id=user.id))
+    chat = FakeMessage(bot, user)
+    done = 0
+
+    async def _stage(name: str, coro: Any) -> None:
+        started = time.perf_counter()
+        await coro
+        timings[name].append(time.perf_counter() - started)
+
+    for it in range(args.iterations):
+        n = idx * args.iterations + it
+        product = f"Load item {n % args.catalog if args.catalog else n}"
+        try:
+            await _stage("language", handlers.on_language(FakeCallback(bot, user, f"lang:{args.language}", chat), state))
+            await _stage("platform", handlers.on_platform(FakeCallback(bot, user, f"platform:{args.platform}", chat), state))
+            await _stage("tone", handlers.on_tone(FakeCallback(bot, user, "tone:neutral", chat), state))
+            await _stage("length", handlers.on_length(FakeCallback(bot, user, f"length:{args.length}", chat), state))
+            incoming = FakeMessage(bot, user, f"{product}\nquiet clicks\n2.4 GHz")
+            await _stage("generate", handlers.on_input(incoming, state))
+            export = _find_callback_data(incoming.sent, "export:txt:")
+            if export is None:
+                errors["no_export_button"] += 1
+            else:
+                await _stage("export", handlers.on_export(FakeCallback(bot, user, export, chat), state))
+                done += 1
+        except Exception as e:
+            errors[type(e).__name__] += 1
+        if args.think_ms:
+            await asyncio.sleep(args.think_ms / 1000.0)
+    return done
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    async with AsyncExitStack() as stack:
+        if args.llm_url:
+            llm_url = args.llm_url
+            fake = None
+        else:
+            fake = await stack.enter_async_context(serve(config_from_args(args)))
+            llm_url = fake.url
+        db_dir = stack.enter_context(tempfile.TemporaryDirectory())
+        # Handlers read settings from the environment on every call
+        stack.enter_context(
+            mock.patch.dict(
+                os.environ,
+                {
+                    "LLM_BASE_URL": llm_url,
+                    "LLM_MODEL": args.model,
+                    "LLM_MAX_IN_FLIGHT": str(args.max_in_flight),
+                    "DB_PATH": os.path.join(db_dir, "load.db"),
+                },
+            )
+        )
+
+        from services import generation_service
+        from storage.sqlite_repo import init_db
+
+        await init_db(os.environ["DB_PATH"])
+        bot = FakeBot(latency=args.tg_latency_ms / 1000.0)
+        storage = MemoryStorage()
+        timings: Dict[str, List[float]] = defaultdict(list)
+        errors: Counter = Counter()
+
+        started = time.perf_counter()
+        try:
+            completed = await asyncio.gather(
+                *(_virtual_user(i, args, bot, storage, timings, errors) for i in range(args.users))
+            )
+        finally:
+            await generation_service.close_client()
+        wall = time.perf_counter() - started
+
+        flows = sum(completed)
+        calls = bot.counts()
+        edits = calls.get("editMessageText", 0)
+        result = {
+            "users": args.users,
+            "iterations": args.iterations,
+            "wall_sec": wall,
+            "flows_completed": flows,
+            "throughput_flows_per_sec": flows / wall if wall else 0.0,
+            "errors": dict(errors),
+            "stages": {name: latency_summary(timings.get(name, [])) for name in STAGES},
+            "telegram_calls": calls,
+            "edits_per_sec": edits / wall if wall else 0.0,
+            "edits_per_generation": edits / max(1, len(timings.get("generate", []))),
+            "max_edits_per_chat_second": bot.max_edits_per_chat_second(),
+        }
+        if fake is not None:
+            result["llm_requests"] = fake.stats.requests
+            result["llm_max_active"] = fake.stats.max_active
+        return result
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Load-test the bot handler flow with virtual users")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=1, help="Flows per virtual user")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Pause between a user's flows")
+    parser.add_argument("--tg-latency-ms", type=float, default=0.0, help="Simulated Bot API call latency")
+    parser.add_argument("--catalog", type=int, default=0, help="Reuse N product names (0 = all distinct)")
+    parser.add_argument("--language", default="ru")
+    parser.add_argument("--platform", default="ozon")
+    parser.add_argument("--length", default="medium")
+    parser.add_argument("--max-in-flight", type=int, default=2)
+    parser.add_argument("--llm-url", default="", help="Use a real Ollama instead of the fake server")
+    parser.add_argument("--json", action="store_true", help="Print the raw result as JSON")
+    add_config_args(parser)
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+
+    result = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(
+        f"users={result['users']} iterations={result['iterations']} wall={result['wall_sec']:.2f}s "
+        f"flows={result['flows_completed']} throughput={result['throughput_flows_per_sec']:.2f} flows/s "
+        f"errors={result['errors'] or 0}"
+    )
+    for name in STAGES:
+        print(format_summary(name, result["stages"][name]))
+    print("telegram: " + " ".join(f"{k}={v}" for k, v in sorted(result["telegram_calls"].items())))
+    print(
+        f"edits/s={result['edits_per_sec']:.2f} edits/generation={result['edits_per_generation']:.1f} "
+        f"max edits/chat/s={result['max_edits_per_chat_second']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
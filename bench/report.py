@@ -0,0 +1,30 @@
+import math
+from typing import Dict, Iterable, List
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of ``values`` (``q`` in 0..100); 0.0 if empty."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def latency_summary(values: Iterable[float]) -> Dict[str, float]:
+    vals = list(values)
+    return {
+        "n": len(vals),
+        "p50": percentile(vals, 50),
+        "p95": percentile(vals, 95),
+        "p99": percentile(vals, 99),
+        "max": max(vals) if vals else 0.0,
+    }
+
+
+def format_summary(name: str, summary: Dict[str, float]) -> str:
+    return (
+        f"{name:<14} n={summary['n']:<5} p50={summary['p50'] * 1000:8.1f}ms "
+        f"p95={summary['p95'] * 1000:8.1f}ms p99={summary['p99'] * 1000:8.1f}ms "
+        f"max={summary['max'] * 1000:8.1f}ms"
+    )
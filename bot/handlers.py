@@ -9,6 +9,7 @@ from .states import GenerationStates
 from .keyboards import (
     platforms_keyboard,
     export_keyboard,
+    batch_export_keyboard,
     tone_keyboard,
     length_keyboard,
     language_keyboard,
@@ -19,20 +20,45 @@ from .keyboards import (
 )
 from .i18n import t
 from aiogram.types import BufferedInputFile
-from services import generation_service
+from services import generation_service, metrics, telemetry
 import json
 import re
 from storage.sqlite_repo import add_generation, get_generation, prune_history
 from app.config import get_settings
+from app.platforms import get_profile
 
 
 router = Router()
 logger = logging.getLogger("productcard")
 
+# platform value of the "all marketplaces" button
+ALL_PLATFORMS = "all"
+
+# Minimum gap between progress edits in one chat (Telegram throttles edits per chat)
+PROGRESS_EDIT_INTERVAL_SEC = 1.0
+# chat id -> loop time of the last progress edit
+_last_progress_edit = {}
+
 # In-memory map of running tasks: tg_id -> {"task": Task, "wait_msg": Message, "lang": str}
 _running = {}
 
 
+def _format_breaker(status: dict) -> str:
+    return (
+        f"circuit={status['state']} failures={status['failures']} "
+        f"opened={status['opened']} rejected={status['rejected']}"
+    )
+
+
+def _format_latency() -> str:
+    p50, p95 = metrics.percentile("llm_ttft", 50), metrics.percentile("llm_ttft", 95)
+    ttft = f"{p50:.1f}/{p95:.1f}s" if p50 is not None and p95 is not None else "-"
+    return (
+        f"ttft_p50/p95={ttft} stalls={metrics.get('llm_stall_first_token') + metrics.get('llm_stall_idle')} "
+        f"hedges={metrics.get('llm_hedges')} hedge_wins={metrics.get('llm_hedge_wins')}"
+    )
+
+
 def _is_admin(user_id: int) -> bool:
     cfg = get_settings()
     admin_ids = getattr(cfg, "admin_ids", tuple())
@@ -124,6 +150,40 @@ async def cmd_limits(message: Message, state: FSMContext):
         f"timeout={cfg.llm_timeout}s retries={cfg.gen_max_retries} cache_ttl={cfg.cache_ttl_sec}s cache_size={cfg.cache_size}"
     )
     lines.append(f"db={cfg.db_path} history_limit={cfg.history_limit}")
+    cs = generation_service.cache_stats()
+    lines.append(
+        f"cache entries={cs['entries']}/{cs['max_entries']} size={cs['bytes'] / 1024:.1f}KiB/"
+        f"{cs['max_bytes'] / 1048576:.0f}MiB hits={cs['hits']} misses={cs['misses']} ({cs['hit_rate']:.0%}) "
+        f"evictions={cs['evictions']} expired={cs['expirations']} near_hits={metrics.get('cache_near_hits')} "
+        f"stale_hits={cs['stale_hits']} refreshes={metrics.get('cache_refreshes')}"
+    )
+    if getattr(cfg, "cache_persist", False):
+        db_stats = await generation_service.persistent_cache_stats() or {"entries": "?", "bytes": 0}
+        lines.append(
+            f"cache_db={getattr(cfg, 'cache_db_path', '') or cfg.db_path} "
+            f"entries={db_stats['entries']}/{getattr(cfg, 'cache_persist_max_entries', 0)} "
+            f"size={db_stats['bytes'] / 1024:.1f}KiB "
+            f"ttl={getattr(cfg, 'cache_persist_ttl_sec', 0):.0f}s "
+            f"hits={metrics.get('cache_db_hits')} misses={metrics.get('cache_db_misses')}"
+        )
+    lines.append(f"format={getattr(cfg, 'llm_format', '') or 'off'}")
+    rs = generation_service.repair_stats()
+    lines.append(
+        f"llm_repairs={rs['llm_repairs']}/{rs['generations']} ({rs['repair_rate']:.1%}) "
+        f"repaired_ok={rs['llm_repairs_ok']} best_effort={rs['best_effort']} fallbacks={rs['fallbacks']}"
+    )
+    lines.append(
+        f"local_repairs={rs['local_repairs_ok']}/{rs['local_repairs']} ({rs['local_repair_rate']:.0%}) "
+        f"races={rs['races']} won_by_repair={rs['race_wins_repair']} won_by_regen={rs['race_wins_regenerate']}"
+    )
+    lines.append(
+        f"token_planner={'on' if getattr(cfg, 'llm_token_planner', False) else 'off'} "
+        f"budget_exhausted={rs['budget_exhausted']} "
+        f"bilingual={rs['bilingual']} bilingual_split={rs['bilingual_split']}"
+    )
+    client = generation_service.get_client()
+    lines.append(_format_breaker(client.breaker.status()))
+    lines.append(_format_latency())
     log_file = getattr(cfg, "log_file", None)
     if log_file:
         lines.append(
@@ -158,6 +218,26 @@ async def cmd_stats(message: Message, state: FSMContext):
         lines.append(t(lang, "stats_top"))
         for row in top:
             lines.append(f"{row.get('tg_id')}: {row.get('cnt')} (last={row.get('last_at')})")
+    llm_rows = telemetry.summary()
+    if llm_rows:
+        lines.append("")
+        lines.append(t(lang, "stats_llm"))
+        for r in llm_rows:
+            line = f"{r['model']} {r['platform']}/{r['language']}: n={r['calls']}"
+            if r["measured"]:
+                line += (
+                    f" prompt={r['avg_prompt_tokens']:.0f}tok@{r['prompt_rate']:.0f}/s "
+                    f"decode={r['avg_eval_tokens']:.0f}tok@{r['eval_rate']:.1f}/s "
+                    f"avg={r['avg_total_sec']:.1f}s "
+                    f"split load/prompt/decode={r['load_share']:.0%}/{r['prompt_share']:.0%}/{r['eval_share']:.0%}"
+                )
+            if r["estimated"]:
+                # Streams stopped once the card closed: client-side estimates only
+                line += (
+                    f" est(n={r['estimated']}) decode~{r['est_avg_eval_tokens']:.0f}tok"
+                    f"@{r['est_eval_rate']:.1f}/s avg~{r['est_avg_total_sec']:.1f}s"
+                )
+            lines.append(line)
     await message.answer("\n".join(lines))
 
 
@@ -227,27 +307,45 @@ async def cmd_health(message: Message, state: FSMContext):
     except Exception:
         db_ok = False
     model_ok = False
+    backends = []
+    breaker = None
     try:
-        from services.llm_client import OllamaClient
-        cfg = get_settings()
-        client = OllamaClient(cfg.llm_base_url, cfg.llm_model)
+        client = generation_service.get_client()
         model_ok = await client.health_check(timeout=3.0)
+        backends = client.backend_status()
+        breaker = client.breaker.status()
     except Exception:
         model_ok = False
     if db_ok and model_ok:
-        await message.answer(t(lang, "health_ok"))
+        lines = [t(lang, "health_ok")]
     else:
-        await message.answer(t(lang, "health_warn", db=str(db_ok), model=str(model_ok)))
+        lines = [t(lang, "health_warn", db=str(db_ok), model=str(model_ok))]
+    for b in backends:
+        latency = f"{b['latency'] * 1000:.0f}ms" if b.get("latency") is not None else "-"
+        line = (
+            f"{'✅' if b['healthy'] else '❌'} {b['url']} "
+            f"outstanding={b['outstanding']} latency={latency}"
+        )
+        if b.get("last_error"):
+            line += f" error={b['last_error']}"
+        lines.append(line)
+    if breaker:
+        lines.append(_format_breaker(breaker))
+    await message.answer("\n".join(lines))
 
 
 
 @router.callback_query(F.data.startswith("lang:"))
 async def on_language(callback: CallbackQuery, state: FSMContext):
     lang_code = callback.data.split(":", 1)[1]
-    if lang_code not in {"ru", "en"}:
+    if lang_code not in {"ru", "en", generation_service.BILINGUAL}:
         await callback.answer(t("en", "unsupported_language"), show_alert=True)
         return
-    await state.update_data(language=lang_code)
+    bilingual = lang_code == generation_service.BILINGUAL
+    if bilingual:
+        # Cards in both languages, interface in Russian
+        lang_code = "ru"
+    await state.update_data(language=lang_code, bilingual=bilingual)
     # After choosing language, go to marketplace selection
     await state.set_state(GenerationStates.choosing_platform)
     await callback.message.answer(
@@ -302,26 +400,84 @@ async def on_input(message: Message, state: FSMContext):
     tone = data.get("tone", "neutral")
     length = data.get("length", "medium")
     category = data.get("category")
+    bilingual = bool(data.get("bilingual"))
 
-    # Throttle: if already generating for this user
-    if _running.get(message.from_user.id):
+    # Throttle: one generation per user. Check and reserve without awaiting in
+    # between so two quick messages cannot both pass the check.
+    uid = message.from_user.id
+    if _running.get(uid):
         await message.answer(t(language, "busy_generating"))
         return
-
+    entry = {"task": None, "wait_msg": None, "lang": language}
+    _running[uid] = entry
+    try:
+        await _run_generation(
+            message,
+            state,
+            entry,
+            product_name=product_name,
+            features=features,
+            platform=platform,
+            language=language,
+            tone=tone,
+            length=length,
+            category=category,
+            bilingual=bilingual,
+        )
+    finally:
+        # Only drop our own reservation (cancel + resubmit may have replaced it)
+        if _running.get(uid) is entry:
+            _running.pop(uid, None)
+
+
+async def _run_generation(
+    message: Message,
+    state: FSMContext,
+    entry: dict,
+    *,
+    product_name: str,
+    features,
+    platform,
+    language: str,
+    tone: str,
+    length: str,
+    category,
+    bilingual: bool = False,
+):
     await state.set_state(GenerationStates.generating)
     wait_msg = await message.answer(t(language, "wait_generating"), reply_markup=cancel_keyboard(language))
+    entry["wait_msg"] = wait_msg
 
     # Start generation as a task to allow cancellation and progress updates
     import asyncio
 
+    loop = asyncio.get_running_loop()
     last_percent = 0
+    queued = False
+    queue_position = 0
+    preview = ""
+    shown = ""
+    chat_id = message.from_user.id
 
     async def _render_progress():
+        # Telegram rate-limits edits per chat: at most one per interval, and
+        # none when the text is unchanged; the ticker flushes skipped updates
+        nonlocal shown
+        if queued:
+            # Show the place in the LLM queue instead of a fake percentage
+            text = t(language, "queued_position", position=queue_position)
+        else:
+            text = f"{t(language, 'wait_generating_short')} {last_percent}%"
+            if preview:
+                text += f"\n\n{preview}"
+        now = loop.time()
+        last = _last_progress_edit.get(chat_id)
+        if text == shown or (last is not None and now - last < PROGRESS_EDIT_INTERVAL_SEC):
+            return
+        shown = text
+        _last_progress_edit[chat_id] = now
         try:
-            await wait_msg.edit_text(
-                f"{t(language, 'wait_generating_short')} {last_percent}%",
-                reply_markup=cancel_keyboard(language),
-            )
+            await wait_msg.edit_text(text, reply_markup=cancel_keyboard(language))
         except Exception:
             pass
 
@@ -333,29 +489,59 @@ async def on_input(message: Message, state: FSMContext):
         last_percent = pct
         await _render_progress()
 
+    async def _fields(fields: dict):
+        # Show title/description as soon as the streaming parser completes them
+        nonlocal preview
+        parts = [str(fields.get(k) or "").strip() for k in ("title", "short_description")]
+        preview = "\n".join(p for p in parts if p)
+        if preview:
+            await _render_progress()
+
+    async def _queue(position: int):
+        nonlocal queued, queue_position
+        queued, queue_position = position > 0, position
+        await _render_progress()
+
     async def _do_generate():
+        if platform == ALL_PLATFORMS:
+            # One generation trimmed into a card per marketplace
+            return await generation_service.generate_platform_cards(
+                product_name=product_name,
+                features=features,
+                tone=tone,
+                length=length,
+                language=generation_service.BILINGUAL if bilingual else language,
+                category=category,
+                progress_cb=_progress,
+                user_id=message.from_user.id,
+                queue_cb=_queue,
+            )
         return await generation_service.generate_product_card(
             product_name=product_name,
             features=features,
             platform=platform,
             tone=tone,
             length=length,
-            language=language,
+            # Both cards come from one call; the UI stays in ``language``
+            language=generation_service.BILINGUAL if bilingual else language,
             category=category,
             progress_cb=_progress,
+            user_id=message.from_user.id,
+            queue_cb=_queue,
+            fields_cb=_fields,
         )
 
     task = asyncio.create_task(_do_generate())
-    _running[message.from_user.id] = {"task": task, "wait_msg": wait_msg, "lang": language}
+    entry["task"] = task
 
     # Fallback ticker: if model/streaming does not push progress, grow 1..90%
     async def _ticker():
         nonlocal last_percent
         try:
             while not task.done():
-                if last_percent < 90:
+                if last_percent < 90 and not queued:
                     last_percent = min(90, max(1, last_percent + 3))
-                    await _render_progress()
+                await _render_progress()
                 await asyncio.sleep(1.5)
         except asyncio.CancelledError:
             pass
@@ -369,7 +555,6 @@ async def on_input(message: Message, state: FSMContext):
             await wait_msg.edit_text(t(language, "cancelled"))
         except Exception:
             pass
-        _running.pop(message.from_user.id, None)
         await state.set_state(GenerationStates.waiting_input)
         return
     except Exception as e:
@@ -386,7 +571,6 @@ async def on_input(message: Message, state: FSMContext):
             await wait_msg.edit_text(
                 t(language, "gen_failed", error=e)
             )
-        _running.pop(message.from_user.id, None)
         await state.set_state(GenerationStates.waiting_input)
         return
     finally:
@@ -395,6 +579,31 @@ async def on_input(message: Message, state: FSMContext):
         except Exception:
             pass
 
+    if platform == ALL_PLATFORMS and bilingual:
+        cards = [
+            (f"{get_profile(code).name} {lang.upper()}", code, card, lang)
+            for lang in ("ru", "en")
+            for code, card in payload[lang].items()
+        ]
+    elif platform == ALL_PLATFORMS:
+        cards = [(get_profile(code).name, code, card, language) for code, card in payload.items()]
+    elif bilingual:
+        cards = [(lang.upper(), platform, payload[lang], lang) for lang in ("ru", "en")]
+    else:
+        cards = None
+    if cards is not None:
+        gen_ids = await _send_cards(message, wait_msg, cards, product_name=product_name, features=features)
+        await message.answer(
+            t(language, "export_prompt"),
+            reply_markup=batch_export_keyboard(gen_ids, language),
+        )
+        await message.answer(
+            t(language, "suggest_next"),
+            reply_markup=actions_keyboard(list(gen_ids.values())[-1], language),
+        )
+        await state.set_state(GenerationStates.waiting_input)
+        return
+
     # Save to DB
     cfg = get_settings()
     gen_id = await add_generation(
@@ -431,10 +640,46 @@ async def on_input(message: Message, state: FSMContext):
         t(language, "suggest_next"),
         reply_markup=actions_keyboard(gen_id, language),
     )
-    _running.pop(message.from_user.id, None)
     await state.set_state(GenerationStates.waiting_input)
 
 
+async def _send_cards(message: Message, wait_msg, cards: list, *, product_name: str, features):
+    """Save and show several cards of one request (per platform or per language).
+
+    ``cards`` holds ``(label, platform, card, language)`` tuples; ``label``
+    names the export buttons and ``language`` selects the rendering.
+    """
+    from services.export_service import render_text_export
+
+    cfg = get_settings()
+    gen_ids = {}
+    for i, (label, platform, card, language) in enumerate(cards):
+        gen_ids[label] = await add_generation(
+            cfg.db_path,
+            tg_id=message.from_user.id,
+            platform=platform,
+            product_name=product_name,
+            features=features,
+            payload=card,
+        )
+        gen = {
+            "platform": platform,
+            "product_name": product_name,
+            "features": features,
+            "title": card.get("title"),
+            "short_description": card.get("short_description"),
+            "bullets": card.get("bullets"),
+        }
+        content = render_text_export(gen, language).strip() or t(language, "empty_response")
+        if i == 0:
+            await wait_msg.edit_text(content)
+        else:
+            await message.answer(content)
+    # Keep the whole batch even with a short history limit
+    await prune_history(cfg.db_path, tg_id=message.from_user.id, keep=max(cfg.history_limit, len(cards)))
+    return gen_ids
+
+
 @router.callback_query(F.data == "new")
 async def on_new(callback: CallbackQuery, state: FSMContext):
     data = await state.get_data()
@@ -20,6 +20,7 @@ _MESSAGES: Dict[str, Dict[str, str]] = {
         "empty_message": "Empty message. Please provide product name and specs.",
         "wait_generating": "Generating a product card… This may take a few seconds.",
         "wait_generating_short": "Generating…",
+        "queued_position": "All model slots are busy. Your place in the queue: {position}",
         "gen_failed_unavailable": (
             "Looks like the model service is unavailable.\n"
             "Ensure Ollama is running and reachable at {base_url}.\n"
@@ -45,6 +46,7 @@ _MESSAGES: Dict[str, Dict[str, str]] = {
         # Buttons
         "btn_lang_ru": "Русский",
         "btn_lang_en": "English",
+        "btn_lang_both": "Русский + English",
         "btn_tone_salesy": "Salesy",
         "btn_tone_concise": "Concise",
         "btn_tone_expert": "Expert",
@@ -55,6 +57,7 @@ _MESSAGES: Dict[str, Dict[str, str]] = {
         "btn_export_txt": "Export TXT",
         "btn_export_csv": "Export CSV",
         "btn_new_generation": "New Generation",
+        "btn_all_platforms": "All marketplaces (one generation)",
         # Presets / categories
         "choose_category": "Choose a category preset:",
         "btn_cat_electronics": "Electronics",
@@ -71,6 +74,7 @@ _MESSAGES: Dict[str, Dict[str, str]] = {
         "stats_header": "Usage stats:",
         "stats_total": "Total: {total} | Users: {users} | Last: {last}",
         "stats_top": "Top users:",
+        "stats_llm": "LLM timings (model platform/lang):",
         "backup_missing": "DB file not found or in-memory.",
         "backup_sent": "Backup file sent.",
         "logs_missing": "Log file not found.",
@@ -93,6 +97,7 @@ _MESSAGES: Dict[str, Dict[str, str]] = {
         "empty_message": "Пустое сообщение. Пожалуйста, укажите название и характеристики товара.",
         "wait_generating": "Генерирую карточку товара… Это может занять несколько секунд.",
         "wait_generating_short": "Генерация…",
+        "queued_position": "Все слоты модели заняты. Ваше место в очереди: {position}",
         "gen_failed_unavailable": (
             "Похоже, сервис модели недоступен.\n"
             "Убедитесь, что Ollama запущен и доступен по адресу {base_url}.\n"
@@ -118,6 +123,7 @@ _MESSAGES: Dict[str, Dict[str, str]] = {
         # Buttons
         "btn_lang_ru": "Русский",
         "btn_lang_en": "English",
+        "btn_lang_both": "Русский + English",
         "btn_tone_salesy": "Рекламный",
         "btn_tone_concise": "Краткий",
         "btn_tone_expert": "Экспертный",
@@ -128,6 +134,7 @@ _MESSAGES: Dict[str, Dict[str, str]] = {
         "btn_export_txt": "Экспорт TXT",
         "btn_export_csv": "Экспорт CSV",
         "btn_new_generation": "Новая генерация",
+        "btn_all_platforms": "Все маркетплейсы (одна генерация)",
         # Presets / categories
         "choose_category": "Выберите пресет категории:",
         "btn_cat_electronics": "Электроника",
@@ -144,6 +151,7 @@ _MESSAGES: Dict[str, Dict[str, str]] = {
         "stats_header": "Статистика использования:",
         "stats_total": "Всего: {total} | Пользователи: {users} | Последняя: {last}",
         "stats_top": "ТОП пользователей:",
+        "stats_llm": "Время LLM (модель площадка/язык):",
         "backup_missing": "Файл БД не найден или используется :memory:",
         "backup_sent": "Файл бэкапа отправлен.",
         "logs_missing": "Файл логов не найден.",
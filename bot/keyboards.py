@@ -1,5 +1,5 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from typing import Optional
+from typing import Dict, Optional
 from .i18n import t
 from app.presets import list_presets
 
@@ -10,6 +10,7 @@ def platforms_keyboard(lang: Optional[str] = None) -> InlineKeyboardMarkup:
         [InlineKeyboardButton(text="Wildberries", callback_data="platform:wb")],
         [InlineKeyboardButton(text="Etsy", callback_data="platform:etsy")],
         [InlineKeyboardButton(text="Shopify", callback_data="platform:shopify")],
+        [InlineKeyboardButton(text=t(lang, "btn_all_platforms"), callback_data="platform:all")],
     ]
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
@@ -25,10 +26,24 @@ def export_keyboard(gen_id: int, lang: Optional[str] = None) -> InlineKeyboardMa
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
+def batch_export_keyboard(gen_ids: Dict[str, int], lang: Optional[str] = None) -> InlineKeyboardMarkup:
+    """Export buttons for each card of a multi-card result (per platform or language)."""
+    buttons = [
+        [
+            InlineKeyboardButton(text=f"{name} TXT", callback_data=f"export:txt:{gen_id}"),
+            InlineKeyboardButton(text=f"{name} CSV", callback_data=f"export:csv:{gen_id}"),
+        ]
+        for name, gen_id in gen_ids.items()
+    ]
+    buttons.append([InlineKeyboardButton(text=t(lang, "btn_new_generation"), callback_data="new")])
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
 def language_keyboard() -> InlineKeyboardMarkup:
     buttons = [
         [InlineKeyboardButton(text=t("ru", "btn_lang_ru"), callback_data="lang:ru")],
         [InlineKeyboardButton(text=t("en", "btn_lang_en"), callback_data="lang:en")],
+        [InlineKeyboardButton(text=t("ru", "btn_lang_both"), callback_data="lang:both")],
     ]
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
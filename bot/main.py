@@ -7,6 +7,7 @@ from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage
 
 from app.config import get_settings
+from services import generation_service, model_keeper
 from storage.sqlite_repo import init_db
 from .handlers import router
 
@@ -43,14 +44,41 @@ async def main():
 
     bot = Bot(token=cfg.telegram_bot_token)
     logging.getLogger(__name__).info(
-        "Starting bot: model=%s base_url=%s db=%s admins=%s",
+        "Starting bot: model=%s backends=%s db=%s admins=%s",
         cfg.llm_model,
         cfg.llm_base_url,
         cfg.db_path,
         ",".join(str(i) for i in getattr(cfg, "admin_ids", tuple())) or "-",
     )
+    # Preload the model so the first user does not pay the cold start
+    client = generation_service.get_client()
+    if getattr(cfg, "llm_warmup", True):
+        await model_keeper.warm_up(client)
+    keeper_task = None
+    interval = getattr(cfg, "llm_keeper_interval_sec", 0)
+    if interval and interval > 0:
+        keeper_task = asyncio.create_task(
+            model_keeper.run_keeper(
+                client,
+                interval_sec=interval,
+                hours=model_keeper.parse_hours(getattr(cfg, "llm_keeper_hours", "")),
+            )
+        )
+
+    prober_task = None
+    probe_interval = getattr(cfg, "llm_probe_interval_sec", 0)
+    if probe_interval and probe_interval > 0:
+        prober_task = asyncio.create_task(client.run_prober(probe_interval))
+
     await bot.delete_webhook(drop_pending_updates=True)
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        for task in (keeper_task, prober_task):
+            if task is not None:
+                task.cancel()
+        # Release the pooled LLM connections on shutdown
+        await generation_service.close_client()
 
 
 if __name__ == "__main__":
@@ -5,7 +5,12 @@ import logging
 import sys
 from typing import Optional
 
-from services.generation_service import generate_product_card
+from services.generation_service import (
+    close_client,
+    generate_platform_cards,
+    generate_product_card,
+    prompt_token_report,
+)
 
 
 logger = logging.getLogger("productcard.cli")
@@ -20,19 +25,43 @@ async def _run(
     audience: Optional[str],
     language: str,
     category: Optional[str],
+    all_platforms: bool = False,
 ):
-    payload = await generate_product_card(
-        product_name=name,
-        features=features,
-        platform=platform,
-        tone=tone,
-        audience=audience,
-        language=language,
-        category=category,
-    )
+    try:
+        if all_platforms:
+            # One generation fanned out into a card per platform
+            payload = await generate_platform_cards(
+                product_name=name,
+                features=features,
+                tone=tone,
+                audience=audience,
+                language=language,
+                category=category,
+            )
+        else:
+            payload = await generate_product_card(
+                product_name=name,
+                features=features,
+                platform=platform,
+                tone=tone,
+                audience=audience,
+                language=language,
+                category=category,
+            )
+    finally:
+        await close_client()
     print(json.dumps(payload, ensure_ascii=False, indent=2))
 
 
+def _print_token_report(length: str) -> None:
+    print(f"{'platform':<12}{'lang':<6}{'system':>8}{'user':>7}{'prompt':>8}{'num_predict':>13}")
+    for row in prompt_token_report(length=length):
+        print(
+            f"{row['platform']:<12}{row['language']:<6}{row['system_tokens']:>8}{row['user_tokens']:>7}"
+            f"{row['prompt_tokens']:>8}{row['num_predict']:>13}"
+        )
+
+
 def main():
     logging.basicConfig(
         level=logging.INFO,
@@ -41,19 +70,43 @@ def main():
     p = argparse.ArgumentParser(
         description="Generate a product card JSON using a local Ollama model (phi3:mini by default).",
     )
-    p.add_argument("name", help="Product name")
+    p.add_argument("name", nargs="?", help="Product name")
     p.add_argument(
         "-f",
         "--features",
         help="Product features/specs (free text)",
     )
     p.add_argument("--platform", help="Target platform (e.g., ozon, wb, etsy, shopify)")
+    p.add_argument(
+        "--all-platforms",
+        action="store_true",
+        help="Generate once and print a card per platform (ozon, wb, etsy, shopify)",
+    )
     p.add_argument("--tone", default="neutral", help="Writing tone (default: neutral)")
     p.add_argument("--audience", help="Target audience")
-    p.add_argument("--lang", default="ru", choices=["ru", "en"], help="Output language: ru or en (default: ru)")
+    p.add_argument(
+        "--lang",
+        default="ru",
+        choices=["ru", "en", "both"],
+        help="Output language: ru, en or both (one call, prints both cards; default: ru)",
+    )
     p.add_argument("--category", help="Optional category preset (e.g., electronics, apparel, home, beauty, sports)")
+    p.add_argument(
+        "--token-report",
+        choices=["short", "medium", "long"],
+        nargs="?",
+        const="medium",
+        help="Print estimated prompt tokens and num_predict per platform and language, then exit",
+    )
 
     args = p.parse_args()
+    if args.token_report:
+        _print_token_report(args.token_report)
+        return
+    if not args.name:
+        p.error("the following arguments are required: name")
+    if args.all_platforms and args.lang == "both":
+        p.error("--all-platforms works with a single --lang")
     try:
         asyncio.run(
             _run(
@@ -64,6 +117,7 @@ def main():
                 audience=args.audience,
                 language=args.lang,
                 category=args.category,
+                all_platforms=args.all_platforms,
             )
         )
     except Exception as exc:
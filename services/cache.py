@@ -0,0 +1,175 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def payload_size(value: Any) -> int:
+    """Approximate memory cost of a JSON-like payload in bytes."""
+    try:
+        return len(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+    except (TypeError, ValueError):
+        return len(repr(value))
+
+
+class TTLCache:
+    """LRU cache with per-entry TTL and an optional byte budget.
+
+    ``get``/``put`` are O(1): entries live in an ``OrderedDict`` ordered from
+    least to most recently used, and a hit moves the entry to the end.
+    Expired entries are dropped lazily on access and, at most every
+    ``purge_interval`` seconds, by a full sweep piggybacked on ``put``.
+    ``ttl <= 0`` disables caching. With ``grace > 0`` an entry stays
+    available to :meth:`get_stale` for that long after its TTL, so callers
+    can serve it while refreshing in the background.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 128,
+        max_bytes: int = 0,
+        ttl: float = 600.0,
+        grace: float = 0.0,
+        purge_interval: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.grace = grace
+        self.purge_interval = purge_interval
+        self._clock = clock
+        # key -> (stored_at, size, value)
+        self._data: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._last_purge = clock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_hits = 0
+
+    def configure(
+        self,
+        *,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+        grace: Optional[float] = None,
+    ) -> None:
+        """Apply new limits (e.g. from settings) and evict down to them."""
+        if max_entries is not None:
+            self.max_entries = max_entries
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+        if ttl is not None:
+            self.ttl = ttl
+        if grace is not None:
+            self.grace = grace
+        self._evict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: str) -> bool:
+        item = self._live(key)
+        return item is not None and self._clock() - item[0] <= self.ttl
+
+    def _drop(self, key: str) -> None:
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def _live(self, key: str) -> Optional[Tuple[float, int, Any]]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        if self._clock() - item[0] > self.ttl + max(0.0, self.grace):
+            self._drop(key)
+            self.expirations += 1
+            return None
+        return item
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.get_stale(key, allow_stale=False)[0]
+
+    def get_stale(self, key: str, *, allow_stale: bool = True) -> Tuple[Optional[Any], bool]:
+        """Return ``(value, stale)``; stale values are past TTL but within grace."""
+        item = self._live(key)
+        stale = item is not None and self._clock() - item[0] > self.ttl
+        if item is None or (stale and not allow_stale):
+            self.misses += 1
+            return None, False
+        self._data.move_to_end(key)
+        self.hits += 1
+        if stale:
+            self.stale_hits += 1
+        return item[2], stale
+
+    def peek(self, key: str) -> Tuple[Optional[Any], bool]:
+        """Like :meth:`get_stale`, but leaves LRU order and hit stats alone."""
+        item = self._live(key)
+        if item is None:
+            return None, False
+        return item[2], self._clock() - item[0] > self.ttl
+
+    def put(self, key: str, value: Any, size: Optional[int] = None) -> None:
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        size = payload_size(value) if size is None else size
+        if self.max_bytes and size > self.max_bytes:
+            return
+        if key in self._data:
+            self._drop(key)
+        now = self._clock()
+        self._data[key] = (now, size, value)
+        self._bytes += size
+        if now - self._last_purge >= self.purge_interval:
+            self.purge_expired()
+        self._evict()
+
+    def pop(self, key: str) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        self._drop(key)
+        return item[2]
+
+    def purge_expired(self) -> int:
+        """Drop every expired entry; returns how many were removed."""
+        now = self._clock()
+        self._last_purge = now
+        limit = self.ttl + max(0.0, self.grace)
+        expired = [k for k, (stored, _, _) in self._data.items() if now - stored > limit]
+        for key in expired:
+            self._drop(key)
+        self.expirations += len(expired)
+        return len(expired)
+
+    def _evict(self) -> None:
+        while self._data and (
+            len(self._data) > max(0, self.max_entries)
+            or (self.max_bytes and self._bytes > self.max_bytes)
+        ):
+            _, (_, size, _) = self._data.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "stale_hits": self.stale_hits,
+        }
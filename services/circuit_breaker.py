@@ -0,0 +1,137 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator
+
+from .llm_backends import is_backend_failure
+
+
+logger = logging.getLogger("productcard")
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the LLM while the circuit is open."""
+
+
+class GuardedCall:
+    """Handle of one guarded call; set ``progressed`` once the backend sent data."""
+
+    __slots__ = ("progressed",)
+
+    def __init__(self) -> None:
+        self.progressed = False
+
+
+class CircuitBreaker:
+    """Classic closed → open → half-open breaker around the LLM backend.
+
+    After ``failure_threshold`` consecutive backend failures (connection
+    errors, timeouts, 5xx) the circuit opens and calls fail fast with
+    :class:`CircuitOpenError`. After ``reset_timeout`` seconds up to
+    ``half_open_max`` probe calls are let through; a success closes the
+    circuit, a failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_max: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = reset_timeout
+        self.half_open_max = max(1, int(half_open_max))
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self.rejected = 0
+        self.opened_count = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probes = 0
+            logger.info("LLM circuit half-open: letting probe requests through")
+        return self._state
+
+    def would_reject(self) -> bool:
+        """True if a call made now would fail fast (does not take a probe slot)."""
+        state = self.state
+        if state == self.OPEN:
+            return True
+        return state == self.HALF_OPEN and self._probes >= self.half_open_max
+
+    def before_call(self) -> None:
+        if self.would_reject():
+            self.rejected += 1
+            raise CircuitOpenError("LLM circuit is open; skipping backend call")
+        if self._state == self.HALF_OPEN:
+            self._probes += 1
+
+    def record_success(self) -> None:
+        if self._state != self.CLOSED:
+            logger.info("LLM circuit closed after a successful call")
+        self._state = self.CLOSED
+        self._failures = 0
+        self._probes = 0
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                self.opened_count += 1
+                logger.warning(
+                    "LLM circuit opened after %s failure(s); failing fast for %.0fs",
+                    self._failures,
+                    self.reset_timeout,
+                )
+            self._state = self.OPEN
+            self._opened_at = self._clock()
+            self._probes = 0
+
+    @contextmanager
+    def guard(self) -> Iterator[GuardedCall]:
+        """Wrap one backend call: fail fast when open, record the outcome.
+
+        A stream closed by its consumer (``GeneratorExit``) after the backend
+        sent data counts as a success; cancellation gives no verdict.
+        """
+        self.before_call()
+        half_open = self._state == self.HALF_OPEN
+        call = GuardedCall()
+        try:
+            yield call
+        except Exception as e:
+            if is_backend_failure(e):
+                self.record_failure()
+            raise
+        except GeneratorExit:
+            # Consumer stopped reading (e.g. the card JSON closed): the backend answered
+            if call.progressed:
+                self.record_success()
+            elif half_open and self._state == self.HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+            raise
+        except BaseException:
+            # Cancelled: no verdict, just free the probe slot
+            if half_open and self._state == self.HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+            raise
+        else:
+            self.record_success()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "failures": self._failures,
+            "opened": self.opened_count,
+            "rejected": self.rejected,
+        }
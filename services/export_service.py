@@ -4,8 +4,8 @@ import csv
 import io
 from typing import Dict, Any, List, Optional
 import html as _html
-import json
-import re
+
+from .json_scan import extract_card
 
 
 def _bullets_to_lines(bullets: Any) -> List[str]:
@@ -25,48 +25,7 @@ def _try_parse_json_like_blob(text: str) -> Optional[Dict[str, Any]]:
     """
     if not text or not isinstance(text, str):
         return None
-
-    # Remove code fences like ```json ... ```
-    cleaned = re.sub(r"^```\w*\n|```$", "", text.strip(), flags=re.MULTILINE)
-
-    # Try direct load
-    try:
-        return json.loads(cleaned)
-    except Exception:
-        pass
-
-    # Extract the first {...} block
-    m = re.search(r"\{[\s\S]*\}", cleaned)
-    if not m:
-        return None
-    chunk = m.group(0)
-
-    # Remove trailing commas before } or ]
-    chunk_nc = re.sub(r",\s*([}\]])", r"\1", chunk)
-    try:
-        return json.loads(chunk_nc)
-    except Exception:
-        pass
-
-    # Last resort: permissive regex extraction for common fields
-    try:
-        title_m = re.search(r'"title"\s*:\s*"([^"]*)"', chunk)
-        desc_m = re.search(r'"short_description"\s*:\s*"([^"]*)"', chunk)
-        bullets_m = re.search(r'"bullets"\s*:\s*\[([\s\S]*?)\]', chunk)
-        if not (title_m or desc_m or bullets_m):
-            return None
-        result: Dict[str, Any] = {
-            "title": title_m.group(1).strip() if title_m else "",
-            "short_description": desc_m.group(1).strip() if desc_m else "",
-            "bullets": [],
-        }
-        if bullets_m:
-            # Extract all string items inside the array
-            items = re.findall(r'"([^"]+)"', bullets_m.group(1))
-            result["bullets"] = [s.strip() for s in items if s.strip()]
-        return result
-    except Exception:
-        return None
+    return extract_card(text)
 
 
 def render_text_export(gen: Dict[str, Any], lang: str = "en") -> str:
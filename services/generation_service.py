@@ -1,14 +1,27 @@
 import asyncio
+import hashlib
 import json
 import logging
+import math
 import re
-from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import unicodedata
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence, Tuple, Union
 
 from app.config import get_settings
-from app.platforms import LENGTH_HINTS, TONE_LABELS, get_profile
+from app.platforms import FANOUT_SEP, LENGTH_HINTS, PROFILES, TONE_LABELS, fanout_codes, get_profile
 from app.presets import get_preset
-from app.prompts import load_prompt
-from .llm_client import OllamaClient
+from app.prompts import Slot, fingerprint as prompt_fingerprint, load_prompt, registry as prompt_registry
+from . import metrics, telemetry
+from .json_repair import coerce_card, repair_card, repair_json
+from .json_scan import StreamingCardParser, extract_card, extract_object
+from .cache import TTLCache
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .llm_backends import parse_urls
+from .near_dup import NearDupIndex
+from .llm_client import GenerationResult, OllamaClient, PhaseTimeouts
+from .scheduler import QueueCallback, get_scheduler
+from storage.sqlite_repo import cache_get, cache_put, cache_stats as db_cache_stats, init_db
 
 
 DEFAULT_SYSTEM_PROMPT_EN = (
@@ -24,6 +37,14 @@ DEFAULT_SYSTEM_PROMPT_RU = (
     "Без markdown и без тройных кавычек/код‑блоков. Никакого лишнего текста, только JSON."
 )
 
+DEFAULT_SYSTEM_PROMPT_BOTH = (
+    "You write concise, compelling e-commerce product cards in Russian and English. "
+    "Always return strict, valid JSON with keys ru and en; each is an object with keys: "
+    "title, short_description, bullets (array of strings). "
+    "The ru card is in natural Russian, the en card in natural English, with the same facts. "
+    "No markdown, no code fences, no extra text besides JSON."
+)
+
 DEFAULT_REPAIR_SYSTEM_PROMPT_EN = (
     "You fix and normalize outputs to strict JSON only. "
     "Return only valid JSON with keys: title, short_description, bullets (array of strings). "
@@ -38,12 +59,215 @@ DEFAULT_REPAIR_SYSTEM_PROMPT_RU = (
 
 logger = logging.getLogger("productcard")
 
-# Simple in-memory cache with TTL
-_CACHE: Dict[str, Tuple[float, Dict[str, Any]]] = {}
-_CACHE_ORDER: list[str] = []
+# ``language`` value asking for the Russian and the English card in one call
+BILINGUAL = "both"
+_BILINGUAL_LANGS = ("ru", "en")
+
+ProgressCallback = Callable[[float], Awaitable[None]]
+FieldsCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# In-memory LRU/TTL tier of finished cards (limits follow settings)
+_CACHE = TTLCache()
+# Similarity index over cached cards' product text (CACHE_NEAR_DUP)
+_NEAR = NearDupIndex()
+
+# In-flight generations by cache key (single-flight coalescing)
+_INFLIGHT: Dict[str, "_Flight"] = {}
+
+
+class _Flight:
+    """One shared generation awaited by every identical concurrent request.
+
+    Progress, partial-field and queue updates are fanned out to each
+    subscriber's own callbacks. The generation is cancelled only when the
+    last subscriber goes away, unless it is a ``detached`` background
+    refresh that must finish regardless.
+    """
+
+    def __init__(self, key: str, stream: bool, detached: bool = False):
+        self.key = key
+        self.stream = stream
+        self.detached = detached
+        self.task: Optional["asyncio.Task[Dict[str, Any]]"] = None
+        self.subscribers: list[tuple] = []
+        self.last_progress = 0.0
+        self.last_fields: Dict[str, Any] = {}
+
+    async def _fan_out(self, index: int, value: Any) -> None:
+        for sub in list(self.subscribers):
+            cb = sub[index]
+            if cb:
+                try:
+                    await cb(value)
+                except Exception:
+                    pass
+
+    async def progress(self, frac: float) -> None:
+        self.last_progress = frac
+        await self._fan_out(0, frac)
+
+    async def queue(self, position: int) -> None:
+        await self._fan_out(1, position)
+
+    async def fields(self, fields: Dict[str, Any]) -> None:
+        self.last_fields = dict(fields)
+        await self._fan_out(2, dict(fields))
+
+    async def join(
+        self,
+        progress_cb: Optional[ProgressCallback],
+        queue_cb: Optional[QueueCallback],
+        fields_cb: Optional[FieldsCallback] = None,
+    ) -> Dict[str, Any]:
+        assert self.task is not None
+        sub = (progress_cb, queue_cb, fields_cb)
+        self.subscribers.append(sub)
+        try:
+            # Late joiner: catch up with the shared state
+            try:
+                if progress_cb and self.last_progress:
+                    await progress_cb(self.last_progress)
+                if fields_cb and self.last_fields:
+                    await fields_cb(dict(self.last_fields))
+            except Exception:
+                pass
+            return await asyncio.shield(self.task)
+        finally:
+            self.subscribers.remove(sub)
+            if not self.subscribers and not self.task.done() and not self.detached:
+                # Unregister now: the task may take a while to unwind, and a
+                # new identical request must start afresh, not join a dying flight
+                _forget_flight(self.key, self)
+                self.task.cancel()
+
+
+def _forget_flight(key: str, flight: _Flight) -> None:
+    if _INFLIGHT.get(key) is flight:
+        _INFLIGHT.pop(key, None)
+
+
+def _start_flight(
+    key: str,
+    *,
+    stream: bool,
+    detached: bool = False,
+    run: Optional[Callable[[_Flight], Awaitable[Dict[str, Any]]]] = None,
+    **kwargs: Any,
+) -> _Flight:
+    """Run ``_generate_uncached`` (or ``run(flight)``) as the shared flight for ``key``."""
+    flight = _Flight(key, stream=stream, detached=detached)
+    if run is not None:
+        coro = run(flight)
+    else:
+        coro = _generate_uncached(
+            progress_cb=flight.progress if stream else None,
+            queue_cb=flight.queue,
+            fields_cb=flight.fields if stream else None,
+            key=key,
+            **kwargs,
+        )
+    flight.task = asyncio.create_task(coro)
+    _INFLIGHT[key] = flight
+    flight.task.add_done_callback(lambda _t: _forget_flight(key, flight))
+    return flight
+
+
+def _refresh_done(task: "asyncio.Task[Dict[str, Any]]") -> None:
+    if task.cancelled():
+        return
+    exc = task.exception()
+    if exc is not None:
+        logger.warning("Background cache refresh failed: %s", exc)
+
+
+# Process-wide LLM client; keeps one pooled HTTP session for all generations
+_CLIENT: Optional[OllamaClient] = None
+_CLIENT_OPTIONS: Optional[Dict[str, Any]] = None
+
+
+def _keep_alive_value(raw: str) -> Optional[Union[str, float]]:
+    """Ollama accepts durations ("30m") or seconds (-1 keeps the model forever)."""
+    raw = (raw or "").strip()
+    if not raw:
+        return None
+    try:
+        return float(raw) if "." in raw else int(raw)
+    except ValueError:
+        return raw
+
+
+def _client_options(cfg: Any) -> Dict[str, Any]:
+    """OllamaClient arguments derived from settings (also the rebuild key)."""
+    return {
+        "base_url": tuple(parse_urls(cfg.llm_base_url)),
+        "model": cfg.llm_model,
+        "pool_limit": getattr(cfg, "llm_pool_limit", 10),
+        "pool_limit_per_host": getattr(cfg, "llm_pool_limit_per_host", 4),
+        "keepalive_timeout": getattr(cfg, "llm_keepalive_sec", 30.0),
+        "keep_alive": _keep_alive_value(getattr(cfg, "llm_keep_alive", "")),
+        "breaker": (
+            getattr(cfg, "llm_breaker_failures", 5),
+            getattr(cfg, "llm_breaker_reset_sec", 30.0),
+            getattr(cfg, "llm_breaker_half_open_probes", 1),
+        ),
+        "timeouts": PhaseTimeouts(
+            connect=getattr(cfg, "llm_connect_timeout", 5.0),
+            first_token=getattr(cfg, "llm_first_token_timeout", None),
+            idle=getattr(cfg, "llm_idle_timeout", None),
+            adaptive=getattr(cfg, "llm_timeout_mode", "fixed") == "adaptive",
+        ),
+        "hedge_percentile": getattr(cfg, "llm_hedge_percentile", 0.0),
+        "hedge_min_delay": getattr(cfg, "llm_hedge_min_delay_sec", 2.0),
+    }
+
+
+def get_client() -> OllamaClient:
+    """Return the shared Ollama client, rebuilding it if settings changed.
+
+    Any client setting counts (backends, model, pool limits, keep-alive,
+    breaker, deadlines, hedging); the replaced client's pool is closed.
+    """
+    global _CLIENT, _CLIENT_OPTIONS
+    options = _client_options(get_settings())
+    client = _CLIENT
+    if client is None or options != _CLIENT_OPTIONS:
+        kwargs = dict(options, base_url=list(options["base_url"]))
+        failures, reset_sec, probes = kwargs.pop("breaker")
+        client = OllamaClient(
+            **kwargs,
+            breaker=CircuitBreaker(failure_threshold=failures, reset_timeout=reset_sec, half_open_max=probes),
+        )
+        old, _CLIENT, _CLIENT_OPTIONS = _CLIENT, client, options
+        if old is not None:
+            _close_replaced(old)
+    return client
+
+
+def _close_replaced(client: OllamaClient) -> None:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        # No loop to close it on; drop the pool synchronously
+        client._discard_session()
+        return
+    asyncio.ensure_future(client.close())
+
+
+async def close_client() -> None:
+    """Release the shared client's connection pool (call on shutdown)."""
+    global _CLIENT, _CLIENT_OPTIONS
+    client, _CLIENT, _CLIENT_OPTIONS = _CLIENT, None, None
+    close = getattr(client, "close", None)
+    if close is not None:
+        try:
+            await close()
+        except Exception as e:
+            logger.warning("Failed to close LLM client: %s", e)
 
 
 def _system_prompt(language: str) -> str:
+    if language == BILINGUAL:
+        return load_prompt("product_card", language=BILINGUAL, default=DEFAULT_SYSTEM_PROMPT_BOTH)
     if language == "ru":
         return load_prompt("product_card", language="ru", default=DEFAULT_SYSTEM_PROMPT_RU)
     return load_prompt("product_card", language="en", default=DEFAULT_SYSTEM_PROMPT_EN)
@@ -58,64 +282,183 @@ def _repair_system_prompt(language: str) -> str:
         "product_card_repair", language="en", default=DEFAULT_REPAIR_SYSTEM_PROMPT_EN
     )
 
-def _cache_key(**kwargs: Any) -> str:
-    # Normalize values and build a stable key
-    parts = [
-        str(kwargs.get("product_name", "")).strip().lower(),
-        str(kwargs.get("features", "")).strip().lower(),
-        str(kwargs.get("platform", "")).strip().lower(),
-        str(kwargs.get("tone", "")).strip().lower(),
-        str(kwargs.get("length", "")).strip().lower(),
-        str(kwargs.get("language", "")).strip().lower(),
-        str(kwargs.get("category", "")).strip().lower(),
-    ]
-    return "|".join(parts)
+# Bump when the key layout or the meaning of a cached payload changes
+CACHE_KEY_VERSION = 2
 
 
-def _extract_json(text: str) -> Dict[str, Any]:
-    """Best‑effort extraction of a JSON object from model output.
+def _norm(value: Any) -> str:
+    """NFKC + casefold + collapsed whitespace, so trivial variants share a key."""
+    if value is None:
+        return ""
+    text = unicodedata.normalize("NFKC", str(value)).casefold()
+    return " ".join(text.split())
+
 
-    Tolerates code fences and trailing commas; if everything fails, returns
-    a fallback structure with the raw text in short_description.
+def _cache_key(
+    *,
+    product_name: str,
+    features: Optional[str] = None,
+    audience: Optional[str] = None,
+    platform: Optional[str] = None,
+    tone: str = "",
+    length: str = "",
+    language: str = "",
+    category: Optional[str] = None,
+    model: str = "",
+    temperature: Optional[float] = None,
+    max_new_tokens: Optional[int] = None,
+    prompt_version: str = "",
+) -> str:
+    """Versioned hash of everything that shapes the generated card.
+
+    Covers the normalized user inputs, the model and its sampling settings
+    and a fingerprint of the prompt files, so editing a prompt or switching
+    ``LLM_MODEL`` never serves cards made under the old setup.
     """
-    # Direct parse attempt
+    canonical = {
+        "product_name": _norm(product_name),
+        "features": _norm(features),
+        "audience": _norm(audience),
+        "platform": _norm(platform),
+        "tone": _norm(tone),
+        "length": _norm(length),
+        "language": _norm(language),
+        "category": _norm(category),
+        "model": _norm(model),
+        "temperature": None if temperature is None else round(float(temperature), 3),
+        "max_new_tokens": None if max_new_tokens is None else int(max_new_tokens),
+        "prompt_version": prompt_version,
+    }
+    blob = json.dumps(canonical, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return f"v{CACHE_KEY_VERSION}:{hashlib.sha256(blob.encode('utf-8')).hexdigest()}"
+
+
+# DB files whose schema was ensured by this process (persistent cache tier)
+_CACHE_DB_READY: set[str] = set()
+
+
+def _persist_path(cfg: Any) -> Optional[str]:
+    # CACHE_TTL_SEC <= 0 turns caching off in both tiers (the SQLite tier would
+    # otherwise inherit it as "never expires")
+    if not getattr(cfg, "cache_persist", False) or getattr(cfg, "cache_ttl_sec", 600.0) <= 0:
+        return None
+    return getattr(cfg, "cache_db_path", "") or getattr(cfg, "db_path", "") or None
+
+
+def _persist_ttl(cfg: Any) -> float:
+    # Same lifetime as the in-memory tier unless CACHE_PERSIST_TTL_SEC overrides it
+    return float(getattr(cfg, "cache_persist_ttl_sec", getattr(cfg, "cache_ttl_sec", 0.0)))
+
+
+async def _persist_get(cfg: Any, key: str) -> Optional[Dict[str, Any]]:
+    """Read-through lookup in the SQLite cache tier (None on miss or error)."""
+    path = _persist_path(cfg)
+    if not path:
+        return None
     try:
-        return json.loads(text)
-    except Exception:
-        pass
-
-    # Find the first {...} block in the text (ignores code fences around)
-    m = re.search(r"\{[\s\S]*\}", text)
-    if m:
-        chunk = m.group(0)
-        # Try strict parse first
-        try:
-            return json.loads(chunk)
-        except Exception:
-            # Remove trailing commas before closing } or ] and retry
-            chunk_nc = re.sub(r",\s*([}\]])", r"\1", chunk)
-            try:
-                return json.loads(chunk_nc)
-            except Exception:
-                # Last resort: extract key fields with regex
-                try:
-                    title_m = re.search(r'"title"\s*:\s*"([^"]*)"', chunk)
-                    desc_m = re.search(r'"short_description"\s*:\s*"([^"]*)"', chunk)
-                    bullets_m = re.search(r'"bullets"\s*:\s*\[([\s\S]*?)\]', chunk)
-                    if not (title_m or desc_m or bullets_m):
-                        raise ValueError("no fields matched")
-                    result: Dict[str, Any] = {
-                        "title": title_m.group(1).strip() if title_m else "",
-                        "short_description": desc_m.group(1).strip() if desc_m else "",
-                        "bullets": [],
-                    }
-                    if bullets_m:
-                        items = re.findall(r'"([^"]+)"', bullets_m.group(1))
-                        result["bullets"] = [s.strip() for s in items if s.strip()]
-                    return result
-                except Exception:
-                    pass
+        if path not in _CACHE_DB_READY:
+            await init_db(path)
+            _CACHE_DB_READY.add(path)
+        payload = await cache_get(
+            path,
+            key=key,
+            ttl_sec=_persist_ttl(cfg),
+        )
+    except Exception as e:
+        logger.warning("Persistent cache read failed: %s", e)
+        return None
+    metrics.incr("cache_db_hits" if payload else "cache_db_misses")
+    return payload
+
+
+async def _persist_put(cfg: Any, key: str, payload: Dict[str, Any]) -> None:
+    path = _persist_path(cfg)
+    if not path or path not in _CACHE_DB_READY:
+        return
+    try:
+        await cache_put(
+            path,
+            key=key,
+            payload=payload,
+            model=str(getattr(cfg, "llm_model", "")),
+            ttl_sec=_persist_ttl(cfg),
+            max_entries=getattr(cfg, "cache_persist_max_entries", 0),
+        )
+    except Exception as e:
+        logger.warning("Persistent cache write failed: %s", e)
+
+
+def _memory_cache(cfg: Any) -> TTLCache:
+    _CACHE.configure(
+        max_entries=getattr(cfg, "cache_size", 128),
+        max_bytes=int(getattr(cfg, "cache_max_mb", 0.0) * 1024 * 1024),
+        ttl=getattr(cfg, "cache_ttl_sec", 600.0),
+        grace=getattr(cfg, "cache_stale_grace_sec", 0.0),
+    )
+    return _CACHE
 
+
+def _remember(
+    cfg: Any, key: str, payload: Dict[str, Any], near: Optional[Tuple[str, str]] = None
+) -> None:
+    """Store a payload in the in-memory tier (and the near-duplicate index)."""
+    _memory_cache(cfg).put(key, dict(payload))
+    if near is not None:
+        _NEAR.max_entries = getattr(cfg, "cache_size", 128)
+        _NEAR.add(key, *near)
+
+
+def _near_lookup(cfg: Any, scope: str, text: str) -> Optional[Dict[str, Any]]:
+    """Cached card of a near-duplicate request, marked with ``near_hit``."""
+    _NEAR.threshold = getattr(cfg, "cache_near_dup_threshold", 0.8)
+    match = _NEAR.query(scope, text)
+    if match is None:
+        return None
+    # Probe without touching hit/miss stats: the exact-key lookup already counted
+    cached, stale = _CACHE.peek(match[0])
+    if cached is None:
+        # The card itself expired or was evicted
+        _NEAR.remove(match[0])
+        return None
+    if stale:
+        return None
+    metrics.incr("cache_near_hits")
+    logger.info("Serving near-duplicate cached card (similarity %.2f)", match[1])
+    return {**cached, "near_hit": True}
+
+
+def cache_stats() -> Dict[str, Any]:
+    """In-memory cache counters for admin views."""
+    return _CACHE.stats()
+
+
+async def persistent_cache_stats() -> Optional[Dict[str, Any]]:
+    """Rows and payload bytes of the SQLite tier; None when it is off or unreadable."""
+    cfg = get_settings()
+    path = _persist_path(cfg)
+    if not path:
+        return None
+    try:
+        if path not in _CACHE_DB_READY:
+            await init_db(path)
+            _CACHE_DB_READY.add(path)
+        return await db_cache_stats(path)
+    except Exception as e:
+        logger.warning("Persistent cache stats failed: %s", e)
+        return None
+
+
+def _extract_json(text: str) -> Dict[str, Any]:
+    """Best‑effort extraction of a JSON object from model output.
+
+    Tolerates code fences, prose and trailing commas (see ``json_scan``); if
+    nothing usable is found, returns a fallback structure with the raw text
+    in short_description. Fields salvaged from broken JSON come back without
+    the missing keys, so the result fails ``_valid_card`` and gets repaired.
+    """
+    card = extract_card(text)
+    if card is not None:
+        return card
     return {
         "title": "",
         "short_description": text.strip(),
@@ -143,22 +486,157 @@ def _split_to_bullets(text: Optional[str]) -> list[str]:
     return uniq[:10]
 
 
-def build_product_prompt(
-    *,
-    product_name: str,
-    features: Optional[str] = None,
-    audience: Optional[str] = None,
-    platform: Optional[str] = None,
-    tone: str = "neutral",
-    length: str = "medium",
-    language: str = "ru",
-    category: Optional[str] = None,
-) -> str:
-    parts = []
+def card_json_schema(platform: Optional[str], length: str = "medium") -> Dict[str, Any]:
+    """JSON schema of a card within the platform limits (Ollama ``format``)."""
     profile = get_profile(platform)
+    target_desc = min(LENGTH_HINTS.get(length, 300), profile.description_max)
+    return {
+        "type": "object",
+        "properties": {
+            "title": {"type": "string", "maxLength": profile.title_max},
+            "short_description": {"type": "string", "maxLength": target_desc},
+            "bullets": {
+                "type": "array",
+                "items": {"type": "string"},
+                "minItems": profile.bullets_min,
+                "maxItems": profile.bullets_max,
+            },
+        },
+        "required": ["title", "short_description", "bullets"],
+    }
+
+
+def _output_format(cfg: Any, platform: Optional[str], length: str) -> Any:
+    """Resolve LLM_FORMAT into the value sent as Ollama's ``format``."""
+    mode = str(getattr(cfg, "llm_format", "") or "").strip().lower()
+    if mode == "schema":
+        return card_json_schema(platform, length)
+    if mode == "json":
+        return "json"
+    return None
+
+
+def _valid_card(payload: Dict[str, Any], require_title: bool = True) -> bool:
+    return (
+        isinstance(payload.get("title"), str)
+        and (not require_title or bool(payload.get("title", "").strip()))
+        and isinstance(payload.get("short_description"), str)
+        and isinstance(payload.get("bullets"), (list, tuple))
+    )
 
-    # Build language-specific instruction blocks to improve fidelity
+
+def _local_repair(raw: str) -> Optional[Dict[str, Any]]:
+    """Rule-based repair of invalid model output; None if it still is not a card."""
+    metrics.incr("gen_local_repairs")
+    card = repair_card(raw)
+    if card is None or not _valid_card(card):
+        return None
+    metrics.incr("gen_local_repairs_ok")
+    logger.info("Invalid JSON repaired locally")
+    return card
+
+
+def _repaired_ok(payload: Dict[str, Any]) -> bool:
+    # The repair keeps whatever title the model gave, even an empty one
+    return _valid_card(payload, require_title=False)
+
+
+def _repair_prompt(language: str, source: str) -> str:
     if language == "ru":
+        head = (
+            "Преобразуй текст ниже в СТРОГИЙ JSON с ключами: title, short_description, bullets (массив).\n"
+            "Выведи только JSON, без пояснений.\n\nТекст:\n"
+        )
+    else:
+        head = (
+            "Convert the text below into STRICT JSON with keys: title, short_description, bullets (array).\n"
+            "Output only the JSON, no comments.\n\nText:\n"
+        )
+    return head + source
+
+
+def _recorder(platform: Optional[str], language: str) -> Callable[[GenerationResult], None]:
+    """``on_done`` callback feeding telemetry for one request."""
+
+    def _record(result: GenerationResult) -> None:
+        if result.done_reason == "length":
+            # Hit num_predict before the model finished: the budget was too tight
+            metrics.incr("gen_budget_exhausted")
+        telemetry.record(result, platform=platform or "", language=language)
+
+    return _record
+
+
+async def _race_cards(
+    contenders: Dict[str, Tuple[Awaitable[Dict[str, Any]], Callable[[Dict[str, Any]], bool]]],
+) -> Tuple[Optional[str], Dict[str, Any]]:
+    """Run card producers concurrently; the first valid card wins.
+
+    Returns ``(winner, card)``; the others are cancelled. Without a valid
+    card the winner is None and the card is the last one produced. If
+    every contender failed, the first error is raised.
+    """
+    tasks = {asyncio.ensure_future(coro): (name, valid) for name, (coro, valid) in contenders.items()}
+    last: Dict[str, Any] = {}
+    errors: list[BaseException] = []
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name, valid = tasks[task]
+                if task.exception() is not None:
+                    logger.warning("Race contender %s failed: %s", name, task.exception())
+                    errors.append(task.exception())
+                    continue
+                card = task.result()
+                if valid(card):
+                    return name, card
+                last = card
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+                metrics.incr("gen_race_cancelled")
+        await asyncio.gather(*tasks, return_exceptions=True)
+    if errors and len(errors) == len(tasks):
+        raise errors[0]
+    return None, last
+
+
+def repair_stats() -> Dict[str, Any]:
+    """How often generations needed local or LLM repairs."""
+    return {
+        "generations": metrics.get("gen_requests"),
+        "invalid_json": metrics.get("gen_invalid_json"),
+        "local_repairs": metrics.get("gen_local_repairs"),
+        "local_repairs_ok": metrics.get("gen_local_repairs_ok"),
+        "local_repair_rate": metrics.ratio("gen_local_repairs_ok", "gen_local_repairs"),
+        "llm_repairs": metrics.get("gen_llm_repairs"),
+        "llm_repairs_ok": metrics.get("gen_llm_repairs_ok"),
+        "best_effort": metrics.get("gen_best_effort"),
+        "fallbacks": metrics.get("gen_fallbacks"),
+        "circuit_open": metrics.get("gen_circuit_open"),
+        "races": metrics.get("gen_races"),
+        "race_wins_repair": metrics.get("gen_race_wins_repair"),
+        "race_wins_regenerate": metrics.get("gen_race_wins_regenerate"),
+        "budget_exhausted": metrics.get("gen_budget_exhausted"),
+        "bilingual": metrics.get("gen_bilingual"),
+        "bilingual_split": metrics.get("gen_bilingual_split"),
+        "repair_rate": metrics.ratio("gen_llm_repairs", "gen_requests"),
+    }
+
+
+def _product_prompt_lines(
+    language: str, platform: Optional[str], tone: str, length: str, category: Optional[str]
+) -> list:
+    """Fixed prompt lines for one combination; user fields are ``Slot``s."""
+    parts: list = []
+    profile = get_profile(platform)
+
+    # Build language-specific instruction blocks to improve fidelity;
+    # the bilingual prompt is the Russian one asking for an English twin card
+    if language in ("ru", BILINGUAL):
         tone_ru = {
             "selling": "рекламный/убеждающий",
             "concise": "краткий",
@@ -167,19 +645,22 @@ def build_product_prompt(
         }
         if platform:
             parts.append(f"Площадка: {platform}")
-        parts.append(f"Название товара: {product_name}")
+        parts.append(Slot("product_name", "Название товара: "))
         parts.append(f"Тон: {tone_ru.get(tone, tone)}")
         # Category preset guidance
         preset = get_preset(category)
         if preset:
             parts.append(f"Категория: {preset.name_ru}")
             parts.extend(preset.style_ru)
-        if audience:
-            parts.append(f"Целевая аудитория: {audience}")
-        if features:
-            parts.append(f"Характеристики: {features}")
+        parts.append(Slot("audience", "Целевая аудитория: ", optional=True))
+        parts.append(Slot("features", "Характеристики: ", optional=True))
         target_desc = min(LENGTH_HINTS.get(length, 300), profile.description_max)
-        parts.append("Задача: написать заголовок и краткое описание на русском.")
+        if language == BILINGUAL:
+            parts.append(
+                "Задача: написать заголовок и краткое описание на русском и такую же карточку на английском."
+            )
+        else:
+            parts.append("Задача: написать заголовок и краткое описание на русском.")
         parts.append(
             "Строго следуй входным данным, не выдумывай характеристики. "
             "Не упоминай Wi‑Fi/Bluetooth и др., если это явно не указано."
@@ -190,18 +671,21 @@ def build_product_prompt(
             "избегай штампов вроде ‘высококачественный’, ‘лучший’, ‘современный’; "
             "никаких слов ‘пожалуйста’."
         )
-        # Platform-specific guidance
-        if (platform or "").lower() == "wb":
+        # Platform-specific guidance; a fan-out card follows the rules of every target
+        codes = fanout_codes(platform)
+        if "wb" in codes:
             parts.append(
                 "Стиль WB: без эмодзи и CAPS; никаких обещаний/гарантий; избегай повторов ‘беспроводной’."
             )
+        if "ozon" in codes:
             parts.append(
-                "Буллеты: 3–5 коротких пунктов по 2–6 слов, без точки на конце."
+                "Стиль Ozon: нейтральный, информативный; если в названии есть бренд, ставь его ближе к началу заголовка."
             )
-        elif (platform or "").lower() == "ozon":
+        if codes == ("wb",):
             parts.append(
-                "Стиль Ozon: нейтральный, информативный; если в названии есть бренд, ставь его ближе к началу заголовка."
+                "Буллеты: 3–5 коротких пунктов по 2–6 слов, без точки на конце."
             )
+        elif codes == ("ozon",):
             parts.append(
                 "Буллеты: 3–6 пунктов по 2–7 слов, без точки на конце."
             )
@@ -209,26 +693,33 @@ def build_product_prompt(
             parts.append(
                 "Буллеты: 3–6 пунктов по 2–7 слов, без точки на конце; начинай с существительного (пример: ‘Тихие клики’, ‘Стабильная связь 2.4 ГГц’)."
             )
+        if language == BILINGUAL:
+            parts.append(
+                'Выводи СТРОГО JSON вида {"ru": {...}, "en": {...}}, где каждая карточка — объект с полями: '
+                "title, short_description, bullets (массив строк). en — естественный английский с теми же "
+                "фактами, не дословный перевод. Без markdown."
+            )
+            limits_prefix = "Ограничения для каждой карточки"
+        else:
+            parts.append(
+                "Выводи СТРОГО JSON с полями: title, short_description, bullets (массив строк). Без markdown."
+            )
+            limits_prefix = "Ограничения"
         parts.append(
-            "Выводи СТРОГО JSON с полями: title, short_description, bullets (массив строк). Без markdown."
-        )
-        parts.append(
-            f"Ограничения: title ≤ {profile.title_max} символов; short_description ≤ {target_desc} символов; "
+            f"{limits_prefix}: title ≤ {profile.title_max} символов; short_description ≤ {target_desc} символов; "
             f"bullets {profile.bullets_min}-{profile.bullets_max} пунктов."
         )
     else:
         if platform:
             parts.append(f"Platform: {platform}")
-        parts.append(f"Product name: {product_name}")
+        parts.append(Slot("product_name", "Product name: "))
         parts.append(f"Tone: {TONE_LABELS.get(tone, tone)}")
         preset = get_preset(category)
         if preset:
             parts.append(f"Category: {preset.name_en}")
             parts.extend(preset.style_en)
-        if audience:
-            parts.append(f"Target audience: {audience}")
-        if features:
-            parts.append(f"Key features/specs: {features}")
+        parts.append(Slot("audience", "Target audience: ", optional=True))
+        parts.append(Slot("features", "Key features/specs: ", optional=True))
         target_desc = min(LENGTH_HINTS.get(length, 300), profile.description_max)
         parts.append("Task: write a concise, convincing product title and short description.")
         parts.append("Use only provided facts; do not invent specs.")
@@ -237,7 +728,138 @@ def build_product_prompt(
             f"Constraints: title <= {profile.title_max} chars; short_description <= {target_desc} chars; "
             f"bullets {profile.bullets_min}-{profile.bullets_max} items."
         )
-    return "\n".join(parts)
+    return parts
+
+
+def build_product_prompt(
+    *,
+    product_name: str,
+    features: Optional[str] = None,
+    audience: Optional[str] = None,
+    platform: Optional[str] = None,
+    tone: str = "neutral",
+    length: str = "medium",
+    language: str = "ru",
+    category: Optional[str] = None,
+) -> str:
+    # Everything but the user fields is compiled once per combination
+    language = language if language in ("ru", BILINGUAL) else "en"
+    combo = ("product", language, platform, tone, length, category)
+    template = prompt_registry.template(
+        combo, lambda: _product_prompt_lines(language, platform, tone, length, category)
+    )
+    return template.render(product_name=product_name, audience=audience, features=features)
+
+
+# Rough characters per token of Llama/Phi-style BPE vocabularies by script
+_CHARS_PER_TOKEN_CYRILLIC = 2.0
+_CHARS_PER_TOKEN_OTHER = 3.8
+_CYRILLIC_RE = re.compile(r"[\u0400-\u04ff]")
+# Longest bullet the prompts allow (2–8 words)
+_BULLET_CHARS = 64
+# Stops only ever match chatter: valid JSON never has a raw newline inside a string
+_STOP_SEQUENCES = {
+    "ru": ("\n\n\n", "\nПримечание:", "\nПояснение:"),
+    "en": ("\n\n\n", "\nNote:", "\nExplanation:"),
+}
+
+
+@dataclass(frozen=True)
+class TokenBudget:
+    num_predict: int
+    stop: Tuple[str, ...]
+    # Longest card text the profile allows, in characters
+    output_chars: int
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count; Cyrillic costs more tokens per character."""
+    cyrillic = len(_CYRILLIC_RE.findall(text))
+    return math.ceil(cyrillic / _CHARS_PER_TOKEN_CYRILLIC + (len(text) - cyrillic) / _CHARS_PER_TOKEN_OTHER)
+
+
+def plan_tokens(
+    platform: Optional[str], length: str, language: str, *, cap: Optional[int] = None
+) -> TokenBudget:
+    """Tight ``num_predict`` and stop sequences for one card.
+
+    Sized for the longest card the platform profile accepts: title, the
+    length target (+25%, within ``description_max``) and ``bullets_max``
+    full-length bullets, plus JSON punctuation and 15% headroom. ``cap``
+    (the configured maximum) is never exceeded.
+    """
+    profile = get_profile(platform)
+    language = "ru" if language == "ru" else "en"
+    target_desc = min(LENGTH_HINTS.get(length, 300), profile.description_max)
+    desc_chars = min(profile.description_max, math.ceil(target_desc * 1.25))
+    chars = profile.title_max + desc_chars + profile.bullets_max * _BULLET_CHARS
+    per_token = _CHARS_PER_TOKEN_CYRILLIC if language == "ru" else _CHARS_PER_TOKEN_OTHER
+    # Keys, quotes, commas and brackets tokenize at ~1 char per token
+    overhead = 24 + 3 * profile.bullets_max
+    num_predict = max(64, math.ceil(chars / per_token * 1.15) + overhead)
+    if cap:
+        num_predict = min(num_predict, int(cap))
+    return TokenBudget(num_predict=num_predict, stop=_STOP_SEQUENCES[language], output_chars=chars)
+
+
+_REPORT_SAMPLES = {
+    "ru": ("Беспроводная мышь Logitech M185", "тихие клики; 2.4 ГГц; до 12 месяцев от одной батарейки"),
+    "en": ("Logitech M185 wireless mouse", "quiet clicks; 2.4 GHz; up to 12 months on one battery"),
+}
+
+
+def prompt_token_report(length: str = "medium") -> list[Dict[str, Any]]:
+    """Estimated prompt tokens and planned ``num_predict`` per platform and language."""
+    rows = []
+    for platform in PROFILES:
+        for language, (product_name, features) in _REPORT_SAMPLES.items():
+            user = build_product_prompt(
+                product_name=product_name, features=features, platform=platform, length=length, language=language
+            )
+            system = _system_prompt(language)
+            budget = plan_tokens(platform, length, language)
+            rows.append(
+                {
+                    "platform": platform,
+                    "language": language,
+                    "system_tokens": estimate_tokens(system),
+                    "user_tokens": estimate_tokens(user),
+                    "prompt_tokens": estimate_tokens(system) + estimate_tokens(user),
+                    "num_predict": budget.num_predict,
+                }
+            )
+    return rows
+
+
+def _sampling(
+    cfg: Any,
+    platform: Optional[str],
+    length: str,
+    language: str,
+    temperature: Optional[float],
+    max_new_tokens: Optional[int],
+) -> Tuple[float, int]:
+    """Temperature and token budget of one card, defaulted from settings."""
+    temperature = temperature if temperature is not None else cfg.llm_temperature
+    if max_new_tokens is None:
+        max_new_tokens = cfg.llm_max_new_tokens
+        if getattr(cfg, "llm_token_planner", False):
+            # Never decode more than the longest card the platform accepts
+            max_new_tokens = plan_tokens(platform, length, language, cap=max_new_tokens).num_predict
+    return temperature, max_new_tokens
+
+
+def _request_key(
+    cfg: Any, *, product_name: str, features: Optional[str], **key_fields: Any
+) -> Tuple[str, Optional[Tuple[str, str]]]:
+    """Cache key of a card request and, if enabled, its near-duplicate scope and text."""
+    key_fields.update(model=getattr(cfg, "llm_model", ""), prompt_version=prompt_fingerprint())
+    key = _cache_key(product_name=product_name, features=features, **key_fields)
+    near: Optional[Tuple[str, str]] = None
+    if getattr(cfg, "cache_near_dup", False):
+        # Same settings, product text compared by token-set similarity
+        near = (_cache_key(product_name="", **key_fields), _norm(f"{product_name} {features or ''}"))
+    return key, near
 
 
 async def generate_product_card(
@@ -252,15 +874,53 @@ async def generate_product_card(
     category: Optional[str] = None,
     temperature: Optional[float] = None,
     max_new_tokens: Optional[int] = None,
-    progress_cb: Optional[Callable[[float], Awaitable[None]]] = None,
+    progress_cb: Optional[ProgressCallback] = None,
+    user_id: Optional[int] = None,
+    queue_cb: Optional[QueueCallback] = None,
+    fields_cb: Optional[FieldsCallback] = None,
 ) -> Dict[str, Any]:
-    cfg = get_settings()
-    client = OllamaClient(base_url=cfg.llm_base_url, model=cfg.llm_model)
+    """Generate a product card, waiting for an LLM slot if the backend is busy.
 
-    temperature = temperature if temperature is not None else cfg.llm_temperature
-    max_new_tokens = max_new_tokens if max_new_tokens is not None else cfg.llm_max_new_tokens
+    ``user_id`` selects the fair-queue lane; ``queue_cb`` receives the 1-based
+    queue position while the request waits for admission. When streaming
+    (``progress_cb`` given), ``fields_cb`` receives the card fields parsed so
+    far as soon as each one is complete.
 
-    prompt = build_product_prompt(
+    With ``language="both"`` one call writes the Russian and the English
+    card and ``{"ru": card, "en": card}`` is returned.
+    """
+    cfg = get_settings()
+    if language == BILINGUAL:
+        return await _generate_bilingual(
+            product_name=product_name,
+            features=features,
+            audience=audience,
+            platform=platform,
+            tone=tone,
+            length=length,
+            category=category,
+            temperature=temperature,
+            max_new_tokens=max_new_tokens,
+            progress_cb=progress_cb,
+            user_id=user_id,
+            queue_cb=queue_cb,
+        )
+
+    temperature, max_new_tokens = _sampling(cfg, platform, length, language, temperature, max_new_tokens)
+    key, near = _request_key(
+        cfg,
+        product_name=product_name,
+        features=features,
+        audience=audience,
+        platform=platform,
+        tone=tone,
+        length=length,
+        language=language,
+        category=category,
+        temperature=temperature,
+        max_new_tokens=max_new_tokens,
+    )
+    gen_kwargs: Dict[str, Any] = dict(
         product_name=product_name,
         features=features,
         audience=audience,
@@ -269,127 +929,291 @@ async def generate_product_card(
         length=length,
         language=language,
         category=category,
+        temperature=temperature,
+        max_new_tokens=max_new_tokens,
+        near=near,
     )
 
-    # Cache lookup
-    key = _cache_key(
+    hit, stale = _memory_cache(cfg).get_stale(key)
+    if hit is not None:
+        if stale:
+            # Serve-stale: answer now, refresh once in the background
+            metrics.incr("cache_stale_hits")
+            if key not in _INFLIGHT:
+                metrics.incr("cache_refreshes")
+                flight = _start_flight(key, stream=False, detached=True, user_id=None, refresh=True, **gen_kwargs)
+                assert flight.task is not None
+                flight.task.add_done_callback(_refresh_done)
+        return dict(hit)
+
+    if near is not None:
+        similar = _near_lookup(cfg, *near)
+        if similar is not None:
+            return similar
+
+    # Single-flight: identical concurrent requests share one generation
+    flight = _INFLIGHT.get(key)
+    if flight is None:
+        flight = _start_flight(
+            key, stream=progress_cb is not None or fields_cb is not None, user_id=user_id, **gen_kwargs
+        )
+    else:
+        logger.info("Joining in-flight generation for identical request")
+    return dict(await flight.join(progress_cb, queue_cb, fields_cb))
+
+
+async def _generate_uncached(
+    *,
+    product_name: str,
+    features: Optional[str],
+    audience: Optional[str],
+    platform: Optional[str],
+    tone: str,
+    length: str,
+    language: str,
+    category: Optional[str],
+    temperature: float,
+    max_new_tokens: int,
+    progress_cb: Optional[ProgressCallback],
+    user_id: Optional[int],
+    queue_cb: Optional[QueueCallback],
+    fields_cb: Optional[FieldsCallback],
+    key: str,
+    near: Optional[Tuple[str, str]] = None,
+    refresh: bool = False,
+) -> Dict[str, Any]:
+    cfg = get_settings()
+
+    # Read-through: a card persisted by an earlier process skips the LLM.
+    # A stale refresh wants a new card, so it goes straight to the model.
+    persisted = None if refresh else await _persist_get(cfg, key)
+    if persisted:
+        _remember(cfg, key, persisted, near=near)
+        return persisted
+
+    client = get_client()
+
+    prompt = build_product_prompt(
         product_name=product_name,
         features=features,
+        audience=audience,
         platform=platform,
         tone=tone,
         length=length,
         language=language,
         category=category,
     )
-    now = asyncio.get_event_loop().time()
-    hit = _CACHE.get(key)
-    if hit and (now - hit[0]) <= cfg.cache_ttl_sec:
-        return dict(hit[1])
 
+    output_format = _output_format(cfg, platform, length)
+    stop = _STOP_SEQUENCES["ru" if language == "ru" else "en"] if getattr(cfg, "llm_token_planner", False) else None
+    metrics.incr("gen_requests")
+
+    _record = _recorder(platform, language)
+
+    async def _llm_repair(source: str) -> Dict[str, Any]:
+        """Ask the model to turn ``source`` into strict card JSON."""
+        metrics.incr("gen_llm_repairs")
+        raw = await client.generate(
+            _repair_prompt(language, source),
+            system=_repair_system_prompt(language),
+            temperature=0.2,
+            max_new_tokens=max_new_tokens,
+            timeout=cfg.llm_timeout,
+            format=output_format,
+            stop=stop,
+            on_done=_record,
+        )
+        card = _extract_json(raw)
+        if not _repaired_ok(card):
+            card = _local_repair(raw) or card
+        return card
+
+    async def _regenerate() -> Dict[str, Any]:
+        raw = await client.generate(
+            prompt,
+            system=_system_prompt(language),
+            temperature=temperature,
+            max_new_tokens=max_new_tokens,
+            timeout=cfg.llm_timeout,
+            format=output_format,
+            stop=stop,
+            on_done=_record,
+        )
+        card = _extract_json(raw)
+        if not _valid_card(card):
+            card = _local_repair(raw) or card
+        return card
+
+    race = getattr(cfg, "gen_repair_race", False)
+    scheduler = get_scheduler()
     attempt = 0
     last_raw = ""
     payload: Dict[str, Any] = {}
+    fallback = False
     try:
-        while True:
-            attempt += 1
-            # Choose system prompt per target language
-            sys_prompt = _system_prompt(language)
-            if progress_cb:
-                # Stream with approximate progress towards 95%
-                profile = get_profile(platform)
-                target_desc = min(LENGTH_HINTS.get(length, 300), profile.description_max)
-                expected_chars = profile.title_max + target_desc + profile.bullets_max * 25 + 64
-                generated = []
-
-                async for chunk in client.generate_stream(
-                    prompt,
-                    system=sys_prompt,
-                    temperature=temperature,
-                    max_new_tokens=max_new_tokens,
-                    timeout=cfg.llm_timeout,
-                ):
-                    generated.append(chunk)
-                    total = sum(len(c) for c in generated)
-                    # Cap at 95% until parsing completes
-                    frac = min(0.95, max(0.01, total / max(200, expected_chars)))
+        # Fail fast (no queueing, no retries) while the backend circuit is open
+        breaker = getattr(client, "breaker", None)
+        if breaker is not None and breaker.would_reject():
+            raise CircuitOpenError("LLM circuit is open")
+        async with scheduler.slot(user_id, on_queue=queue_cb):
+            while True:
+                attempt += 1
+                # Choose system prompt per target language
+                sys_prompt = _system_prompt(language)
+                streamed: Optional[Dict[str, Any]] = None
+                if progress_cb or fields_cb:
+                    # Stream with approximate progress towards 95%
+                    profile = get_profile(platform)
+                    target_desc = min(LENGTH_HINTS.get(length, 300), profile.description_max)
+                    expected_chars = profile.title_max + target_desc + profile.bullets_max * 25 + 64
+                    generated = []
+                    total = 0
+                    parser = StreamingCardParser()
+                    seen_fields = 0
+
+                    stream = client.generate_stream(
+                        prompt,
+                        system=sys_prompt,
+                        temperature=temperature,
+                        max_new_tokens=max_new_tokens,
+                        timeout=cfg.llm_timeout,
+                        format=output_format,
+                        stop=stop,
+                        on_done=_record,
+                    )
+                    try:
+                        async for chunk in stream:
+                            generated.append(chunk)
+                            total += len(chunk)
+                            # Cap at 95% until parsing completes
+                            frac = min(0.95, max(0.01, total / max(200, expected_chars)))
+                            if progress_cb:
+                                try:
+                                    await progress_cb(frac)
+                                except Exception:
+                                    pass
+                            closed = parser.feed(chunk)
+                            if fields_cb and len(parser.fields) != seen_fields:
+                                seen_fields = len(parser.fields)
+                                try:
+                                    await fields_cb(dict(parser.fields))
+                                except Exception:
+                                    pass
+                            if closed:
+                                # Card object is complete; skip trailing chatter
+                                logger.debug("Card JSON closed after %s chars; stopping stream", total)
+                                break
+                    finally:
+                        aclose = getattr(stream, "aclose", None)
+                        if aclose is not None:
+                            await aclose()
+                    raw = "".join(generated)
+                    streamed = parser.result
+                else:
+                    raw = await client.generate(
+                        prompt,
+                        system=sys_prompt,
+                        temperature=temperature,
+                        max_new_tokens=max_new_tokens,
+                        timeout=cfg.llm_timeout,
+                        format=output_format,
+                        stop=stop,
+                        on_done=_record,
+                    )
+                last_raw = raw
+                payload = streamed if streamed is not None else _extract_json(raw)
+                # Validate structure and ensure title is not empty (fallback produces empty title)
+                if _valid_card(payload):
+                    break
+
+                metrics.incr("gen_invalid_json")
+                # Mechanical damage (quotes, brackets, truncation) is fixed locally
+                repaired = _local_repair(raw)
+                if repaired is not None:
+                    payload = repaired
+                    break
+                if attempt > cfg.gen_max_retries:
+                    logger.warning(
+                        "JSON invalid after %s attempts; returning best-effort parse", attempt
+                    )
+                    metrics.incr("gen_best_effort")
+                    break
+
+                if progress_cb:
+                    # Repair without streaming; jump progress near completion
                     try:
-                        await progress_cb(frac)
+                        await progress_cb(0.96)
                     except Exception:
                         pass
-                raw = "".join(generated)
-            else:
-                raw = await client.generate(
-                    prompt,
-                    system=sys_prompt,
-                    temperature=temperature,
-                    max_new_tokens=max_new_tokens,
-                    timeout=cfg.llm_timeout,
-                )
-            last_raw = raw
-            payload = _extract_json(raw)
-            # Validate structure and ensure title is not empty (fallback produces empty title)
-            if (
-                isinstance(payload.get("title"), str)
-                and payload.get("title", "").strip()
-                and isinstance(payload.get("short_description"), str)
-                and isinstance(payload.get("bullets"), (list, tuple))
-            ):
-                break
-
-            if attempt > cfg.gen_max_retries:
-                logger.warning(
-                    "JSON invalid after %s attempts; returning best-effort parse", attempt
-                )
-                break
-
-            # Repair attempt: ask the model to fix into JSON
-            logger.info("Retrying generation with repair (attempt %s)", attempt)
-            repair_prompt = (
-                (
-                    "Преобразуй текст ниже в СТРОГИЙ JSON с ключами: title, short_description, bullets (массив).\n"
-                    "Выведи только JSON, без пояснений.\n\nТекст:\n"
-                )
-                if language == "ru"
-                else (
-                    "Convert the text below into STRICT JSON with keys: title, short_description, bullets (array).\n"
-                    "Output only the JSON, no comments.\n\nText:\n"
-                )
-            ) + last_raw
-            await asyncio.sleep(cfg.gen_retry_delay_sec)
-            rep_sys = _repair_system_prompt(language)
-            if progress_cb:
-                # Repair without streaming; jump progress near completion
-                try:
-                    await progress_cb(0.96)
-                except Exception:
-                    pass
-                raw = await client.generate(
-                    repair_prompt,
-                    system=rep_sys,
-                    temperature=0.2,
-                    max_new_tokens=max_new_tokens,
-                    timeout=cfg.llm_timeout,
-                )
-            else:
-                raw = await client.generate(
-                    repair_prompt,
-                    system=rep_sys,
-                    temperature=0.2,
-                    max_new_tokens=max_new_tokens,
-                    timeout=cfg.llm_timeout,
-                )
-            payload = _extract_json(raw)
-            if (
-                isinstance(payload.get("title"), str)
-                and isinstance(payload.get("short_description"), str)
-                and isinstance(payload.get("bullets"), (list, tuple))
-            ):
-                break
-            await asyncio.sleep(cfg.gen_retry_delay_sec)
+
+                if race and scheduler.try_acquire():
+                    # Spare slot: LLM repair and a fresh generation run side by side
+                    logger.info("Racing LLM repair against regeneration (attempt %s)", attempt)
+                    metrics.incr("gen_races")
+                    try:
+                        winner, raced = await _race_cards(
+                            {
+                                "repair": (_llm_repair(last_raw), _repaired_ok),
+                                "regenerate": (_regenerate(), _valid_card),
+                            }
+                        )
+                    finally:
+                        scheduler.release()
+                    if raced:
+                        payload = raced
+                    if winner is not None:
+                        metrics.incr(f"gen_race_wins_{winner}")
+                        if winner == "repair":
+                            metrics.incr("gen_llm_repairs_ok")
+                        break
+                    # The regeneration used up an attempt as well
+                    attempt += 1
+                    if attempt > cfg.gen_max_retries:
+                        logger.warning("No valid card from the repair race; returning best-effort parse")
+                        metrics.incr("gen_best_effort")
+                        break
+                    continue
+
+                # Repair attempt: ask the model to fix into JSON
+                logger.info("Retrying generation with repair (attempt %s)", attempt)
+                await asyncio.sleep(cfg.gen_retry_delay_sec)
+                payload = await _llm_repair(last_raw)
+                if _repaired_ok(payload):
+                    metrics.incr("gen_llm_repairs_ok")
+                    break
+                await asyncio.sleep(cfg.gen_retry_delay_sec)
+    except CircuitOpenError:
+        logger.warning("LLM circuit open; serving heuristic card")
+        metrics.incr("gen_fallbacks")
+        metrics.incr("gen_circuit_open")
+        payload = {}
+        fallback = True
     except Exception as e:
         logger.exception("LLM generation failed; falling back to heuristic output: %s", e)
+        metrics.incr("gen_fallbacks")
         payload = {}
-    # Postprocess to enforce limits just in case
+        fallback = True
+    payload = _finalize_card(payload, platform=platform, product_name=product_name, features=features)
+    if progress_cb:
+        try:
+            await progress_cb(1.0)
+        except Exception:
+            pass
+
+    if fallback:
+        # Heuristic cards are never cached: the next request retries the model
+        # (and a stale refresh keeps serving the old card)
+        return payload
+
+    _remember(cfg, key, payload, near=near)
+    await _persist_put(cfg, key, payload)
+    return payload
+
+
+def _finalize_card(
+    payload: Dict[str, Any], *, platform: Optional[str], product_name: str, features: Optional[str]
+) -> Dict[str, Any]:
+    """Enforce platform limits and fill missing fields from the user input."""
     profile = get_profile(platform)
     title = str(payload.get("title", ""))[: profile.title_max].strip()
     desc = str(payload.get("short_description", ""))[: profile.description_max].strip()
@@ -419,17 +1243,370 @@ async def generate_product_card(
             desc = str(product_name)[: profile.description_max].strip()
 
     payload.update(title=title, short_description=desc, bullets=bullets)
+    return payload
+
+
+def _bilingual_format(cfg: Any, platform: Optional[str], length: str) -> Any:
+    """Ollama ``format`` of a bilingual reply: the card schema under ru and en."""
+    fmt = _output_format(cfg, platform, length)
+    if isinstance(fmt, dict):
+        return {
+            "type": "object",
+            "properties": {lang: fmt for lang in _BILINGUAL_LANGS},
+            "required": list(_BILINGUAL_LANGS),
+        }
+    return fmt
+
+
+def _split_bilingual(raw: str) -> Dict[str, Dict[str, Any]]:
+    """Valid per-language cards of a bilingual reply; broken ones are left out."""
+    obj = extract_object(raw, required=_BILINGUAL_LANGS)
+    if not isinstance(obj, dict) or not any(lang in obj for lang in _BILINGUAL_LANGS):
+        # Same local fixes as single cards (quotes, brackets, truncation)
+        obj = repair_json(raw)
+    cards: Dict[str, Dict[str, Any]] = {}
+    if not isinstance(obj, dict):
+        return cards
+    for lang in _BILINGUAL_LANGS:
+        sub = obj.get(lang)
+        if isinstance(sub, dict):
+            card = coerce_card({"title": "", "short_description": "", "bullets": [], **sub})
+            if _valid_card(card):
+                cards[lang] = card
+    return cards
+
+
+async def _bilingual_call(
+    cfg: Any,
+    *,
+    product_name: str,
+    features: Optional[str],
+    audience: Optional[str],
+    platform: Optional[str],
+    tone: str,
+    length: str,
+    category: Optional[str],
+    temperature: float,
+    max_new_tokens: int,
+    user_id: Optional[int],
+    queue_cb: Optional[QueueCallback],
+) -> Dict[str, Dict[str, Any]]:
+    """One model call for both languages; valid cards by language, {} on failure."""
+    metrics.incr("gen_bilingual")
+    client = get_client()
+    prompt = build_product_prompt(
+        product_name=product_name,
+        features=features,
+        audience=audience,
+        platform=platform,
+        tone=tone,
+        length=length,
+        language=BILINGUAL,
+        category=category,
+    )
+    stop = None
+    if getattr(cfg, "llm_token_planner", False):
+        stop = tuple(dict.fromkeys(_STOP_SEQUENCES["ru"] + _STOP_SEQUENCES["en"]))
+    try:
+        breaker = getattr(client, "breaker", None)
+        if breaker is not None and breaker.would_reject():
+            raise CircuitOpenError("LLM circuit is open")
+        async with get_scheduler().slot(user_id, on_queue=queue_cb):
+            raw = await client.generate(
+                prompt,
+                system=_system_prompt(BILINGUAL),
+                temperature=temperature,
+                max_new_tokens=max_new_tokens,
+                timeout=cfg.llm_timeout,
+                format=_bilingual_format(cfg, platform, length),
+                stop=stop,
+                on_done=_recorder(platform, BILINGUAL),
+            )
+    except Exception as e:
+        # Each language then goes through the single-language path (retries, fallbacks)
+        logger.warning("Bilingual generation failed; generating languages separately: %s", e)
+        return {}
+    return _split_bilingual(raw)
+
+
+async def _generate_bilingual(
+    *,
+    product_name: str,
+    features: Optional[str],
+    audience: Optional[str],
+    platform: Optional[str],
+    tone: str,
+    length: str,
+    category: Optional[str],
+    temperature: Optional[float],
+    max_new_tokens: Optional[int],
+    progress_cb: Optional[ProgressCallback],
+    user_id: Optional[int],
+    queue_cb: Optional[QueueCallback],
+) -> Dict[str, Dict[str, Any]]:
+    """Russian and English cards from one model call.
+
+    Each language is a regular flight under the key a single-language
+    request would use, so identical concurrent requests (bilingual or not)
+    join it and the finished cards fill both cache entries. If either card
+    is already cached (including stale entries within grace) or being
+    generated, both languages go through :func:`generate_product_card`
+    instead; a language missing from the reply is generated on its own.
+    """
+    cfg = get_settings()
+    requests: Dict[str, Dict[str, Any]] = {}
+    for lang in _BILINGUAL_LANGS:
+        temp, budget = _sampling(cfg, platform, length, lang, temperature, max_new_tokens)
+        key, near = _request_key(
+            cfg,
+            product_name=product_name,
+            features=features,
+            audience=audience,
+            platform=platform,
+            tone=tone,
+            length=length,
+            language=lang,
+            category=category,
+            temperature=temp,
+            max_new_tokens=budget,
+        )
+        requests[lang] = dict(
+            key=key,
+            product_name=product_name,
+            features=features,
+            audience=audience,
+            platform=platform,
+            tone=tone,
+            length=length,
+            language=lang,
+            category=category,
+            temperature=temp,
+            max_new_tokens=budget,
+            near=near,
+        )
+
+    cache = _memory_cache(cfg)
+    for req in requests.values():
+        if cache.peek(req["key"])[0] is None and req["key"] not in _INFLIGHT:
+            persisted = await _persist_get(cfg, req["key"])
+            if persisted:
+                _remember(cfg, req["key"], persisted, near=req["near"])
+    # No awaits from here until the flights are registered
+    if any(cache.peek(req["key"])[0] is not None or req["key"] in _INFLIGHT for req in requests.values()):
+        # Part of the work is done already: only the missing language hits the model
+        ru, en = await asyncio.gather(
+            *(
+                generate_product_card(
+                    product_name=product_name,
+                    features=features,
+                    audience=audience,
+                    platform=platform,
+                    tone=tone,
+                    length=length,
+                    language=lang,
+                    category=category,
+                    temperature=temperature,
+                    max_new_tokens=max_new_tokens,
+                    user_id=user_id,
+                )
+                for lang in _BILINGUAL_LANGS
+            )
+        )
+        return {"ru": ru, "en": en}
+
+    flights: Dict[str, _Flight] = {}
+
+    async def _queue(position: int) -> None:
+        for flight in flights.values():
+            await flight.queue(position)
+
+    shared = asyncio.ensure_future(
+        _bilingual_call(
+            cfg,
+            product_name=product_name,
+            features=features,
+            audience=audience,
+            platform=platform,
+            tone=tone,
+            length=length,
+            category=category,
+            temperature=requests["ru"]["temperature"],
+            max_new_tokens=sum(req["max_new_tokens"] for req in requests.values()),
+            user_id=user_id,
+            queue_cb=_queue,
+        )
+    )
+
+    def _part(lang: str) -> Callable[[_Flight], Awaitable[Dict[str, Any]]]:
+        req = requests[lang]
+
+        async def run(flight: _Flight) -> Dict[str, Any]:
+            cards = await asyncio.shield(shared)
+            card = cards.get(lang)
+            if card is None:
+                metrics.incr("gen_bilingual_split")
+                return await _generate_uncached(
+                    **req,
+                    progress_cb=None,
+                    user_id=user_id,
+                    queue_cb=flight.queue,
+                    fields_cb=None,
+                )
+            card = _finalize_card(card, platform=platform, product_name=product_name, features=features)
+            _remember(cfg, req["key"], card, near=req["near"])
+            await _persist_put(cfg, req["key"], card)
+            return card
+
+        return run
+
+    def _part_done(_task: "asyncio.Task[Dict[str, Any]]") -> None:
+        # The shared call goes away once no language flight needs it
+        if all(f.task is not None and f.task.done() for f in flights.values()):
+            shared.cancel()
+
+    for lang in _BILINGUAL_LANGS:
+        flights[lang] = _start_flight(requests[lang]["key"], stream=False, run=_part(lang))
+    for flight in flights.values():
+        assert flight.task is not None
+        flight.task.add_done_callback(_part_done)
+    # Queue positions are shared, so report them through one flight only
+    ru, en = await asyncio.gather(flights["ru"].join(None, queue_cb), flights["en"].join(None, None))
+    out = {"ru": dict(ru), "en": dict(en)}
     if progress_cb:
         try:
             await progress_cb(1.0)
         except Exception:
             pass
+    return out
 
-    # Store in cache
-    _CACHE[key] = (now, dict(payload))
-    _CACHE_ORDER.append(key)
-    # Enforce cache size
-    while len(_CACHE_ORDER) > cfg.cache_size:
-        oldest = _CACHE_ORDER.pop(0)
-        _CACHE.pop(oldest, None)
-    return payload
+_SENTENCE_END_RE = re.compile(r"[.!?…](?=\s|$)")
+
+
+def _trim_text(text: str, limit: int) -> Tuple[str, bool]:
+    """Cut ``text`` to ``limit`` chars; ``clean`` if it still ends on a whole sentence."""
+    text = text.strip()
+    if len(text) <= limit:
+        return text, True
+    head = text[: limit + 1]
+    ends = [m.end() for m in _SENTENCE_END_RE.finditer(head) if m.end() <= limit]
+    if ends and ends[-1] >= limit // 2:
+        return text[: ends[-1]], True
+    head = head[:limit]
+    if not text[limit].isspace() and " " in head:
+        head = head.rsplit(" ", 1)[0]
+    return head.rstrip(" ,;:—-"), False
+
+
+def adapt_card(card: Dict[str, Any], platform: Optional[str]) -> Tuple[Dict[str, Any], bool]:
+    """Fit a fan-out card to one platform profile.
+
+    Returns the trimmed card and whether the description still ends on a
+    whole sentence (``False`` means it had to be cut mid-sentence).
+    """
+    profile = get_profile(platform)
+    title, _ = _trim_text(str(card.get("title", "")), profile.title_max)
+    desc, clean = _trim_text(str(card.get("short_description", "")), profile.description_max)
+    bullets = [str(b) for b in card.get("bullets") or []][: profile.bullets_max]
+    return {**card, "title": title, "short_description": desc, "bullets": bullets}, clean
+
+
+async def _shorten_description(
+    text: str, limit: int, language: str, *, user_id: Optional[int] = None
+) -> Optional[str]:
+    """Ask the model for a description of at most ``limit`` chars, or None."""
+    cfg = get_settings()
+    if language == "ru":
+        prompt = (
+            f"Сократи описание товара до {limit} символов. Сохрани факты, ничего не добавляй. "
+            f"Выведи только текст описания.\n\n{text}"
+        )
+        per_token = _CHARS_PER_TOKEN_CYRILLIC
+    else:
+        prompt = (
+            f"Shorten this product description to at most {limit} characters. Keep the facts, add nothing. "
+            f"Output only the description text.\n\n{text}"
+        )
+        per_token = _CHARS_PER_TOKEN_OTHER
+    try:
+        async with get_scheduler().slot(user_id):
+            raw = await get_client().generate(
+                prompt,
+                temperature=0.3,
+                max_new_tokens=math.ceil(limit / per_token * 1.15) + 16,
+                timeout=cfg.llm_timeout,
+            )
+    except Exception as e:
+        logger.warning("Description rewrite failed; keeping the trimmed text: %s", e)
+        return None
+    shortened, clean = _trim_text(raw.strip().strip("\"«»“”"), limit)
+    return shortened if shortened and clean else None
+
+
+async def generate_platform_cards(
+    *,
+    product_name: str,
+    features: Optional[str] = None,
+    audience: Optional[str] = None,
+    platforms: Optional[Sequence[str]] = None,
+    tone: str = "neutral",
+    length: str = "medium",
+    language: str = "ru",
+    category: Optional[str] = None,
+    progress_cb: Optional[ProgressCallback] = None,
+    user_id: Optional[int] = None,
+    queue_cb: Optional[QueueCallback] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Cards for several platforms (all of ``PROFILES`` by default) from one generation.
+
+    A single superset card is generated under the strictest title limit
+    and the widest description/bullet limits of the targets, then trimmed
+    to each profile. The model is called again only to shorten a
+    description that cannot be cut at a sentence boundary; platforms with
+    the same limit share that call. With ``language="both"`` the superset
+    comes from one bilingual call and the result is
+    ``{"ru": {platform: card}, "en": {platform: card}}``.
+    """
+    codes = fanout_codes(FANOUT_SEP.join(platforms or PROFILES))
+    if not codes:
+        raise ValueError(f"No known platforms in {platforms!r}")
+    metrics.incr("fanout_requests")
+    superset = await generate_product_card(
+        product_name=product_name,
+        features=features,
+        audience=audience,
+        platform=FANOUT_SEP.join(codes),
+        tone=tone,
+        length=length,
+        language=language,
+        category=category,
+        progress_cb=progress_cb,
+        user_id=user_id,
+        queue_cb=queue_cb,
+    )
+    if language == BILINGUAL:
+        return {
+            lang: await _adapt_to_platforms(superset[lang], codes, lang, user_id=user_id)
+            for lang in _BILINGUAL_LANGS
+        }
+    return await _adapt_to_platforms(superset, codes, language, user_id=user_id)
+
+
+async def _adapt_to_platforms(
+    superset: Dict[str, Any], codes: Sequence[str], language: str, *, user_id: Optional[int]
+) -> Dict[str, Dict[str, Any]]:
+    cards: Dict[str, Dict[str, Any]] = {}
+    # description limit -> model-shortened text (None if the rewrite failed)
+    rewrites: Dict[int, Optional[str]] = {}
+    for code in codes:
+        card, clean = adapt_card(superset, code)
+        if not clean:
+            limit = get_profile(code).description_max
+            if limit not in rewrites:
+                metrics.incr("fanout_rewrites")
+                rewrites[limit] = await _shorten_description(
+                    str(superset.get("short_description", "")), limit, language, user_id=user_id
+                )
+            if rewrites[limit]:
+                card["short_description"] = rewrites[limit]
+        cards[code] = card
+    return cards
@@ -0,0 +1,270 @@
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Opening quote -> quotes accepted as its closer (models mix plain and smart quotes)
+_QUOTES = {
+    '"': '"”“',
+    "“": "”“\"",
+    "”": "”“\"",
+    "„": "“”\"",
+    "«": "»",
+    "'": "'",
+}
+_STR_SPECIAL_RE = re.compile(r'["\\\n\r\t“”»\']')
+_WS_RE = re.compile(r"\s*")
+_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?")
+_WORD_RE = re.compile(r"[^\s,:{}\[\]\"“”„«»']+")
+# After a raw newline inside a string: the next line starts a quoted key or closes a container
+_RESUME_RE = re.compile(r"[ \t\r]*\n\s*(?:[\"“„'«]\w+[\"”“'»]\s*:|[}\]])")
+_LITERALS = {"true": "true", "false": "false", "null": "null", "True": "true", "False": "false", "None": "null"}
+_ESCAPES = set('"\\/bfnrtu')
+_BULLET_SPLIT_RE = re.compile(r"\s*(?:\n|;|\u2022)\s*(?:[-*]\s+)?")
+
+CARD_KEYS = ("title", "short_description", "bullets")
+
+
+class _Repairer:
+    """Rewrites JSON-ish text into strict JSON in one left-to-right pass."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.out: List[str] = []
+        self.stack: List[str] = []
+        # Output length and open brackets after the last complete member
+        self.safe: Optional[Tuple[int, Tuple[str, ...]]] = None
+        self.expect_key = False
+        self.after_value = False
+
+    def _strip_trailing_comma(self) -> None:
+        while self.out and self.out[-1].isspace():
+            self.out.pop()
+        if self.out and self.out[-1] == ",":
+            self.out.pop()
+
+    def _value_done(self) -> None:
+        self.after_value = True
+        self.expect_key = False
+        self.safe = (len(self.out), tuple(self.stack))
+
+    def _open_value(self) -> None:
+        # Missing comma between members: "a" "b" / } {
+        if self.after_value and self.stack:
+            self.out.append(",")
+            self.expect_key = self.stack[-1] == "{"
+        self.after_value = False
+
+    def _string(self, i: int, opener: str) -> Tuple[int, bool]:
+        """Copy a string literal starting after ``opener``; returns (index, closed)."""
+        text, out = self.text, self.out
+        closers = _QUOTES[opener]
+        n = len(text)
+        out.append('"')
+        while True:
+            m = _STR_SPECIAL_RE.search(text, i)
+            if m is None:
+                out.append(text[i:])
+                return n, False
+            j = m.start()
+            if j > i:
+                out.append(text[i:j])
+            ch = text[j]
+            if ch == "\\":
+                nxt = text[j + 1 : j + 2]
+                if nxt in _ESCAPES and nxt:
+                    out.append(text[j : j + 2])
+                    i = j + 2
+                elif nxt == "'":
+                    out.append("'")
+                    i = j + 2
+                else:
+                    out.append("\\\\")
+                    i = j + 1
+                continue
+            if ch in closers:
+                k = _WS_RE.match(text, j + 1).end()
+                if k >= n or text[k] in ",:}]":
+                    out.append('"')
+                    return j + 1, True
+                if (
+                    ch == '"'
+                    and k > j + 1
+                    and text[k] in "\"“„'«"
+                    and text[k + 1 : k + 2] not in ("", ",", ":", "}", "]")
+                    and not self.expect_key
+                ):
+                    # Next member starts right away; the comma is missing
+                    out.append('"')
+                    return j + 1, True
+            if ch == "\n" and _RESUME_RE.match(text, j):
+                # Unterminated string: the next line already continues the object
+                out.append('"')
+                return j, True
+            if ch == '"':
+                out.append('\\"')
+            elif ch == "\n":
+                out.append("\\n")
+            elif ch == "\r":
+                out.append("\\r")
+            elif ch == "\t":
+                out.append("\\t")
+            else:
+                out.append(ch)
+            i = j + 1
+
+    def run(self) -> str:
+        text, out, stack = self.text, self.out, self.stack
+        i = text.find("{")
+        if i < 0:
+            i = text.find("[")
+            if i < 0:
+                return ""
+        n = len(text)
+        while i < n:
+            ch = text[i]
+            if ch in "{[":
+                self._open_value()
+                stack.append(ch)
+                out.append(ch)
+                self.expect_key = ch == "{"
+                i += 1
+            elif ch in "}]":
+                want = "{" if ch == "}" else "["
+                if want in stack:
+                    while stack:
+                        top = stack.pop()
+                        self._strip_trailing_comma()
+                        out.append("}" if top == "{" else "]")
+                        if top == want:
+                            break
+                    self._value_done()
+                    if not stack:
+                        break
+                i += 1
+            elif ch == ",":
+                self._strip_trailing_comma()
+                out.append(",")
+                self.after_value = False
+                self.expect_key = bool(stack) and stack[-1] == "{"
+                i += 1
+            elif ch == ":":
+                out.append(":")
+                self.after_value = False
+                self.expect_key = False
+                i += 1
+            elif ch.isspace():
+                out.append(ch)
+                i += 1
+            elif ch in _QUOTES or ch == "»":
+                if ch == "»":
+                    i += 1
+                    continue
+                was_key = self.expect_key
+                self._open_value()
+                i, closed = self._string(i + 1, ch)
+                if not closed:
+                    out.append('"')
+                if was_key and stack and stack[-1] == "{":
+                    self.after_value = False
+                    self.expect_key = False
+                else:
+                    self._value_done()
+            else:
+                m = _NUMBER_RE.match(text, i)
+                if m:
+                    self._open_value()
+                    out.append(m.group())
+                    self._value_done()
+                    i = m.end()
+                    continue
+                m = _WORD_RE.match(text, i)
+                if m is None:
+                    i += 1
+                    continue
+                word = m.group()
+                was_key = self.expect_key
+                self._open_value()
+                if word in _LITERALS and not was_key:
+                    out.append(_LITERALS[word])
+                    self._value_done()
+                else:
+                    # Bare key or value: quote it
+                    out.append(json.dumps(word, ensure_ascii=False))
+                    if was_key:
+                        self.expect_key = False
+                    else:
+                        self._value_done()
+                i = m.end()
+        return self._close()
+
+    def _close(self) -> str:
+        if not self.stack:
+            return "".join(self.out)
+        # Truncated: finish the dangling member or drop back to the last complete one
+        tail = "".join(self.out).rstrip()
+        if tail.endswith(":"):
+            tail += " null"
+        elif tail.endswith((",", "{", "[")) or not self.after_value:
+            if self.safe is not None and not tail.endswith(("{", "[")):
+                tail = "".join(self.out[: self.safe[0]])
+                self.stack = list(self.safe[1])
+            tail = tail.rstrip().rstrip(",")
+        return tail + "".join("}" if b == "{" else "]" for b in reversed(self.stack))
+
+
+def repair_json(text: str) -> Optional[Any]:
+    """Parse JSON-ish model output after deterministic fixes, or None.
+
+    Handles smart and single quotes, unescaped quotes and newlines inside
+    strings, missing commas, trailing commas, bare words and Python
+    literals, unterminated strings and missing closing brackets (a dangling
+    half-written member is dropped).
+    """
+    if not text:
+        return None
+    fixed = _Repairer(text).run()
+    if not fixed:
+        return None
+    try:
+        return json.loads(fixed)
+    except ValueError:
+        return None
+
+
+def _as_text(value: Any) -> Any:
+    if isinstance(value, list):
+        return " ".join(str(v).strip() for v in value if str(v).strip())
+    if isinstance(value, (int, float)):
+        return str(value)
+    return value
+
+
+def coerce_card(obj: Dict[str, Any]) -> Dict[str, Any]:
+    """Fix field types: bullets given as a string, text fields as lists/numbers."""
+    card = dict(obj)
+    for key in ("title", "short_description"):
+        if key in card:
+            card[key] = _as_text(card[key])
+    bullets = card.get("bullets")
+    if isinstance(bullets, str):
+        items = _BULLET_SPLIT_RE.split(bullets.strip())
+        if len(items) == 1 and "," in bullets:
+            items = bullets.split(",")
+        card["bullets"] = [s.strip(" -*\t") for s in items if s.strip(" -*\t")]
+    elif isinstance(bullets, list):
+        card["bullets"] = [_as_text(b) if not isinstance(b, str) else b for b in bullets]
+    return card
+
+
+def repair_card(text: str) -> Optional[Dict[str, Any]]:
+    """Locally repaired card with normalized field types, or None.
+
+    Missing card fields (e.g. cut off by truncation, or a key left without
+    a value) default to empty.
+    """
+    obj = repair_json(text)
+    if not isinstance(obj, dict) or not any(k in obj for k in CARD_KEYS):
+        return None
+    present = {k: v for k, v in obj.items() if v is not None}
+    return coerce_card({"title": "", "short_description": "", "bullets": [], **present})
@@ -0,0 +1,284 @@
+import json
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+CARD_KEYS = ("title", "short_description", "bullets")
+
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+# A whole string literal (escapes included, unterminated at end of text), a
+# comma followed only by whitespace before a closing bracket, or a bracket
+_TOKEN_RE = re.compile(r'"[^"\\]*(?:\\[\s\S][^"\\]*)*(?:"|\\?\Z)|,(?=\s*[}\]])|[{}\[\]]')
+_WS_RE = re.compile(r"\s*")
+_DECODER = json.JSONDecoder()
+
+
+def _loads_lenient(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except Exception:
+        return json.loads(_TRAILING_COMMA_RE.sub(r"\1", text))
+
+
+class StreamingCardParser:
+    """Incremental scanner for a product-card JSON object in streamed output.
+
+    Feed it chunks as they arrive. It tracks brace depth and string/escape
+    state in one pass over each new character, collects top-level fields as
+    soon as their values close (``fields``) and reports completion once a
+    top-level object containing all ``required`` keys has been closed, so the
+    caller can stop the stream instead of decoding trailing chatter.
+    """
+
+    def __init__(self, required: Sequence[str] = CARD_KEYS):
+        self.required = tuple(required)
+        self.text = ""
+        self.result: Optional[Dict[str, Any]] = None
+        self.fields: Dict[str, Any] = {}
+        self._pos = 0
+        self._depth = 0
+        self._in_str = False
+        self._esc = False
+        self._obj_start = -1
+        self._str_start = -1
+        self._key: Optional[str] = None
+        self._expect_value = False
+        self._value_start = -1
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None
+
+    def feed(self, chunk: str) -> bool:
+        """Consume a chunk; return True once the card object is complete."""
+        if self.result is not None:
+            return True
+        self.text += chunk
+        text = self.text
+        i = self._pos
+        n = len(text)
+        while i < n:
+            ch = text[i]
+            if self._depth == 0:
+                # Outside any object only an opening brace matters; quotes
+                # in surrounding prose must not toggle string state.
+                if ch == "{":
+                    self._obj_start = i
+                    self._reset_fields()
+                    self._depth = 1
+                i += 1
+                continue
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif ch == "\\":
+                    self._esc = True
+                elif ch == '"':
+                    self._in_str = False
+                    if self._depth == 1:
+                        self._close_top_string(text, i)
+            elif ch == '"':
+                self._in_str = True
+                self._str_start = i
+                if self._depth == 1 and self._expect_value and self._value_start < 0:
+                    self._value_start = i
+            elif ch in "{[":
+                if self._depth == 1 and self._expect_value and self._value_start < 0:
+                    self._value_start = i
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 1 and self._value_start >= 0:
+                    self._close_value(text, i)
+                elif self._depth == 0 and self._obj_start >= 0:
+                    if self._close_object(text[self._obj_start : i + 1]):
+                        self._pos = i + 1
+                        return True
+                    self._obj_start = -1
+            elif self._depth == 1:
+                if ch == ":":
+                    self._expect_value = True
+                elif ch == ",":
+                    self._expect_value = False
+                    self._value_start = -1
+            i += 1
+        self._pos = n
+        return False
+
+    def _reset_fields(self) -> None:
+        self.fields = {}
+        self._key = None
+        self._expect_value = False
+        self._value_start = -1
+
+    def _close_top_string(self, text: str, end: int) -> None:
+        literal = text[self._str_start : end + 1]
+        if self._value_start == self._str_start:
+            self._close_value(text, end)
+            return
+        try:
+            self._key = json.loads(literal)
+        except Exception:
+            self._key = None
+
+    def _close_value(self, text: str, end: int) -> None:
+        if self._key is not None:
+            try:
+                self.fields[self._key] = _loads_lenient(text[self._value_start : end + 1])
+            except Exception:
+                pass
+        self._expect_value = False
+        self._value_start = -1
+
+    def _close_object(self, chunk: str) -> bool:
+        try:
+            obj = _loads_lenient(chunk)
+        except Exception:
+            return False
+        if isinstance(obj, dict) and all(k in obj for k in self.required):
+            self.result = obj
+            return True
+        return False
+
+
+def _object_end(text: str, start: int) -> Tuple[Optional[int], List[int]]:
+    """End of the object opened at ``start`` and its trailing-comma positions.
+
+    String literals are consumed whole, so braces and commas inside values
+    do not count. The end is None for an object still open at the end of
+    the text (truncated output).
+    """
+    depth = 0
+    commas: List[int] = []
+    for m in _TOKEN_RE.finditer(text, start):
+        ch = text[m.start()]
+        if ch == '"':
+            continue
+        if ch == ",":
+            commas.append(m.start())
+            continue
+        if ch in "{[":
+            depth += 1
+            continue
+        depth -= 1
+        if depth == 0:
+            return m.end(), commas
+    return None, commas
+
+
+def _drop(text: str, start: int, end: int, positions: List[int]) -> str:
+    parts = []
+    for pos in positions:
+        parts.append(text[start:pos])
+        start = pos + 1
+    parts.append(text[start:end])
+    return "".join(parts)
+
+
+def _decode_value(text: str, pos: int) -> Tuple[Any, int]:
+    try:
+        return _DECODER.raw_decode(text, pos)
+    except ValueError:
+        if text[pos : pos + 1] not in ("{", "["):
+            raise
+    end, commas = _object_end(text, pos)
+    if end is None or not commas:
+        raise ValueError("unterminated or invalid value")
+    return json.loads(_drop(text, pos, end, commas)), end
+
+
+def _salvage(text: str, start: int, end: Optional[int]) -> Dict[str, Any]:
+    """Leading top-level ``"key": value`` pairs of a broken object, in order."""
+    fields: Dict[str, Any] = {}
+    stop = len(text) if end is None else end
+    pos = start + 1
+    while True:
+        pos = _WS_RE.match(text, pos).end()
+        if pos >= stop or text[pos] != '"':
+            break
+        try:
+            key, pos = _DECODER.raw_decode(text, pos)
+            pos = _WS_RE.match(text, pos).end()
+            if text[pos : pos + 1] != ":":
+                break
+            value, pos = _decode_value(text, _WS_RE.match(text, pos + 1).end())
+        except ValueError:
+            break
+        if pos > stop:
+            break
+        fields[key] = value
+        pos = _WS_RE.match(text, pos).end()
+        if text[pos : pos + 1] != ",":
+            break
+        pos += 1
+    return fields
+
+
+def _scan(
+    text: str, required: Sequence[str]
+) -> Tuple[Optional[Dict[str, Any]], List[Tuple[int, Optional[int]]]]:
+    """Best parsed object plus the spans of candidates that did not parse.
+
+    Walks top-level ``{`` positions left to right. Each is first decoded in
+    place (C speed, trailing chatter ignored); only a candidate that fails
+    is scanned token by token to find its end and retried without trailing
+    commas.
+    """
+    first: Optional[Dict[str, Any]] = None
+    broken: List[Tuple[int, Optional[int]]] = []
+    start = text.find("{")
+    while start >= 0:
+        obj: Any = None
+        try:
+            obj, end = _DECODER.raw_decode(text, start)
+        except ValueError:
+            end, commas = _object_end(text, start)
+            if end is not None and commas:
+                try:
+                    obj = json.loads(_drop(text, start, end, commas))
+                except ValueError:
+                    obj = None
+            if obj is None:
+                broken.append((start, end))
+                if end is None:
+                    break
+        if isinstance(obj, dict):
+            if all(k in obj for k in required):
+                return obj, []
+            if first is None:
+                first = obj
+        start = text.find("{", end)
+    return first, broken
+
+
+def extract_object(text: str, required: Sequence[str] = CARD_KEYS) -> Optional[Dict[str, Any]]:
+    """First JSON object in free-form model output, or None.
+
+    Prefers the first object holding all ``required`` keys, otherwise the
+    first object that parses. Tolerates code fences, surrounding prose and
+    trailing commas; runs in linear time.
+    """
+    if not text:
+        return None
+    return _scan(text, required)[0]
+
+
+def extract_card(text: str) -> Optional[Dict[str, Any]]:
+    """Like :func:`extract_object`, but salvages card fields from broken JSON.
+
+    When no object parses, the top-level fields that did close (e.g. in a
+    truncated reply) are returned on their own. Missing card keys are not
+    filled in, so a partial result never passes for a complete card; the
+    caller should repair the raw text instead.
+    """
+    if not text:
+        return None
+    obj, broken = _scan(text, CARD_KEYS)
+    if obj is not None:
+        return obj
+    best: Dict[str, Any] = {}
+    for start, end in broken:
+        fields = _salvage(text, start, end)
+        if sum(k in fields for k in CARD_KEYS) > sum(k in best for k in CARD_KEYS):
+            best = fields
+    return best or None
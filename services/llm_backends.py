@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Union
+
+import aiohttp
+
+
+logger = logging.getLogger("productcard")
+
+
+class OllamaHTTPError(RuntimeError):
+    """Non-2xx reply from Ollama; ``status`` keeps the HTTP code."""
+
+    def __init__(self, status: int, text: str):
+        super().__init__(f"Ollama HTTP {status}: {text}")
+        self.status = status
+
+
+class LLMStallError(asyncio.TimeoutError):
+    """A generation phase (first token / idle between chunks) missed its deadline."""
+
+    def __init__(self, phase: str, limit: float):
+        super().__init__(f"LLM stalled: no {phase.replace('_', ' ')} within {limit:.1f}s")
+        self.phase = phase
+        self.limit = limit
+
+
+def is_backend_failure(error: BaseException) -> bool:
+    """True for errors that mean the host itself is unhealthy (not a bad request)."""
+    if isinstance(error, OllamaHTTPError):
+        return error.status >= 500
+    return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError, OSError))
+
+
+def parse_urls(base_url: Union[str, Sequence[str]]) -> List[str]:
+    """Accept one URL, a comma-separated list, or a sequence of URLs."""
+    if isinstance(base_url, str):
+        items = base_url.split(",")
+    else:
+        items = list(base_url)
+    urls = [str(u).strip().rstrip("/") for u in items if str(u).strip()]
+    if not urls:
+        raise ValueError("At least one LLM backend URL is required")
+    return urls
+
+
+@dataclass
+class Backend:
+    url: str
+    healthy: bool = True
+    outstanding: int = 0
+    # Exponentially weighted latency (seconds) of health probes
+    latency: Optional[float] = None
+    failures: int = 0
+    last_error: str = ""
+    last_checked: Optional[float] = None
+
+    def observe_latency(self, seconds: float, alpha: float = 0.3) -> None:
+        if self.latency is None:
+            self.latency = seconds
+        else:
+            self.latency = alpha * seconds + (1 - alpha) * self.latency
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "latency": self.latency,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+class BackendPool:
+    """Routes requests across several Ollama hosts.
+
+    Picks the healthy backend with the fewest outstanding requests, breaking
+    ties by observed latency. Backends that fail are taken out of rotation
+    until a probe (see :meth:`probe`) finds them reachable again.
+    """
+
+    def __init__(self, urls: Sequence[str]):
+        self.backends = [Backend(url=u) for u in urls]
+
+    def __len__(self) -> int:
+        return len(self.backends)
+
+    def pick(self, exclude: Sequence[Backend] = ()) -> Backend:
+        candidates = [b for b in self.backends if b.healthy and b not in exclude]
+        if not candidates:
+            # Everything looks down: still try rather than fail outright
+            candidates = [b for b in self.backends if b not in exclude] or list(self.backends)
+        return min(
+            candidates,
+            key=lambda b: (b.outstanding, b.latency if b.latency is not None else 0.0),
+        )
+
+    @contextmanager
+    def track(self, backend: Backend) -> Iterator[Backend]:
+        """Count an outstanding request and update backend state from its outcome."""
+        backend.outstanding += 1
+        try:
+            yield backend
+        except Exception as e:
+            if is_backend_failure(e):
+                self.mark_failure(backend, e)
+            raise
+        else:
+            self.mark_success(backend)
+        finally:
+            backend.outstanding -= 1
+
+    def mark_success(self, backend: Backend) -> None:
+        if not backend.healthy:
+            logger.info("LLM backend %s is back in rotation", backend.url)
+        backend.healthy = True
+        backend.failures = 0
+        backend.last_error = ""
+
+    def mark_failure(self, backend: Backend, error: Any) -> None:
+        backend.failures += 1
+        backend.last_error = str(error)[:200]
+        if backend.healthy:
+            logger.warning("LLM backend %s taken out of rotation: %s", backend.url, backend.last_error)
+        backend.healthy = False
+
+    async def probe(self, check: Callable[[Backend], Awaitable[bool]]) -> None:
+        """Run ``check`` against every backend concurrently and update health."""
+
+        async def _one(backend: Backend) -> None:
+            started = time.monotonic()
+            try:
+                ok = await check(backend)
+            except Exception as e:
+                ok = False
+                backend.last_error = str(e)[:200]
+            backend.last_checked = time.time()
+            if ok:
+                backend.observe_latency(time.monotonic() - started)
+                self.mark_success(backend)
+            else:
+                self.mark_failure(backend, backend.last_error or "health check failed")
+
+        await asyncio.gather(*(_one(b) for b in self.backends))
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [b.status() for b in self.backends]
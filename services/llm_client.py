@@ -1,32 +1,218 @@
+import asyncio
+import json
 import logging
-from typing import Any, AsyncIterator, Dict, Optional, Sequence, Union
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple, Union
 
 import aiohttp
 
+from .circuit_breaker import CircuitBreaker
+from . import metrics
+from .llm_backends import Backend, BackendPool, LLMStallError, OllamaHTTPError, parse_urls
+
 
 logger = logging.getLogger("productcard")
 
 
+def _when(loop: asyncio.AbstractEventLoop, seconds: Optional[float]) -> Optional[float]:
+    return loop.time() + seconds if seconds else None
+
+
+def _adaptive(cap: Optional[float], name: str, factor: float, floor: float, min_samples: int) -> Optional[float]:
+    if metrics.sample_count(name) < min_samples:
+        return cap
+    budget = max(floor, (metrics.percentile(name, 99) or 0.0) * factor)
+    return min(cap, budget) if cap else budget
+
+
+@dataclass
+class PhaseTimeouts:
+    """Deadlines (seconds) for each phase of a streamed generation.
+
+    ``connect`` bounds opening the socket, ``first_token`` the wait for the
+    first frame (model load and prompt evaluation included) and ``idle`` the
+    gap between later frames. ``None``/0 disables a phase. In adaptive mode
+    the last two follow the p99 of recently observed latencies, with the
+    configured values acting as upper bounds.
+    """
+
+    connect: Optional[float] = 10.0
+    first_token: Optional[float] = None
+    idle: Optional[float] = None
+    adaptive: bool = False
+    min_samples: int = 20
+
+    def resolve(self) -> Tuple[Optional[float], Optional[float]]:
+        first, idle = self.first_token or None, self.idle or None
+        if self.adaptive:
+            first = _adaptive(first, "llm_ttft", 3.0, 5.0, self.min_samples)
+            idle = _adaptive(idle, "llm_chunk_gap", 5.0, 2.0, self.min_samples)
+        return first, idle
+
+
+@dataclass
+class GenerationResult:
+    """Text plus the timings Ollama reports in its final ``done`` frame.
+
+    Durations are in seconds. ``estimated`` marks results built client-side
+    for streams closed before the final frame (one frame ≈ one token).
+    """
+
+    text: str = ""
+    model: str = ""
+    eval_count: int = 0
+    eval_duration: float = 0.0
+    prompt_eval_count: int = 0
+    prompt_eval_duration: float = 0.0
+    load_duration: float = 0.0
+    total_duration: float = 0.0
+    done_reason: str = ""
+    estimated: bool = False
+
+    @classmethod
+    def from_frame(cls, frame: Dict[str, Any], *, model: str = "", text: str = "") -> "GenerationResult":
+        def _sec(key: str) -> float:
+            return (frame.get(key) or 0) / 1e9
+
+        return cls(
+            text=text,
+            model=frame.get("model") or model,
+            eval_count=int(frame.get("eval_count") or 0),
+            eval_duration=_sec("eval_duration"),
+            prompt_eval_count=int(frame.get("prompt_eval_count") or 0),
+            prompt_eval_duration=_sec("prompt_eval_duration"),
+            load_duration=_sec("load_duration"),
+            total_duration=_sec("total_duration"),
+            done_reason=frame.get("done_reason") or "",
+        )
+
+    @property
+    def eval_rate(self) -> float:
+        """Decoding speed in tokens/s."""
+        return self.eval_count / self.eval_duration if self.eval_duration else 0.0
+
+    @property
+    def prompt_eval_rate(self) -> float:
+        """Prompt processing speed in tokens/s."""
+        return self.prompt_eval_count / self.prompt_eval_duration if self.prompt_eval_duration else 0.0
+
+
+ResultCallback = Callable[[GenerationResult], None]
+
+
 class OllamaClient:
-    def __init__(self, base_url: str, model: str):
-        self.base_url = base_url.rstrip("/")
+    """Thin async client for the Ollama HTTP API.
+
+    Keeps one pooled ``aiohttp.ClientSession`` per instance so repeated calls
+    reuse keep-alive sockets instead of paying TCP/DNS setup every time.
+    Call :meth:`close` on shutdown to release the connector.
+
+    ``base_url`` may list several Ollama hosts (comma-separated string or a
+    sequence); each request goes to the healthy host with the fewest
+    outstanding requests, see :class:`BackendPool`. Generation calls pass
+    through a :class:`CircuitBreaker` so a dead backend fails fast, and
+    :class:`PhaseTimeouts` make a stalled stream fail within seconds. With
+    ``hedge_percentile`` set, a request that is slow to produce its first
+    token is duplicated to a second backend and the slower stream cancelled.
+    """
+
+    # Model loads (or first tokens of streams stopped before the final frame)
+    # at least this slow are logged as cold starts
+    cold_start_sec = 1.0
+
+    def __init__(
+        self,
+        base_url: Union[str, Sequence[str]],
+        model: str,
+        *,
+        pool_limit: int = 10,
+        pool_limit_per_host: int = 4,
+        keepalive_timeout: float = 30.0,
+        keep_alive: Optional[Union[str, float]] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        timeouts: Optional[PhaseTimeouts] = None,
+        hedge_percentile: float = 0.0,
+        hedge_min_delay: float = 2.0,
+    ):
+        self.base_urls: List[str] = parse_urls(base_url)
+        # First backend; kept for callers that expect a single URL
+        self.base_url = self.base_urls[0]
+        self.pool = BackendPool(self.base_urls)
         self.model = model
+        # How long Ollama keeps the model loaded after each request ("30m", 600, -1)
+        self.keep_alive = keep_alive
+        self.pool_limit = pool_limit
+        self.pool_limit_per_host = pool_limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.timeouts = timeouts or PhaseTimeouts()
+        # Hedging: if no first token after the p<hedge_percentile> TTFT (at
+        # least hedge_min_delay seconds), race a second backend. 0 disables.
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
 
-    async def generate(
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the pooled session, creating it lazily for the running loop."""
+        loop = asyncio.get_running_loop()
+        if (
+            self._session is None
+            or self._session.closed
+            or self._session_loop is not loop
+        ):
+            self._discard_session()
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_limit,
+                limit_per_host=self.pool_limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._session_loop = loop
+        return self._session
+
+    def _discard_session(self) -> None:
+        """Close a session left over from another event loop before replacing it."""
+        session, old_loop = self._session, self._session_loop
+        self._session = None
+        self._session_loop = None
+        if session is None or session.closed:
+            return
+        if old_loop is not None and old_loop.is_running() and not old_loop.is_closed():
+            # Still serving another thread: close it on its own loop
+            asyncio.run_coroutine_threadsafe(session.close(), old_loop)
+            return
+        # Old loop is gone: aiohttp closes the connector's sockets synchronously;
+        # the returned waiter is a no-op, awaited here to keep aiohttp quiet
+        connector = session.connector
+        session.detach()
+        if connector is not None:
+            asyncio.ensure_future(connector.close())
+
+    async def close(self) -> None:
+        """Close the pooled session (safe to call multiple times)."""
+        session, self._session = self._session, None
+        self._session_loop = None
+        if session is not None and not session.closed:
+            await session.close()
+
+    def _build_body(
         self,
         prompt: str,
         *,
-        system: Optional[str] = None,
-        temperature: float = 0.6,
-        max_new_tokens: int = 800,
-        stop: Optional[Union[str, Sequence[str]]] = None,
-        timeout: float = 120.0,
-        extra_options: Optional[Dict[str, Any]] = None,
-    ) -> str:
+        stream: bool,
+        system: Optional[str],
+        temperature: float,
+        max_new_tokens: int,
+        stop: Optional[Union[str, Sequence[str]]],
+        extra_options: Optional[Dict[str, Any]],
+        format: Optional[Union[str, Dict[str, Any]]],
+    ) -> Dict[str, Any]:
         body: Dict[str, Any] = {
             "model": self.model,
             "prompt": prompt,
-            "stream": False,
+            "stream": stream,
             "options": {
                 "temperature": temperature,
                 "num_predict": max_new_tokens,
@@ -35,28 +221,57 @@ class OllamaClient:
         if system:
             body["system"] = system
         if stop:
-            # Ollama expects stop sequences at the top level as an array
-            if isinstance(stop, str):
-                body["stop"] = [stop]
-            else:
-                body["stop"] = list(stop)
+            # /api/generate reads stop sequences from the model options
+            body["options"]["stop"] = [stop] if isinstance(stop, str) else list(stop)
         if extra_options:
             body["options"].update(extra_options)
+        if format:
+            body["format"] = format
+        if self.keep_alive is not None:
+            body["keep_alive"] = self.keep_alive
+        return body
 
-        url = f"{self.base_url}/api/generate"
-        timeout_cfg = aiohttp.ClientTimeout(total=timeout)
-        async with aiohttp.ClientSession(timeout=timeout_cfg) as session:
-            try:
-                async with session.post(url, json=body) as resp:
-                    if resp.status >= 400:
-                        text = await resp.text()
-                        logger.error("Ollama error %s: %s", resp.status, text)
-                        raise RuntimeError(f"Ollama HTTP {resp.status}: {text}")
-                    data = await resp.json()
-                    return data.get("response", "")
-            except aiohttp.ClientError as e:
-                logger.error("Ollama request failed: %s", e)
-                raise
+    async def generate(
+        self,
+        prompt: str,
+        *,
+        system: Optional[str] = None,
+        temperature: float = 0.6,
+        max_new_tokens: int = 800,
+        stop: Optional[Union[str, Sequence[str]]] = None,
+        timeout: float = 120.0,
+        extra_options: Optional[Dict[str, Any]] = None,
+        format: Optional[Union[str, Dict[str, Any]]] = None,
+        on_done: Optional[ResultCallback] = None,
+    ) -> str:
+        """Run a completion and return the whole response text.
+
+        ``format`` is passed through to Ollama: ``"json"`` forces valid JSON,
+        a dict is treated as a JSON schema the output must conform to.
+        The request is streamed on the wire so the per-phase deadlines apply;
+        chunks are joined before returning. ``on_done`` receives the
+        :class:`GenerationResult` (text and Ollama timings).
+        """
+        parts: List[str] = []
+
+        def _done(result: GenerationResult) -> None:
+            result.text = "".join(parts)
+            if on_done is not None:
+                on_done(result)
+
+        async for chunk in self.generate_stream(
+            prompt,
+            system=system,
+            temperature=temperature,
+            max_new_tokens=max_new_tokens,
+            stop=stop,
+            timeout=timeout,
+            extra_options=extra_options,
+            format=format,
+            on_done=_done if on_done is not None else None,
+        ):
+            parts.append(chunk)
+        return "".join(parts)
 
     async def generate_stream(
         self,
@@ -68,76 +283,297 @@ class OllamaClient:
         stop: Optional[Union[str, Sequence[str]]] = None,
         timeout: float = 120.0,
         extra_options: Optional[Dict[str, Any]] = None,
+        format: Optional[Union[str, Dict[str, Any]]] = None,
+        on_done: Optional[ResultCallback] = None,
     ) -> AsyncIterator[str]:
         """Stream tokens from Ollama as they arrive.
 
         Yields chunks of text (concatenatable). Consumes the same `/api/generate`
-        endpoint, but with `stream=true` and NDJSON lines per chunk.
+        endpoint, but with `stream=true` and NDJSON lines per chunk. Closing the
+        generator early (``aclose()``) drops the connection, which makes Ollama
+        stop generating. ``timeout`` caps the whole call; see
+        :class:`PhaseTimeouts` for the connect/first-token/idle deadlines.
+        ``on_done`` receives a :class:`GenerationResult` from the final frame,
+        or a client-side estimate if the stream is closed early.
         """
-        body: Dict[str, Any] = {
-            "model": self.model,
-            "prompt": prompt,
-            "stream": True,
-            "options": {
-                "temperature": temperature,
-                "num_predict": max_new_tokens,
-            },
-        }
-        if system:
-            body["system"] = system
-        if stop:
-            if isinstance(stop, str):
-                body["stop"] = [stop]
-            else:
-                body["stop"] = list(stop)
-        if extra_options:
-            body["options"].update(extra_options)
+        body = self._build_body(
+            prompt,
+            stream=True,
+            system=system,
+            temperature=temperature,
+            max_new_tokens=max_new_tokens,
+            stop=stop,
+            extra_options=extra_options,
+            format=format,
+        )
+        backend = self.pool.pick()
+        if self.hedge_percentile and len(self.pool) > 1:
+            frames = self._hedged_frames(backend, body, timeout)
+        else:
+            frames = self._stream_frames(backend, body, timeout)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        first_at: Optional[float] = None
+        tokens = 0
+        try:
+            with self.breaker.guard() as call:
+                async for obj in frames:
+                    call.progressed = True
+                    chunk = obj.get("response") or ""
+                    if chunk:
+                        if first_at is None:
+                            first_at = loop.time()
+                        tokens += 1
+                        yield chunk
+                    if obj.get("done") and on_done is not None:
+                        on_done(GenerationResult.from_frame(obj, model=self.model))
+        except GeneratorExit:
+            if on_done is not None and first_at is not None:
+                now = loop.time()
+                on_done(
+                    GenerationResult(
+                        model=self.model,
+                        eval_count=tokens,
+                        eval_duration=now - first_at,
+                        prompt_eval_duration=first_at - started,
+                        total_duration=now - started,
+                        done_reason="aborted",
+                        estimated=True,
+                    )
+                )
+            raise
+        except aiohttp.ClientError as e:
+            logger.error("Ollama streaming request failed (%s): %s", backend.url, e)
+            raise
+        except LLMStallError as e:
+            logger.warning("Ollama request to %s aborted: %s", backend.url, e)
+            raise
+        finally:
+            await frames.aclose()
 
-        url = f"{self.base_url}/api/generate"
-        timeout_cfg = aiohttp.ClientTimeout(total=timeout)
-        async with aiohttp.ClientSession(timeout=timeout_cfg) as session:
+    async def _stream_frames(
+        self, backend: Backend, body: Dict[str, Any], timeout: float
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield parsed NDJSON frames from one backend, enforcing phase deadlines."""
+        url = f"{backend.url}/api/generate"
+        first_token, idle = self.timeouts.resolve()
+        timeout_cfg = aiohttp.ClientTimeout(total=timeout, sock_connect=self.timeouts.connect or None)
+        session = self._get_session()
+        loop = asyncio.get_running_loop()
+        started = last = loop.time()
+        phase, limit = "first_token", first_token
+        # Ollama only sends headers with the first token, so this deadline
+        # covers connect + prompt evaluation; it is moved after every frame.
+        deadline = asyncio.timeout_at(_when(loop, limit))
+        ttft: Optional[float] = None
+        load_logged = False
+        with self.pool.track(backend):
             try:
-                async with session.post(url, json=body) as resp:
-                    if resp.status >= 400:
-                        text = await resp.text()
-                        logger.error("Ollama stream error %s: %s", resp.status, text)
-                        raise RuntimeError(f"Ollama HTTP {resp.status}: {text}")
-                    import json as _json
-                    while True:
-                        line_bytes = await resp.content.readline()
-                        if not line_bytes:
-                            break
-                        try:
-                            line = line_bytes.decode("utf-8").strip()
-                        except Exception:
-                            continue
-                        if not line:
-                            continue
+                async with deadline:
+                    async with session.post(url, json=body, timeout=timeout_cfg) as resp:
+                        if resp.status >= 400:
+                            text = await resp.text()
+                            logger.error("Ollama error %s: %s", resp.status, text)
+                            raise OllamaHTTPError(resp.status, text)
+                        finished = False
                         try:
-                            obj = _json.loads(line)
-                        except Exception:
-                            continue
-                        chunk = obj.get("response") or ""
-                        if chunk:
-                            yield chunk
-                        # The final object has done=true; nothing to yield on that frame
-            except aiohttp.ClientError as e:
-                logger.error("Ollama streaming request failed: %s", e)
+                            while True:
+                                line_bytes = await resp.content.readline()
+                                if not line_bytes:
+                                    finished = True
+                                    break
+                                try:
+                                    obj = json.loads(line_bytes.decode("utf-8"))
+                                except Exception:
+                                    continue
+                                if not isinstance(obj, dict):
+                                    continue
+                                now = loop.time()
+                                if phase == "first_token":
+                                    ttft = now - started
+                                    metrics.observe("llm_ttft", ttft)
+                                    phase, limit = "idle", idle
+                                else:
+                                    metrics.observe("llm_chunk_gap", now - last)
+                                last = now
+                                if not load_logged and obj.get("load_duration") is not None:
+                                    # Usually only the final frame has it; log before
+                                    # yielding, the consumer may stop right here
+                                    self._log_load(obj)
+                                    load_logged = True
+                                # No deadline while the consumer holds the frame:
+                                # its own awaits must not be cancelled by ours.
+                                deadline.reschedule(None)
+                                yield obj
+                                deadline.reschedule(_when(loop, limit))
+                                if obj.get("done"):
+                                    # The final object has done=true and carries timings
+                                    finished = True
+                                    break
+                        finally:
+                            if not finished:
+                                # Consumer stopped early: drop the socket so Ollama
+                                # aborts decoding instead of finishing num_predict.
+                                resp.close()
+                                if not load_logged and ttft is not None:
+                                    self._log_first_token(ttft)
+            except TimeoutError as e:
+                if deadline.expired():
+                    metrics.incr(f"llm_stall_{phase}")
+                    raise LLMStallError(phase, limit or 0.0) from e
                 raise
 
-    async def health_check(self, timeout: float = 5.0) -> bool:
-        """Lightweight readiness check: query tags endpoint.
+    def hedge_delay(self) -> float:
+        """Seconds to wait for a first token before hedging to another backend."""
+        if metrics.sample_count("llm_ttft") < self.timeouts.min_samples:
+            return self.hedge_min_delay
+        observed = metrics.percentile("llm_ttft", self.hedge_percentile) or 0.0
+        return max(self.hedge_min_delay, observed)
+
+    async def _hedged_frames(
+        self, primary: Backend, body: Dict[str, Any], timeout: float
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Like :meth:`_stream_frames`, but hedge a slow first token.
 
-        Returns True if HTTP 200 and JSON parse succeeds, else False.
+        Each attempt runs in its own task and feeds a shared queue; the first
+        attempt to deliver a frame wins and the other one is cancelled (which
+        drops its connection, so that backend stops decoding too).
         """
-        url = f"{self.base_url}/api/tags"
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def _pump(idx: int, backend: Backend) -> None:
+            try:
+                async for obj in self._stream_frames(backend, body, timeout):
+                    queue.put_nowait((idx, obj, None))
+            except Exception as e:
+                queue.put_nowait((idx, None, e))
+            else:
+                queue.put_nowait((idx, None, None))
+
+        tasks = {0: asyncio.create_task(_pump(0, primary))}
+        hedge_at: Optional[float] = loop.time() + self.hedge_delay()
+        winner: Optional[int] = None
+        try:
+            while True:
+                wait = None if hedge_at is None else max(0.0, hedge_at - loop.time())
+                try:
+                    idx, obj, err = await asyncio.wait_for(queue.get(), wait)
+                except asyncio.TimeoutError:
+                    hedge_at = None
+                    second = self.pool.pick(exclude=[primary])
+                    if second is primary or not second.healthy:
+                        continue
+                    metrics.incr("llm_hedges")
+                    logger.info("No first token from %s yet; hedging to %s", primary.url, second.url)
+                    tasks[1] = asyncio.create_task(_pump(1, second))
+                    continue
+                if winner is None:
+                    if obj is None and len(tasks) > 1 and not tasks[1 - idx].done():
+                        # One attempt ended before its first frame; the other may still win
+                        tasks.pop(idx)
+                        continue
+                    winner = idx
+                    hedge_at = None
+                    for other, task in tasks.items():
+                        if other != idx:
+                            task.cancel()
+                            metrics.incr("llm_hedges_cancelled")
+                    if idx == 1:
+                        metrics.incr("llm_hedge_wins")
+                if idx != winner:
+                    continue
+                if err is not None:
+                    raise err
+                if obj is None:
+                    return
+                yield obj
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+    def _log_load(self, data: Dict[str, Any]) -> None:
+        """Log model load time from a frame carrying it; large values mean a cold start."""
+        load_ns = data.get("load_duration") or 0
+        if load_ns >= self.cold_start_sec * 1e9:
+            logger.info("Ollama cold start: model=%s load_duration=%.1fs", self.model, load_ns / 1e9)
+        elif load_ns:
+            logger.debug("Ollama model=%s load_duration=%.3fs", self.model, load_ns / 1e9)
+
+    def _log_first_token(self, ttft: float) -> None:
+        """Stream stopped before load_duration arrived: the TTFT bounds the load time."""
+        if ttft >= self.cold_start_sec:
+            logger.info(
+                "Ollama slow first token (possible cold start): model=%s ttft=%.1fs", self.model, ttft
+            )
+
+    async def _warm_up_backend(self, backend: Backend, timeout: float) -> float:
+        body: Dict[str, Any] = {"model": self.model, "prompt": "", "stream": False}
+        if self.keep_alive is not None:
+            body["keep_alive"] = self.keep_alive
+        url = f"{backend.url}/api/generate"
+        session = self._get_session()
+        with self.pool.track(backend):
+            async with session.post(
+                url, json=body, timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as resp:
+                if resp.status >= 400:
+                    text = await resp.text()
+                    raise OllamaHTTPError(resp.status, text)
+                data = await resp.json()
+        load_sec = (data.get("load_duration") or 0) / 1e9
+        logger.info(
+            "Warmed up model=%s on %s load_duration=%.1fs", self.model, backend.url, load_sec
+        )
+        return load_sec
+
+    async def warm_up(self, timeout: float = 300.0) -> float:
+        """Load the model into memory on every backend without generating.
+
+        An empty prompt makes Ollama load the model and apply ``keep_alive``.
+        Returns the longest reported load duration in seconds; raises if no
+        backend could be warmed up.
+        """
+        results = await asyncio.gather(
+            *(self._warm_up_backend(b, timeout) for b in self.pool.backends),
+            return_exceptions=True,
+        )
+        loads = [r for r in results if not isinstance(r, BaseException)]
+        for backend, r in zip(self.pool.backends, results):
+            if isinstance(r, BaseException):
+                logger.warning("Warm-up failed on %s: %s", backend.url, r)
+        if not loads:
+            raise next(r for r in results if isinstance(r, BaseException))
+        return max(loads)
+
+    async def _check_backend(self, backend: Backend, timeout: float) -> bool:
+        url = f"{backend.url}/api/tags"
         timeout_cfg = aiohttp.ClientTimeout(total=timeout)
+        session = self._get_session()
+        async with session.get(url, timeout=timeout_cfg) as resp:
+            if resp.status >= 400:
+                return False
+            await resp.json()
+            return True
+
+    async def health_check(self, timeout: float = 5.0) -> bool:
+        """Lightweight readiness check: query tags endpoint on every backend.
+
+        Updates per-backend health (see :meth:`backend_status`) and returns
+        True if at least one backend answered HTTP 200 with valid JSON.
+        """
         try:
-            async with aiohttp.ClientSession(timeout=timeout_cfg) as session:
-                async with session.get(url) as resp:
-                    if resp.status >= 400:
-                        return False
-                    await resp.json()
-                    return True
+            await self.pool.probe(lambda b: self._check_backend(b, timeout))
         except Exception:
             return False
+        return any(b.healthy for b in self.pool.backends)
+
+    async def run_prober(self, interval_sec: float, timeout: float = 5.0) -> None:
+        """Probe all backends forever so dead ones leave and recovered ones rejoin."""
+        while True:
+            await self.health_check(timeout=timeout)
+            await asyncio.sleep(interval_sec)
+
+    def backend_status(self) -> List[Dict[str, Any]]:
+        return self.pool.status()
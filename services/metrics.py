@@ -0,0 +1,52 @@
+import math
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional
+
+
+# Process-wide counters (reset on restart); surfaced by admin commands
+_COUNTERS: Dict[str, int] = defaultdict(int)
+
+# Recent latency samples in seconds (e.g. time-to-first-token), bounded per name
+_SAMPLES_MAX = 256
+_SAMPLES: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=_SAMPLES_MAX))
+
+
+def incr(name: str, value: int = 1) -> None:
+    _COUNTERS[name] += value
+
+
+def get(name: str) -> int:
+    return _COUNTERS.get(name, 0)
+
+
+def snapshot() -> Dict[str, int]:
+    return dict(_COUNTERS)
+
+
+def reset() -> None:
+    _COUNTERS.clear()
+    _SAMPLES.clear()
+
+
+def ratio(part: str, whole: str) -> float:
+    """Share of ``part`` in ``whole`` (0.0 when nothing was counted yet)."""
+    total = get(whole)
+    return get(part) / total if total else 0.0
+
+
+def observe(name: str, seconds: float) -> None:
+    _SAMPLES[name].append(seconds)
+
+
+def sample_count(name: str) -> int:
+    return len(_SAMPLES.get(name, ()))
+
+
+def percentile(name: str, q: float) -> Optional[float]:
+    """Nearest-rank percentile (``q`` in 0..100) of recent samples, or None."""
+    samples = _SAMPLES.get(name)
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(q / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
@@ -0,0 +1,60 @@
+import asyncio
+import datetime as _dt
+import logging
+from typing import Optional, Tuple
+
+from .llm_client import OllamaClient
+
+
+logger = logging.getLogger("productcard")
+
+
+def parse_hours(spec: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Parse an "HH-HH" local-time window (e.g. "9-21"); empty means always."""
+    if not spec or not spec.strip():
+        return None
+    try:
+        start_s, end_s = spec.split("-", 1)
+        start, end = int(start_s), int(end_s)
+    except Exception:
+        logger.warning("Invalid LLM_KEEPER_HOURS=%r; keeping the model warm all day", spec)
+        return None
+    return start % 24, end % 24
+
+
+def in_window(hours: Optional[Tuple[int, int]], now: Optional[_dt.datetime] = None) -> bool:
+    if hours is None:
+        return True
+    hour = (now or _dt.datetime.now()).hour
+    start, end = hours
+    if start <= end:
+        return start <= hour < end
+    # Window wraps around midnight, e.g. 20-6
+    return hour >= start or hour < end
+
+
+async def warm_up(client: OllamaClient) -> bool:
+    """Preload the model; never raises so startup is not blocked by Ollama."""
+    try:
+        await client.warm_up()
+        return True
+    except Exception as e:
+        logger.warning("Model warm-up failed (model=%s): %s", client.model, e)
+        return False
+
+
+async def run_keeper(
+    client: OllamaClient,
+    *,
+    interval_sec: float,
+    hours: Optional[Tuple[int, int]] = None,
+) -> None:
+    """Periodically ping the model so Ollama does not evict it while idle.
+
+    Runs until cancelled. Pings only inside the ``hours`` window, so the
+    model can still be unloaded overnight.
+    """
+    while True:
+        await asyncio.sleep(interval_sec)
+        if in_window(hours):
+            await warm_up(client)
@@ -0,0 +1,107 @@
+import hashlib
+import random
+import re
+from collections import OrderedDict, defaultdict
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_MERSENNE = (1 << 61) - 1
+
+
+def tokens(text: str) -> FrozenSet[str]:
+    """Word set of already-normalized text; order and punctuation do not matter."""
+    return frozenset(_TOKEN_RE.findall(text or ""))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class NearDupIndex:
+    """MinHash/LSH index mapping product texts to cache keys.
+
+    Each entry lives in a ``scope`` (everything except the product text that
+    shapes a card: platform, tone, language, model, ...), so only cards made
+    for the same settings can match. LSH bands narrow the candidates; the
+    exact Jaccard similarity of the token sets decides a hit. Bounded to
+    ``max_entries`` with least-recently-added eviction.
+    """
+
+    def __init__(
+        self,
+        *,
+        threshold: float = 0.8,
+        num_perm: int = 64,
+        bands: int = 16,
+        max_entries: int = 1024,
+        seed: int = 1,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_entries = max_entries
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _MERSENNE), rng.randrange(0, _MERSENNE)) for _ in range(num_perm)]
+        # key -> (scope, token set, band hashes)
+        self._entries: "OrderedDict[str, Tuple[str, FrozenSet[str], List[int]]]" = OrderedDict()
+        self._buckets: Dict[Tuple[str, int, int], Set[str]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _bands(self, toks: FrozenSet[str]) -> List[int]:
+        hashes = [_token_hash(t) for t in toks]
+        sig = [min((a * h + b) % _MERSENNE for h in hashes) for a, b in self._perms]
+        return [hash(tuple(sig[i * self.rows : (i + 1) * self.rows])) for i in range(self.bands)]
+
+    def add(self, key: str, scope: str, text: str) -> None:
+        toks = tokens(text)
+        if not toks:
+            return
+        self.remove(key)
+        bands = self._bands(toks)
+        self._entries[key] = (scope, toks, bands)
+        for i, band in enumerate(bands):
+            self._buckets[(scope, i, band)].add(key)
+        while len(self._entries) > self.max_entries:
+            self.remove(next(iter(self._entries)))
+
+    def remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        scope, _, bands = entry
+        for i, band in enumerate(bands):
+            bucket = self._buckets.get((scope, i, band))
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[(scope, i, band)]
+
+    def query(self, scope: str, text: str) -> Optional[Tuple[str, float]]:
+        """Best matching key at or above the threshold, with its similarity."""
+        toks = tokens(text)
+        if not toks:
+            return None
+        candidates: Set[str] = set()
+        for i, band in enumerate(self._bands(toks)):
+            candidates |= self._buckets.get((scope, i, band), set())
+        best: Optional[Tuple[str, float]] = None
+        for key in candidates:
+            score = jaccard(toks, self._entries[key][1])
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (key, score)
+        return best
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._buckets.clear()
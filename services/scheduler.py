@@ -0,0 +1,178 @@
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Hashable, Optional
+
+from app.config import get_settings
+
+
+logger = logging.getLogger("productcard")
+
+QueueCallback = Callable[[int], Awaitable[None]]
+
+
+class _Waiter:
+    __slots__ = ("user", "granted", "event")
+
+    def __init__(self, user: Hashable):
+        self.user = user
+        self.granted = False
+        self.event = asyncio.Event()
+
+
+class LLMScheduler:
+    """Admission control in front of the LLM backend.
+
+    At most ``max_in_flight`` generations run at once; everyone else waits in
+    a per-user queue that is served round-robin, so one user submitting many
+    requests (e.g. a batch from the CLI) cannot starve the others.
+    """
+
+    def __init__(self, max_in_flight: int = 2):
+        self.max_in_flight = max(1, int(max_in_flight))
+        self._in_flight = 0
+        # user -> FIFO of waiters; dict order is the round-robin rotation
+        self._queues: "OrderedDict[Hashable, Deque[_Waiter]]" = OrderedDict()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def position(self, waiter: _Waiter) -> int:
+        """1-based position of a waiter under round-robin service order."""
+        queue = self._queues.get(waiter.user)
+        if not queue or waiter not in queue:
+            return 0
+        depth = list(queue).index(waiter)
+        ahead = 0
+        before_us = True
+        for user, q in self._queues.items():
+            if user == waiter.user:
+                before_us = False
+                ahead += depth
+                continue
+            # Each user gets one turn per round; in our round only users
+            # earlier in the rotation are served before us.
+            ahead += min(len(q), depth + 1 if before_us else depth)
+        return ahead + 1
+
+    def _notify(self) -> None:
+        for q in self._queues.values():
+            for w in q:
+                w.event.set()
+
+    def _dispatch(self) -> None:
+        while self._in_flight < self.max_in_flight and self._queues:
+            user, queue = next(iter(self._queues.items()))
+            waiter = queue.popleft()
+            # Rotate: the served user goes to the back of the line
+            del self._queues[user]
+            if queue:
+                self._queues[user] = queue
+            self._in_flight += 1
+            waiter.granted = True
+            waiter.event.set()
+        self._notify()
+
+    def _remove(self, waiter: _Waiter) -> None:
+        queue = self._queues.get(waiter.user)
+        if queue is None:
+            return
+        try:
+            queue.remove(waiter)
+        except ValueError:
+            return
+        if not queue:
+            del self._queues[waiter.user]
+        self._notify()
+
+    def _release(self) -> None:
+        self._in_flight = max(0, self._in_flight - 1)
+        self._dispatch()
+
+    def try_acquire(self) -> bool:
+        """Take an extra slot only if one is free and nobody is waiting.
+
+        Never queues; pair a successful call with :meth:`release`.
+        """
+        if self._in_flight < self.max_in_flight and not self._queues:
+            self._in_flight += 1
+            return True
+        return False
+
+    def release(self) -> None:
+        self._release()
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        user: Optional[Hashable] = None,
+        *,
+        on_queue: Optional[QueueCallback] = None,
+    ) -> AsyncIterator[None]:
+        """Hold one in-flight slot for the duration of the block.
+
+        ``on_queue`` is awaited with the current 1-based queue position
+        whenever it changes while waiting, and with 0 once admitted after a
+        wait (it is never called if the slot is granted immediately).
+        """
+        waiter = _Waiter(user if user is not None else "-")
+        self._queues.setdefault(waiter.user, deque()).append(waiter)
+        self._dispatch()
+        last_pos = 0
+        try:
+            while not waiter.granted:
+                waiter.event.clear()
+                pos = self.position(waiter)
+                if on_queue and pos and pos != last_pos:
+                    last_pos = pos
+                    try:
+                        await on_queue(pos)
+                    except Exception:
+                        pass
+                    continue
+                await waiter.event.wait()
+        except BaseException:
+            if waiter.granted:
+                self._release()
+            else:
+                self._remove(waiter)
+            raise
+        try:
+            # Inside the try: a cancel during this notification must still free the slot
+            if on_queue and last_pos:
+                try:
+                    await on_queue(0)
+                except Exception:
+                    pass
+            yield
+        finally:
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self._in_flight,
+            "queued": self.queued,
+            "users_waiting": len(self._queues),
+        }
+
+
+_SCHEDULER: Optional[LLMScheduler] = None
+
+
+def get_scheduler() -> LLMScheduler:
+    """Return the process-wide scheduler, resizing it if settings changed."""
+    global _SCHEDULER
+    limit = max(1, int(getattr(get_settings(), "llm_max_in_flight", 2)))
+    if _SCHEDULER is None:
+        _SCHEDULER = LLMScheduler(limit)
+    elif _SCHEDULER.max_in_flight != limit:
+        _SCHEDULER.max_in_flight = limit
+        _SCHEDULER._dispatch()
+    return _SCHEDULER
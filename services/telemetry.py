@@ -0,0 +1,76 @@
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+from .llm_client import GenerationResult
+
+
+_FIELDS = (
+    "eval_count",
+    "eval_duration",
+    "prompt_eval_count",
+    "prompt_eval_duration",
+    "load_duration",
+    "total_duration",
+)
+
+# (model, platform, language) -> summed counters; process-wide like services.metrics
+_STATS: Dict[Tuple[str, str, str], Dict[str, float]] = {}
+
+
+def record(result: GenerationResult, *, platform: str = "", language: str = "") -> None:
+    key = (result.model or "-", platform or "-", language or "-")
+    agg = _STATS.setdefault(key, defaultdict(float))
+    agg["calls"] += 1
+    # Client-side estimates (streams stopped before Ollama's final frame) are
+    # summed apart so they never skew the measured averages and rates
+    prefix = ""
+    if result.estimated:
+        agg["estimated"] += 1
+        prefix = "est_"
+    for name in _FIELDS:
+        agg[prefix + name] += getattr(result, name)
+
+
+def _div(a: float, b: float) -> float:
+    return a / b if b else 0.0
+
+
+def summary() -> List[Dict[str, Any]]:
+    """Per (model, platform, language): averages, token rates and time split.
+
+    Averages, rates and ``*_share`` values (fractions of Ollama's total
+    duration spent loading the model, evaluating the prompt and decoding)
+    cover measured calls only; ``est_*`` values come from the client-side
+    estimates of streams closed early.
+    """
+    rows = []
+    for (model, platform, language), agg in sorted(_STATS.items()):
+        estimated = agg["estimated"]
+        calls = agg["calls"] - estimated
+        total = agg["total_duration"]
+        rows.append(
+            {
+                "model": model,
+                "platform": platform,
+                "language": language,
+                "calls": int(agg["calls"]),
+                "measured": int(calls),
+                "estimated": int(estimated),
+                "avg_prompt_tokens": _div(agg["prompt_eval_count"], calls),
+                "avg_eval_tokens": _div(agg["eval_count"], calls),
+                "avg_total_sec": _div(total, calls),
+                "prompt_rate": _div(agg["prompt_eval_count"], agg["prompt_eval_duration"]),
+                "eval_rate": _div(agg["eval_count"], agg["eval_duration"]),
+                "load_share": _div(agg["load_duration"], total),
+                "prompt_share": _div(agg["prompt_eval_duration"], total),
+                "eval_share": _div(agg["eval_duration"], total),
+                "est_avg_eval_tokens": _div(agg["est_eval_count"], estimated),
+                "est_avg_total_sec": _div(agg["est_total_duration"], estimated),
+                "est_eval_rate": _div(agg["est_eval_count"], agg["est_eval_duration"]),
+            }
+        )
+    return rows
+
+
+def reset() -> None:
+    _STATS.clear()
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import json
 import os
+import time
 from typing import Any, Dict, List, Optional
 
 import aiosqlite
@@ -21,6 +22,15 @@ CREATE TABLE IF NOT EXISTS generations (
 );
 CREATE INDEX IF NOT EXISTS idx_generations_tg_created
     ON generations(tg_id, created_at DESC);
+CREATE TABLE IF NOT EXISTS card_cache (
+    key TEXT PRIMARY KEY,
+    model TEXT,
+    payload_json TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_card_cache_accessed
+    ON card_cache(accessed_at);
 """
 
 
@@ -175,3 +185,72 @@ async def per_user_counts(db_path: str, limit: int = 10) -> List[Dict[str, Any]]
         rows = await cur.fetchall()
         await cur.close()
         return [dict(r) for r in rows]
+
+
+# ----- Persistent generation cache -----
+
+async def cache_get(
+    db_path: str, *, key: str, ttl_sec: float, now: Optional[float] = None
+) -> Optional[Dict[str, Any]]:
+    """Return a cached payload younger than ``ttl_sec`` and mark it as used."""
+    now = time.time() if now is None else now
+    async with aiosqlite.connect(db_path) as db:
+        cur = await db.execute(
+            "SELECT payload_json, created_at FROM card_cache WHERE key = ?", (key,)
+        )
+        row = await cur.fetchone()
+        await cur.close()
+        if not row:
+            return None
+        if ttl_sec > 0 and now - float(row[1]) > ttl_sec:
+            await db.execute("DELETE FROM card_cache WHERE key = ?", (key,))
+            await db.commit()
+            return None
+        await db.execute("UPDATE card_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        await db.commit()
+    try:
+        return json.loads(row[0])
+    except Exception:
+        return None
+
+
+async def cache_put(
+    db_path: str,
+    *,
+    key: str,
+    payload: Dict[str, Any],
+    model: str,
+    ttl_sec: float,
+    max_entries: int,
+    now: Optional[float] = None,
+) -> None:
+    """Store a payload, then drop expired rows and the least recently used overflow."""
+    now = time.time() if now is None else now
+    async with aiosqlite.connect(db_path) as db:
+        await db.execute(
+            """
+            INSERT OR REPLACE INTO card_cache (key, model, payload_json, created_at, accessed_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (key, model, json.dumps(payload, ensure_ascii=False), now, now),
+        )
+        if ttl_sec > 0:
+            await db.execute("DELETE FROM card_cache WHERE created_at < ?", (now - ttl_sec,))
+        if max_entries > 0:
+            await db.execute(
+                """
+                DELETE FROM card_cache WHERE key NOT IN (
+                    SELECT key FROM card_cache ORDER BY accessed_at DESC LIMIT ?
+                )
+                """,
+                (max_entries,),
+            )
+        await db.commit()
+
+
+async def cache_stats(db_path: str) -> Dict[str, Any]:
+    async with aiosqlite.connect(db_path) as db:
+        cur = await db.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(payload_json)), 0) FROM card_cache")
+        row = await cur.fetchone()
+        await cur.close()
+    return {"entries": int(row[0]), "bytes": int(row[1])}
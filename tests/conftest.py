@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _isolated_db(monkeypatch, tmp_path):
+    # Keep the persistent cache and history out of ./data during tests
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "bot.db"))
@@ -0,0 +1,125 @@
+import json
+
+import pytest
+
+import services.generation_service as gen
+
+
+RU = {"title": "Мышь Logitech M185", "short_description": "Тихая беспроводная мышь.", "bullets": ["a", "b", "c"]}
+EN = {"title": "Logitech M185 mouse", "short_description": "Quiet wireless mouse.", "bullets": ["x", "y", "z"]}
+
+
+def _settings():
+    return type("S", (), {
+        "llm_base_url": "http://x", "llm_model": "phi3:mini", "llm_temperature": 0.6,
+        "llm_max_new_tokens": 800, "llm_timeout": 5.0, "gen_max_retries": 0, "gen_retry_delay_sec": 0.0,
+        "cache_ttl_sec": 60.0, "cache_size": 16, "llm_token_planner": True,
+    })()
+
+
+class Client:
+    def __init__(self, outputs):
+        self.outputs = list(outputs)
+        self.calls = []
+
+    async def generate(self, prompt, *args, **kwargs):
+        self.calls.append((prompt, kwargs))
+        return self.outputs.pop(0)
+
+
+def test_bilingual_prompt_asks_for_both_cards():
+    prompt = gen.build_product_prompt(product_name="Мышь", platform="ozon", language="both")
+    assert '{"ru": {...}, "en": {...}}' in prompt
+    assert prompt != gen.build_product_prompt(product_name="Мышь", platform="ozon", language="ru")
+
+
+@pytest.mark.asyncio
+async def test_one_call_fills_both_language_cache_entries(monkeypatch):
+    reply = "Вот карточки:\n```json\n" + json.dumps({"ru": RU, "en": EN}, ensure_ascii=False) + "\n```"
+    client = Client([reply])
+    monkeypatch.setattr(gen, "get_client", lambda: client)
+    monkeypatch.setattr(gen, "get_settings", _settings)
+    gen._CACHE.clear()
+
+    both = await gen.generate_product_card(product_name="Мышь Logitech M185", platform="ozon", language="both")
+    assert both == {"ru": RU, "en": EN}
+    assert len(client.calls) == 1
+    # Budget covers both cards
+    assert client.calls[0][1]["max_new_tokens"] == (
+        gen.plan_tokens("ozon", "medium", "ru", cap=800).num_predict
+        + gen.plan_tokens("ozon", "medium", "en", cap=800).num_predict
+    )
+
+    ru = await gen.generate_product_card(product_name="Мышь Logitech M185", platform="ozon", language="ru")
+    en = await gen.generate_product_card(product_name="Мышь Logitech M185", platform="ozon", language="en")
+    assert (ru, en) == (RU, EN)
+    assert len(client.calls) == 1
+    gen._CACHE.clear()
+
+
+@pytest.mark.asyncio
+async def test_language_missing_from_reply_is_generated_separately(monkeypatch):
+    truncated = json.dumps({"ru": RU, "en": EN}, ensure_ascii=False)
+    truncated = truncated[: truncated.index('"en"') + 8]
+    client = Client([truncated, json.dumps(EN)])
+    monkeypatch.setattr(gen, "get_client", lambda: client)
+    monkeypatch.setattr(gen, "get_settings", _settings)
+    gen._CACHE.clear()
+
+    both = await gen.generate_product_card(product_name="Мышь Logitech M185", platform="ozon", language="both")
+    assert both["ru"] == RU and both["en"] == EN
+    assert len(client.calls) == 2
+    assert client.calls[1][1]["system"] == gen._system_prompt("en")
+    gen._CACHE.clear()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_bilingual_requests_share_one_call(monkeypatch):
+    import asyncio
+
+    class SlowClient(Client):
+        async def generate(self, prompt, *args, **kwargs):
+            await asyncio.sleep(0.02)
+            return await super().generate(prompt, *args, **kwargs)
+
+    client = SlowClient([json.dumps({"ru": RU, "en": EN}, ensure_ascii=False)])
+    monkeypatch.setattr(gen, "get_client", lambda: client)
+    monkeypatch.setattr(gen, "get_settings", _settings)
+    gen._CACHE.clear()
+
+    kwargs = dict(product_name="Мышь Logitech M185", platform="ozon")
+    results = await asyncio.gather(
+        gen.generate_product_card(language="both", **kwargs),
+        gen.generate_product_card(language="both", **kwargs),
+        gen.generate_product_card(language="en", **kwargs),
+    )
+    assert len(client.calls) == 1
+    assert results[0] == results[1] == {"ru": RU, "en": EN}
+    assert results[2] == EN
+    assert not gen._INFLIGHT
+    gen._CACHE.clear()
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_within_grace_is_served(monkeypatch):
+    import asyncio
+
+    from services.cache import TTLCache
+
+    now = [0.0]
+    monkeypatch.setattr(gen, "_CACHE", TTLCache(clock=lambda: now[0]))
+    settings = _settings()
+    settings.cache_stale_grace_sec = 60.0
+    client = Client([json.dumps({"ru": RU, "en": EN}, ensure_ascii=False), json.dumps(RU), json.dumps(EN)])
+    monkeypatch.setattr(gen, "get_client", lambda: client)
+    monkeypatch.setattr(gen, "get_settings", lambda: settings)
+
+    kwargs = dict(product_name="Мышь Logitech M185", platform="ozon", language="both")
+    await gen.generate_product_card(**kwargs)
+    now[0] = 90.0  # past the 60s TTL, within grace
+    both = await gen.generate_product_card(**kwargs)
+    assert both == {"ru": RU, "en": EN}
+    assert gen._CACHE.stats()["stale_hits"] == 2
+    # Served stale at once; each language refreshes in the background
+    await asyncio.gather(*(f.task for f in list(gen._INFLIGHT.values())))
+    assert len(client.calls) == 3
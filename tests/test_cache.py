@@ -0,0 +1,134 @@
+import asyncio
+import json
+
+import pytest
+
+from services.cache import TTLCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_order_is_refreshed_on_hit_and_overwrite_does_not_duplicate():
+    cache = TTLCache(max_entries=2, ttl=100.0)
+    cache.put("a", {"v": 1})
+    cache.put("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}  # "a" becomes most recent
+    cache.put("b", {"v": 3})  # overwrite keeps a single entry
+    cache.put("c", {"v": 4})  # evicts the least recently used: "a"
+    assert "a" not in cache
+    assert cache.get("b") == {"v": 3} and cache.get("c") == {"v": 4}
+    stats = cache.stats()
+    assert (stats["entries"], stats["evictions"], stats["hits"], stats["misses"]) == (2, 1, 3, 0)
+
+
+def test_ttl_expiry_is_lazy_and_periodic():
+    clock = _Clock()
+    cache = TTLCache(max_entries=10, ttl=10.0, purge_interval=30.0, clock=clock)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    clock.now = 11.0
+    assert cache.get("a") is None  # lazily expired on access
+    assert len(cache) == 1
+    clock.now = 31.0
+    cache.put("c", 3)  # periodic sweep removes "b" without touching it
+    assert len(cache) == 1
+    assert cache.stats()["expirations"] == 2
+
+
+def test_grace_window_keeps_expired_entries_for_get_stale_only():
+    clock = _Clock()
+    cache = TTLCache(max_entries=10, ttl=10.0, grace=5.0, clock=clock)
+    cache.put("a", 1)
+    assert cache.get_stale("a") == (1, False)
+    clock.now = 12.0
+    assert cache.get("a") is None  # past TTL: plain lookups miss
+    assert "a" not in cache
+    assert cache.get_stale("a") == (1, True)
+    clock.now = 16.0
+    assert cache.get_stale("a") == (None, False)  # past TTL + grace
+    stats = cache.stats()
+    assert (stats["stale_hits"], stats["expirations"], len(cache)) == (1, 1, 0)
+
+
+def test_byte_budget_evicts_oldest_and_rejects_oversized():
+    cache = TTLCache(max_entries=100, max_bytes=100, ttl=100.0)
+    for key in "abc":
+        cache.put(key, "x", size=40)
+    assert "a" not in cache and len(cache) == 2
+    assert cache.stats()["bytes"] == 80
+    cache.put("huge", "x", size=500)
+    assert "huge" not in cache and cache.stats()["bytes"] == 80
+    cache.configure(ttl=0.0)
+    cache.put("d", "x", size=1)  # ttl <= 0 disables caching
+    assert "d" not in cache
+
+
+def test_cache_key_is_canonical_and_covers_model_sampling_and_prompts():
+    from services.generation_service import _cache_key
+
+    base = dict(
+        product_name="Мышь  Logitech\tM185",
+        features="тихие клики",
+        platform="ozon",
+        tone="neutral",
+        length="medium",
+        language="ru",
+        model="phi3:mini",
+        temperature=0.6,
+        max_new_tokens=800,
+        prompt_version="abc",
+    )
+    key = _cache_key(**base)
+    assert key.startswith("v2:")
+    # Case, width and whitespace variants share the entry
+    assert _cache_key(**{**base, "product_name": " мышь LOGITECH ｍ185 "}) == key
+    for change in (
+        {"audience": "gamers"},
+        {"model": "llama3"},
+        {"temperature": 0.7},
+        {"max_new_tokens": 400},
+        {"prompt_version": "def"},
+    ):
+        assert _cache_key(**{**base, **change}) != key, change
+
+
+@pytest.mark.asyncio
+async def test_stale_card_is_served_while_a_single_refresh_runs(monkeypatch):
+    from services import generation_service as gen
+
+    class Client:
+        calls = 0
+
+        async def generate(self, *args, **kwargs):
+            self.calls += 1
+            await asyncio.sleep(0.05)
+            return json.dumps({"title": f"Card {self.calls}", "short_description": "d", "bullets": ["a", "b", "c"]})
+
+    settings = type("S", (), {
+        "llm_base_url": "http://x", "llm_model": "phi3:mini", "llm_temperature": 0.6,
+        "llm_max_new_tokens": 100, "llm_timeout": 5.0, "gen_max_retries": 0, "gen_retry_delay_sec": 0.0,
+        "cache_ttl_sec": 10.0, "cache_size": 8, "cache_stale_grace_sec": 60.0,
+    })()
+    clock = _Clock()
+    client = Client()
+    monkeypatch.setattr(gen, "get_client", lambda: client)
+    monkeypatch.setattr(gen, "get_settings", lambda: settings)
+    monkeypatch.setattr(gen, "_CACHE", TTLCache(clock=clock))
+
+    args = dict(product_name="Мышь", features="тихая", platform="ozon", language="ru")
+    first = await gen.generate_product_card(**args)
+    assert first["title"] == "Card 1"
+    clock.now = 20.0  # expired, within grace
+    stale = await asyncio.gather(*(gen.generate_product_card(**args) for _ in range(3)))
+    assert [c["title"] for c in stale] == ["Card 1"] * 3
+    assert len(gen._INFLIGHT) == 1  # one background refresh for all stale hits
+    await asyncio.gather(*(f.task for f in list(gen._INFLIGHT.values())))
+    assert client.calls == 2
+    fresh = await gen.generate_product_card(**args)
+    assert fresh["title"] == "Card 2" and client.calls == 2
@@ -0,0 +1,110 @@
+import aiohttp
+import pytest
+
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from services.llm_backends import OllamaHTTPError
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _fail(breaker, exc):
+    with pytest.raises(type(exc)):
+        with breaker.guard():
+            raise exc
+
+
+def test_breaker_opens_fails_fast_and_recovers_via_half_open_probe():
+    clock = _Clock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0, clock=clock)
+
+    _fail(breaker, aiohttp.ClientConnectionError("refused"))
+    assert breaker.state == "closed"
+    _fail(breaker, TimeoutError())
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        with breaker.guard():
+            pass
+    assert breaker.status()["rejected"] == 1
+
+    clock.now = 11.0
+    assert breaker.state == "half_open"
+    # A failed probe re-opens immediately
+    _fail(breaker, OllamaHTTPError(503, "busy"))
+    assert breaker.state == "open"
+
+    clock.now = 22.0
+    with breaker.guard():
+        # Only one probe at a time while half-open
+        assert breaker.would_reject()
+    assert breaker.state == "closed"
+
+
+def test_breaker_ignores_client_side_errors():
+    breaker = CircuitBreaker(failure_threshold=1)
+    _fail(breaker, OllamaHTTPError(400, "bad request"))
+    _fail(breaker, ValueError("parse"))
+    assert breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_serves_heuristic_card_without_calling_llm(monkeypatch):
+    import services.generation_service as gen
+
+    class DeadClient:
+        breaker = CircuitBreaker(failure_threshold=1)
+        calls = 0
+
+        async def generate(self, *args, **kwargs):
+            self.calls += 1
+            raise AssertionError("LLM must not be called while the circuit is open")
+
+    client = DeadClient()
+    client.breaker.record_failure()
+    monkeypatch.setattr(gen, "get_client", lambda: client)
+    payload = await gen.generate_product_card(
+        product_name="Circuit mouse", features="2.4 GHz; silent", platform="ozon", language="en",
+    )
+    assert client.calls == 0
+    assert payload["title"] == "Circuit mouse"
+    assert payload["short_description"]
+
+
+@pytest.mark.asyncio
+async def test_fallback_card_is_not_cached(monkeypatch):
+    import json
+
+    import services.generation_service as gen
+
+    class FlakyClient:
+        breaker = CircuitBreaker(failure_threshold=1)
+        calls = 0
+
+        async def generate(self, *args, **kwargs):
+            self.calls += 1
+            if self.calls == 1:
+                raise aiohttp.ClientConnectionError("refused")
+            return json.dumps({"title": "Real card", "short_description": "From the model", "bullets": ["a", "b", "c"]})
+
+    settings = type("S", (), {
+        "llm_base_url": "http://x", "llm_model": "phi3:mini", "llm_temperature": 0.6,
+        "llm_max_new_tokens": 100, "llm_timeout": 5.0, "gen_max_retries": 0, "gen_retry_delay_sec": 0.0,
+        "cache_ttl_sec": 60.0, "cache_size": 8,
+    })()
+    client = FlakyClient()
+    monkeypatch.setattr(gen, "get_client", lambda: client)
+    monkeypatch.setattr(gen, "get_settings", lambda: settings)
+    gen._CACHE.clear()
+
+    kwargs = dict(product_name="Flaky mouse", features="2.4 GHz", platform="ozon", language="en")
+    first = await gen.generate_product_card(**kwargs)
+    assert first["title"] == "Flaky mouse"  # heuristic fallback
+    second = await gen.generate_product_card(**kwargs)
+    assert client.calls == 2
+    assert second["title"] == "Real card"
+    gen._CACHE.clear()
@@ -0,0 +1,81 @@
+import pytest
+
+import services.generation_service as gen
+from bench.fake_ollama import FakeOllamaConfig, serve
+from services import metrics
+
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def fake_env(monkeypatch):
+    def _point(url):
+        monkeypatch.setenv("LLM_BASE_URL", url)
+        monkeypatch.setenv("LLM_MODEL", "phi3:mini")
+        monkeypatch.setenv("GEN_RETRY_DELAY_SEC", "0")
+
+    metrics.reset()
+    return _point
+
+
+async def test_service_runs_end_to_end_over_http_streaming(fake_env, monkeypatch):
+    async with serve(FakeOllamaConfig(tokens_per_sec=500, ttft=0.01, seed=1)) as fake:
+        fake_env(fake.url)
+        monkeypatch.setenv("LLM_FORMAT", "json")
+        progress = []
+
+        async def _progress(p):
+            progress.append(p)
+
+        try:
+            plain = await gen.generate_product_card(product_name="Fake mouse", platform="ozon", language="en")
+            streamed = await gen.generate_product_card(
+                product_name="Fake keyboard", platform="ozon", language="en", progress_cb=_progress
+            )
+        finally:
+            await gen.close_client()
+    assert plain["title"] == "Fake mouse"
+    assert streamed["title"] == "Fake keyboard"
+    assert progress and fake.stats.streamed == 2
+    assert fake.stats.bodies[0]["format"] == "json"
+    assert metrics.get("gen_fallbacks") == 0
+
+
+async def test_injected_errors_and_malformed_json_are_survived(fake_env):
+    config = FakeOllamaConfig(tokens_per_sec=500, ttft=0.01, malformed_rate=1.0, seed=3)
+    async with serve(config) as fake:
+        fake_env(fake.url)
+        try:
+            card = await gen.generate_product_card(product_name="Broken mouse", platform="ozon", language="en")
+            fake.config.error_rate = 1.0
+            fallback = await gen.generate_product_card(product_name="Dead mouse", platform="ozon", language="en")
+        finally:
+            await gen.close_client()
+    assert card["title"] == "Broken mouse" and card["short_description"]
+    assert fake.stats.malformed >= 1
+    # HTTP 500s exhaust the retries and fall back to the heuristic card
+    assert fake.stats.errors >= 1
+    assert fallback["title"] == "Dead mouse"
+    assert metrics.get("gen_fallbacks") == 1
+
+
+async def test_persistent_cache_survives_restart(fake_env):
+    async with serve(FakeOllamaConfig(tokens_per_sec=500, ttft=0.01)) as fake:
+        fake_env(fake.url)
+        kwargs = dict(product_name="Persisted mouse", platform="ozon", language="en")
+        try:
+            first = await gen.generate_product_card(**kwargs)
+            # Simulate a restart: the in-memory tier is gone
+            gen._CACHE.clear()
+            second = await gen.generate_product_card(**kwargs)
+            db_stats = await gen.persistent_cache_stats()
+        finally:
+            await gen.close_client()
+    assert fake.stats.requests == 1
+    assert second == first
+    assert metrics.get("cache_db_misses") == 1 and metrics.get("cache_db_hits") == 1
+    assert db_stats["entries"] == 1 and db_stats["bytes"] > 0
+    # Persisted cards expire with the in-memory ones unless overridden
+    settings = gen.get_settings()
+    assert settings.cache_persist_ttl_sec == settings.cache_ttl_sec
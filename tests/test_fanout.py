@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+import services.generation_service as gen
+from app.platforms import PROFILES, get_profile, superset_profile
+
+
+def test_superset_profile_fits_every_platform():
+    profile = superset_profile(PROFILES)
+    assert profile.title_max == min(p.title_max for p in PROFILES.values())
+    assert profile.description_max == max(p.description_max for p in PROFILES.values())
+    assert profile.bullets_max == max(p.bullets_max for p in PROFILES.values())
+    assert get_profile("ozon+wb+etsy+shopify") == profile
+    assert superset_profile(["wb", "bogus"]) == PROFILES["wb"]
+
+
+def test_adapt_card_trims_on_sentence_boundary():
+    card = {
+        "title": "Мышь Logitech M185",
+        "short_description": "Первое предложение про мышь. " * 12 + "Хвост",
+        "bullets": [f"Пункт {i}" for i in range(10)],
+    }
+    ozon, clean = gen.adapt_card(card, "ozon")
+    assert clean and ozon["short_description"].endswith(".")
+    assert len(ozon["short_description"]) <= PROFILES["ozon"].description_max
+    assert len(ozon["bullets"]) == PROFILES["ozon"].bullets_max
+    etsy, clean = gen.adapt_card(card, "etsy")
+    assert clean and etsy["short_description"] == card["short_description"].strip()
+    _, clean = gen.adapt_card({**card, "short_description": "слово " * 80}, "wb")
+    assert not clean
+
+
+@pytest.mark.asyncio
+async def test_fanout_generates_once_and_rewrites_only_uncuttable_descriptions(monkeypatch):
+    long_desc = " ".join(["тихая беспроводная мышь"] * 18)  # ~450 chars, no sentence end
+    prompts = []
+
+    class Client:
+        async def generate(self, prompt, *args, **kwargs):
+            prompts.append(prompt)
+            if len(prompts) == 1:
+                return json.dumps(
+                    {"title": "Мышь Logitech M185", "short_description": long_desc, "bullets": ["a", "b", "c"]},
+                    ensure_ascii=False,
+                )
+            return "Тихая беспроводная мышь для дома и офиса."
+
+    settings = type("S", (), {
+        "llm_base_url": "http://x", "llm_model": "phi3:mini", "llm_temperature": 0.6,
+        "llm_max_new_tokens": 800, "llm_timeout": 5.0, "gen_max_retries": 0, "gen_retry_delay_sec": 0.0,
+        "cache_ttl_sec": 0.0,
+    })()
+    monkeypatch.setattr(gen, "get_client", lambda: Client())
+    monkeypatch.setattr(gen, "get_settings", lambda: settings)
+
+    cards = await gen.generate_platform_cards(product_name="Мышь Logitech M185", length="long", language="ru")
+    assert list(cards) == list(PROFILES)
+    # One superset generation plus one shared rewrite for the 300-char platforms
+    assert len(prompts) == 2
+    assert "ozon+wb+etsy+shopify" in prompts[0]
+    assert cards["ozon"]["short_description"] == cards["wb"]["short_description"] == (
+        "Тихая беспроводная мышь для дома и офиса."
+    )
+    assert cards["etsy"]["short_description"] == cards["shopify"]["short_description"] == long_desc
+
+
+@pytest.mark.asyncio
+async def test_bilingual_fanout_uses_one_call(monkeypatch):
+    prompts = []
+    card = {"title": "Мышь Logitech M185", "short_description": "Тихая мышь.", "bullets": ["a", "b", "c"]}
+
+    class Client:
+        async def generate(self, prompt, *args, **kwargs):
+            prompts.append(prompt)
+            return json.dumps({"ru": card, "en": {**card, "title": "Logitech M185 mouse"}}, ensure_ascii=False)
+
+    settings = type("S", (), {
+        "llm_base_url": "http://x", "llm_model": "phi3:mini", "llm_temperature": 0.6,
+        "llm_max_new_tokens": 800, "llm_timeout": 5.0, "gen_max_retries": 0, "gen_retry_delay_sec": 0.0,
+        "cache_ttl_sec": 0.0,
+    })()
+    monkeypatch.setattr(gen, "get_client", lambda: Client())
+    monkeypatch.setattr(gen, "get_settings", lambda: settings)
+
+    cards = await gen.generate_platform_cards(product_name="Мышь Logitech M185", language="both")
+    assert len(prompts) == 1
+    assert list(cards) == ["ru", "en"]
+    assert list(cards["ru"]) == list(cards["en"]) == list(PROFILES)
+    assert cards["en"]["etsy"]["title"] == "Logitech M185 mouse"
+    assert cards["ru"]["ozon"]["title"] == "Мышь Logitech M185"
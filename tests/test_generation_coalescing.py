@@ -0,0 +1,109 @@
+import asyncio
+import json
+
+import pytest
+
+import services.generation_service as gen
+
+
+pytestmark = pytest.mark.asyncio
+
+
+class SlowClient:
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def generate(self, *args, **kwargs):
+        self.calls += 1
+        await self.release.wait()
+        return json.dumps({"title": "Mouse", "short_description": "Quiet mouse", "bullets": ["a", "b", "c"]})
+
+
+def _settings():
+    return type("S", (), {
+        "llm_base_url": "http://x", "llm_model": "phi3:mini",
+        "llm_temperature": 0.6, "llm_max_new_tokens": 100,
+        "llm_timeout": 5.0, "gen_max_retries": 0, "gen_retry_delay_sec": 0.0,
+        "cache_ttl_sec": 0.0, "cache_size": 8,
+    })()
+
+
+@pytest.fixture
+def slow_client(monkeypatch):
+    client = SlowClient()
+    monkeypatch.setattr(gen, "get_client", lambda: client)
+    monkeypatch.setattr(gen, "get_settings", _settings)
+    return client
+
+
+async def test_identical_requests_share_one_generation(slow_client):
+    kwargs = dict(product_name="Coalesce mouse", platform="ozon", language="en")
+    tasks = [asyncio.create_task(gen.generate_product_card(**kwargs)) for _ in range(5)]
+    await asyncio.sleep(0.01)
+    slow_client.release.set()
+    results = await asyncio.gather(*tasks)
+    assert slow_client.calls == 1
+    assert all(r["title"] == "Mouse" for r in results)
+    # Each caller gets its own copy
+    assert len({id(r) for r in results}) == 5
+    assert not gen._INFLIGHT
+
+
+async def test_cancelling_one_waiter_keeps_shared_generation(slow_client):
+    kwargs = dict(product_name="Cancel mouse", platform="ozon", language="en")
+    first = asyncio.create_task(gen.generate_product_card(**kwargs))
+    second = asyncio.create_task(gen.generate_product_card(**kwargs))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    slow_client.release.set()
+    result = await second
+    assert result["title"] == "Mouse"
+    assert slow_client.calls == 1
+
+
+async def test_last_waiter_cancel_stops_generation(slow_client):
+    task = asyncio.create_task(
+        gen.generate_product_card(product_name="Abandoned mouse", platform="ozon", language="en")
+    )
+    await asyncio.sleep(0.01)
+    flight = next(iter(gen._INFLIGHT.values()))
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await asyncio.sleep(0)
+    assert flight.task.cancelled()
+    assert not gen._INFLIGHT
+
+
+async def test_request_after_last_waiter_cancelled_starts_a_new_flight(monkeypatch):
+    class UnwindingClient(SlowClient):
+        async def generate(self, *args, **kwargs):
+            try:
+                return await super().generate(*args, **kwargs)
+            except asyncio.CancelledError:
+                # Slow cleanup (e.g. closing the HTTP stream) keeps the task alive
+                await asyncio.sleep(0.05)
+                raise
+
+    client = UnwindingClient()
+    monkeypatch.setattr(gen, "get_client", lambda: client)
+    monkeypatch.setattr(gen, "get_settings", _settings)
+    kwargs = dict(product_name="Retried mouse", platform="ozon", language="en")
+    first = asyncio.create_task(gen.generate_product_card(**kwargs))
+    await asyncio.sleep(0.01)
+    dying = next(iter(gen._INFLIGHT.values()))
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert not dying.task.done()
+    # Same key while the abandoned generation is still unwinding
+    second = asyncio.create_task(gen.generate_product_card(**kwargs))
+    await asyncio.sleep(0.01)
+    client.release.set()
+    assert (await second)["title"] == "Mouse"
+    assert client.calls == 2
+    await asyncio.gather(dying.task, return_exceptions=True)
+    assert not gen._INFLIGHT
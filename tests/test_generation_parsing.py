@@ -27,7 +27,7 @@ async def test_generation_repair_and_enforce(monkeypatch):
     good = json.dumps(good_payload)
 
     stub = StubClient([bad, good])
-    monkeypatch.setattr(gen, "OllamaClient", lambda base_url, model: stub)
+    monkeypatch.setattr(gen, "OllamaClient", lambda base_url, model, **kwargs: stub)
 
     # Speed up retries in tests
     monkeypatch.setattr(gen, "get_settings", lambda: type("S", (), {
@@ -49,3 +49,121 @@ async def test_generation_repair_and_enforce(monkeypatch):
     assert len(payload["short_description"]) <= 300
     assert len(payload["bullets"]) <= 6
 
+
+
+@pytest.mark.asyncio
+async def test_schema_format_is_sent_and_repairs_are_counted(monkeypatch):
+    from services import metrics
+
+    seen_formats = []
+
+    class FormatClient(StubClient):
+        async def generate(self, *args, **kwargs):
+            seen_formats.append(kwargs.get("format"))
+            return await super().generate(*args, **kwargs)
+
+    good = json.dumps({"title": "Mouse", "short_description": "Quiet", "bullets": ["a", "b", "c"]})
+    stub = FormatClient(["oops", good])
+    monkeypatch.setattr(gen, "get_client", lambda: stub)
+    monkeypatch.setattr(gen, "get_settings", lambda: type("S", (), {
+        "llm_base_url": "http://x", "llm_model": "phi3:mini",
+        "llm_temperature": 0.6, "llm_max_new_tokens": 100,
+        "llm_timeout": 5.0, "gen_max_retries": 2, "gen_retry_delay_sec": 0.0,
+        "cache_ttl_sec": 0.0, "cache_size": 8, "llm_format": "schema",
+    })())
+    before = metrics.get("gen_llm_repairs")
+
+    payload = await gen.generate_product_card(product_name="Schema mouse", platform="wb", language="en")
+
+    assert payload["title"] == "Mouse"
+    schema = seen_formats[0]
+    assert schema["properties"]["title"]["maxLength"] == 70
+    assert schema["properties"]["bullets"]["maxItems"] == 6
+    assert metrics.get("gen_llm_repairs") == before + 1
+    assert gen.repair_stats()["llm_repairs_ok"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_repair_race_takes_first_valid_card_and_cancels_the_rest(monkeypatch):
+    from services import metrics
+    from services.scheduler import LLMScheduler
+
+    card = json.dumps({"title": "Fresh", "short_description": "D", "bullets": ["a", "b", "c"]})
+
+    class RaceClient:
+        def __init__(self):
+            self.calls = 0
+            self.cancelled = 0
+
+        async def generate(self, prompt, *args, **kwargs):
+            self.calls += 1
+            if self.calls == 1:
+                return "Sorry, I cannot produce JSON today."
+            try:
+                if prompt.startswith("Convert the text below"):
+                    await asyncio.sleep(5)  # slow repair loses the race
+                    return card
+                await asyncio.sleep(0.01)
+                return card
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+
+    client = RaceClient()
+    scheduler = LLMScheduler(2)
+    monkeypatch.setattr(gen, "get_client", lambda: client)
+    monkeypatch.setattr(gen, "get_scheduler", lambda: scheduler)
+    monkeypatch.setattr(gen, "get_settings", lambda: type("S", (), {
+        "llm_base_url": "http://x", "llm_model": "phi3:mini", "llm_temperature": 0.6,
+        "llm_max_new_tokens": 100, "llm_timeout": 5.0, "gen_max_retries": 2, "gen_retry_delay_sec": 1.0,
+        "cache_ttl_sec": 0.0, "cache_size": 8, "gen_repair_race": True,
+    })())
+    metrics.reset()
+
+    payload = await asyncio.wait_for(
+        gen.generate_product_card(product_name="Race", platform="ozon", language="en"), timeout=2
+    )
+    assert payload["title"] == "Fresh"
+    assert (client.calls, client.cancelled) == (3, 1)
+    assert scheduler.in_flight == 0
+    stats = gen.repair_stats()
+    assert (stats["races"], stats["race_wins_regenerate"], stats["race_wins_repair"]) == (1, 1, 0)
+    metrics.reset()
+
+
+def test_token_planner_sizes_budget_per_profile():
+    ozon_ru = gen.plan_tokens("ozon", "medium", "ru")
+    ozon_en = gen.plan_tokens("ozon", "medium", "en")
+    etsy_ru = gen.plan_tokens("etsy", "long", "ru")
+    # Well under the 800-token default, and Cyrillic needs more tokens than Latin
+    assert ozon_en.num_predict < ozon_ru.num_predict < 800
+    assert etsy_ru.num_predict > ozon_ru.num_predict
+    assert gen.plan_tokens("etsy", "long", "ru", cap=500).num_predict == 500
+    assert "\nПримечание:" in ozon_ru.stop and "\nNote:" in ozon_en.stop
+    assert gen.estimate_tokens("беспроводная мышь") > gen.estimate_tokens("wireless mouse k") > 0
+    rows = gen.prompt_token_report()
+    assert {(r["platform"], r["language"]) for r in rows} >= {("ozon", "ru"), ("etsy", "en")}
+    assert all(r["prompt_tokens"] == r["system_tokens"] + r["user_tokens"] for r in rows)
+
+
+@pytest.mark.asyncio
+async def test_planned_budget_and_stops_reach_the_client(monkeypatch):
+    calls = []
+
+    class Client:
+        async def generate(self, *args, **kwargs):
+            calls.append(kwargs)
+            return json.dumps({"title": "Мышь", "short_description": "Тихая", "bullets": ["a", "b", "c"]})
+
+    settings = type("S", (), {
+        "llm_base_url": "http://x", "llm_model": "phi3:mini", "llm_temperature": 0.6,
+        "llm_max_new_tokens": 800, "llm_timeout": 5.0, "gen_max_retries": 0, "gen_retry_delay_sec": 0.0,
+        "cache_ttl_sec": 0.0, "llm_token_planner": True,
+    })()
+    monkeypatch.setattr(gen, "get_client", lambda: Client())
+    monkeypatch.setattr(gen, "get_settings", lambda: settings)
+
+    await gen.generate_product_card(product_name="Мышь", platform="ozon", language="ru")
+    budget = gen.plan_tokens("ozon", "medium", "ru", cap=800)
+    assert calls[0]["max_new_tokens"] == budget.num_predict
+    assert calls[0]["stop"] == budget.stop
@@ -0,0 +1,114 @@
+import pytest
+
+import services.generation_service as gen
+from bench.bench_json_extract import BROKEN_KINDS, broken_corpus, repair_matches
+from services import metrics
+from services.json_repair import repair_card, repair_json
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("{'title': 'Mouse', 'short_description': 'It\\'s quiet', 'bullets': ['a']}",
+         {"title": "Mouse", "short_description": "It's quiet", "bullets": ["a"]}),
+        ('{“title”: “Мышь”, “short_description”: “Тихая”, “bullets”: [“a”, “b”]}',
+         {"title": "Мышь", "short_description": "Тихая", "bullets": ["a", "b"]}),
+        ('{"title": "Mouse "M185"", "short_description": "a\nb", "bullets": ["a" "b"]}',
+         {"title": 'Mouse "M185"', "short_description": "a\nb", "bullets": ["a", "b"]}),
+        ('{"title": "Mouse\n  "short_description": "Quiet", "bullets": "- a\n- b"',
+         {"title": "Mouse", "short_description": "Quiet", "bullets": ["a", "b"]}),
+        ('Sure:\n{title: Mouse, short_description: "Quiet, really", bullets: [a, b],}',
+         {"title": "Mouse", "short_description": "Quiet, really", "bullets": ["a", "b"]}),
+        ('{"title": "Mouse", "short_description": "Qui', {"title": "Mouse", "short_description": "Qui", "bullets": []}),
+        ('{"title": "Mouse", "bullets": ["a", "b"], "short_descr',
+         {"title": "Mouse", "short_description": "", "bullets": ["a", "b"]}),
+        ('{"title": "Mouse", "short_description": "Quiet", "bullets":',
+         {"title": "Mouse", "short_description": "Quiet", "bullets": []}),
+    ],
+)
+def test_repair_card_fixes_mechanical_damage(text, expected):
+    assert repair_card(text) == expected
+
+
+def test_repair_leaves_garbage_alone():
+    assert repair_card("I cannot help with that.") is None
+    assert repair_json('{"a": 1, "b": [true, None,]}') == {"a": 1, "b": [True, None]}
+
+
+def test_repair_success_rate_on_broken_corpus():
+    ok = {kind: 0 for kind in BROKEN_KINDS}
+    total = {kind: 0 for kind in BROKEN_KINDS}
+    for kind, text, expected in broken_corpus(400, seed=3):
+        total[kind] += 1
+        ok[kind] += repair_matches(repair_card(text), expected, kind)
+    assert all(ok[kind] / total[kind] >= 0.9 for kind in BROKEN_KINDS), ok
+
+
+@pytest.mark.asyncio
+async def test_local_repair_skips_the_llm_repair_call(monkeypatch):
+    class Client:
+        calls = 0
+
+        async def generate(self, *args, **kwargs):
+            self.calls += 1
+            return "{'title': 'Mouse', 'short_description': 'Quiet', 'bullets': 'a; b; c'"
+
+    client = Client()
+    monkeypatch.setattr(gen, "get_client", lambda: client)
+    monkeypatch.setattr(gen, "get_settings", lambda: type("S", (), {
+        "llm_base_url": "http://x", "llm_model": "phi3:mini", "llm_temperature": 0.6,
+        "llm_max_new_tokens": 100, "llm_timeout": 5.0, "gen_max_retries": 2, "gen_retry_delay_sec": 0.0,
+        "cache_ttl_sec": 0.0, "cache_size": 8,
+    })())
+    metrics.reset()
+    payload = await gen.generate_product_card(product_name="Mouse", platform="ozon", language="en")
+    assert client.calls == 1
+    assert payload["title"] == "Mouse" and payload["bullets"] == ["a", "b", "c"]
+    stats = gen.repair_stats()
+    assert (stats["local_repairs_ok"], stats["llm_repairs"], stats["local_repair_rate"]) == (1, 0, 1.0)
+    metrics.reset()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("stream", [False, True])
+@pytest.mark.parametrize(
+    "reply, expected",
+    [
+        ('{"title": "Mouse", "short_description": "Quiet wireless mouse.", "bullets": ["Silent clicks", "USB nano',
+         {"short_description": "Quiet wireless mouse.", "bullets": ["Silent clicks", "USB nano"]}),
+        ('{"title": "Mouse", "short_description": "Quiet.\nWireless.", "bullets": ["Silent clicks", "USB nano"]}',
+         {"short_description": "Quiet.\nWireless.", "bullets": ["Silent clicks", "USB nano"]}),
+    ],
+)
+async def test_broken_reply_is_repaired_in_the_pipeline(monkeypatch, reply, expected, stream):
+    class Client:
+        calls = 0
+
+        async def generate(self, *args, **kwargs):
+            self.calls += 1
+            return reply
+
+        async def generate_stream(self, *args, **kwargs):
+            self.calls += 1
+            for i in range(0, len(reply), 7):
+                yield reply[i : i + 7]
+
+    async def progress(frac):
+        pass
+
+    client = Client()
+    monkeypatch.setattr(gen, "get_client", lambda: client)
+    monkeypatch.setattr(gen, "get_settings", lambda: type("S", (), {
+        "llm_base_url": "http://x", "llm_model": "phi3:mini", "llm_temperature": 0.6,
+        "llm_max_new_tokens": 100, "llm_timeout": 5.0, "gen_max_retries": 2, "gen_retry_delay_sec": 0.0,
+        "cache_ttl_sec": 0.0, "cache_size": 8,
+    })())
+    metrics.reset()
+    payload = await gen.generate_product_card(
+        product_name="Mouse", platform="etsy", language="en", progress_cb=progress if stream else None
+    )
+    assert client.calls == 1
+    assert payload["short_description"] == expected["short_description"]
+    assert payload["bullets"][: len(expected["bullets"])] == expected["bullets"]
+    assert metrics.get("gen_invalid_json") == 1 and metrics.get("gen_local_repairs_ok") == 1
+    metrics.reset()
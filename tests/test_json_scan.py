@@ -0,0 +1,114 @@
+import json
+
+import pytest
+
+import services.generation_service as gen
+from bench.bench_json_extract import corpus, legacy_extract, scanner_extract
+from services.json_scan import StreamingCardParser, extract_card, extract_object
+
+
+def _feed_in_chunks(parser, text, size=3):
+    for i in range(0, len(text), size):
+        if parser.feed(text[i : i + size]):
+            return i + size
+    return None
+
+
+def test_streaming_parser_stops_at_card_close():
+    text = (
+        'Sure, here is "your" card:\n```json\n'
+        '{"title": "Mouse {M185}", "short_description": "Quiet \\"click\\"", "bullets": ["a", "b",]}\n'
+        "```\nLet me know if you need anything else {or more}!"
+    )
+    parser = StreamingCardParser()
+    consumed = _feed_in_chunks(parser, text)
+    assert consumed is not None and consumed < len(text)
+    assert parser.result == {
+        "title": "Mouse {M185}",
+        "short_description": 'Quiet "click"',
+        "bullets": ["a", "b"],
+    }
+
+
+def test_streaming_parser_exposes_fields_incrementally_and_skips_other_objects():
+    text = '{"note": 1} {"title": "T", "short_description": "D", "bullets": ["x"]}'
+    parser = StreamingCardParser()
+    seen = []
+    for ch in text:
+        parser.feed(ch)
+        if parser.fields and (not seen or seen[-1] != parser.fields):
+            seen.append(dict(parser.fields))
+    assert parser.done
+    assert {"title": "T"} in seen
+    assert seen[-1]["bullets"] == ["x"]
+
+
+def test_extract_card_matches_fuzz_corpus():
+    items = corpus(450, seed=11)
+    for kind, text, expected in items:
+        if kind == "truncated":
+            # Only the fields that closed; the pipeline repairs the rest
+            assert extract_card(text) == {k: expected[k] for k in ("title", "short_description")}
+        else:
+            assert extract_card(text) == expected, (kind, text)
+        assert scanner_extract(text) == expected, (kind, text)
+    # The corpus does exercise cases the old regex cascade got wrong
+    assert sum(legacy_extract(text) != expected for _, text, expected in items) > 100
+
+
+def test_extract_handles_every_truncation_point():
+    card = {"title": 'Mouse "M185" {x}', "short_description": "a, b,} \\ c", "bullets": ["1", "2,]"]}
+    text = "Here {is} it:\n```json\n" + json.dumps(card, indent=1) + "\n```"
+    for cut in range(len(text) + 1):
+        got = extract_card(text[:cut])
+        assert got is None or isinstance(got, dict)
+    assert extract_card(text) == card
+    assert extract_object('{"a": 1} {"title": "t", "short_description": "", "bullets": [],}') == {
+        "title": "t", "short_description": "", "bullets": []
+    }
+    assert extract_object("no json {here}") is None
+
+
+class StreamClient:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.sent = 0
+        self.closed = False
+
+    async def generate_stream(self, *args, **kwargs):
+        try:
+            for c in self.chunks:
+                self.sent += 1
+                yield c
+        finally:
+            self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_generation_stream_stops_early(monkeypatch):
+    card = json.dumps({"title": "Mouse", "short_description": "Quiet", "bullets": ["a", "b", "c"]})
+    chunks = [card[i : i + 5] for i in range(0, len(card), 5)] + [" chatter"] * 50
+    client = StreamClient(chunks)
+    monkeypatch.setattr(gen, "get_client", lambda: client)
+    monkeypatch.setattr(gen, "get_settings", lambda: type("S", (), {
+        "llm_base_url": "http://x", "llm_model": "phi3:mini",
+        "llm_temperature": 0.6, "llm_max_new_tokens": 100,
+        "llm_timeout": 5.0, "gen_max_retries": 0, "gen_retry_delay_sec": 0.0,
+        "cache_ttl_sec": 0.0, "cache_size": 8,
+    })())
+    fields_seen = []
+
+    async def progress(frac):
+        pass
+
+    async def on_fields(fields):
+        fields_seen.append(fields)
+
+    payload = await gen.generate_product_card(
+        product_name="Stream mouse", platform="ozon", language="en",
+        progress_cb=progress, fields_cb=on_fields,
+    )
+    assert payload["title"] == "Mouse"
+    assert client.closed
+    assert client.sent < len(chunks) - 40
+    assert fields_seen and fields_seen[0] == {"title": "Mouse"}
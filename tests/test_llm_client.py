@@ -0,0 +1,417 @@
+import json
+
+import pytest
+from aiohttp import web
+
+from services.llm_client import OllamaClient, PhaseTimeouts
+
+
+pytestmark = pytest.mark.asyncio
+
+
+async def _start_server(handler):
+    app = web.Application()
+    app.router.add_post("/api/generate", handler)
+    async def tags(request):
+        return web.json_response({"models": []})
+
+    app.router.add_get("/api/tags", tags)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+async def test_client_reuses_pooled_session():
+    async def handler(request):
+        body = await request.json()
+        if body.get("stream"):
+            resp = web.StreamResponse()
+            await resp.prepare(request)
+            for part in ("Hel", "lo"):
+                await resp.write((json.dumps({"response": part, "done": False}) + "\n").encode())
+            await resp.write((json.dumps({"response": "", "done": True}) + "\n").encode())
+            return resp
+        return web.json_response({"response": "ok", "done": True})
+
+    runner, base_url = await _start_server(handler)
+    client = OllamaClient(base_url, "phi3:mini")
+    try:
+        # generate() streams on the wire too, so phase deadlines apply
+        assert await client.generate("hi") == "Hello"
+        session = client._session
+        chunks = [c async for c in client.generate_stream("hi")]
+        assert "".join(chunks) == "Hello"
+        assert await client.health_check()
+        # Same pooled session is reused across all calls
+        assert client._session is session
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+
+async def test_session_from_finished_loop_is_closed_when_replaced():
+    import asyncio
+    import threading
+
+    client = OllamaClient("http://127.0.0.1:1", "phi3:mini")
+
+    async def open_session():
+        return client._get_session()
+
+    old = []
+    thread = threading.Thread(target=lambda: old.append(asyncio.run(open_session())))
+    thread.start()
+    thread.join()
+    connector = old[0].connector
+
+    try:
+        session = client._get_session()
+        assert session is not old[0]
+        # The stale session is closed rather than leaked with its sockets
+        assert old[0].closed and connector.closed
+    finally:
+        await client.close()
+    assert client._session is None
+
+
+async def test_shared_client_is_rebuilt_when_pool_settings_change(monkeypatch):
+    import asyncio
+
+    import services.generation_service as gen
+
+    settings = type("S", (), {"llm_base_url": "http://127.0.0.1:1", "llm_model": "phi3:mini", "llm_pool_limit": 10})()
+    monkeypatch.setattr(gen, "get_settings", lambda: settings)
+    await gen.close_client()
+    try:
+        client = gen.get_client()
+        session = client._get_session()
+        assert gen.get_client() is client
+        settings.llm_pool_limit = 2
+        rebuilt = gen.get_client()
+        assert rebuilt is not client and rebuilt.pool_limit == 2
+        await asyncio.sleep(0)
+        # The replaced client's pool is released
+        assert session.closed
+        settings.llm_first_token_timeout = 9.0
+        assert gen.get_client().timeouts.first_token == 9.0
+    finally:
+        await gen.close_client()
+
+
+async def test_keep_alive_is_sent_and_warm_up_reports_load_time():
+    bodies = []
+
+    async def handler(request):
+        body = await request.json()
+        bodies.append(body)
+        return web.json_response({"response": "", "done": True, "load_duration": 2_500_000_000})
+
+    runner, base_url = await _start_server(handler)
+    client = OllamaClient(base_url, "phi3:mini", keep_alive="30m")
+    try:
+        assert await client.warm_up() == pytest.approx(2.5)
+        await client.generate("hi")
+    finally:
+        await client.close()
+        await runner.cleanup()
+    assert bodies[0]["prompt"] == "" and bodies[0]["keep_alive"] == "30m"
+    assert bodies[1]["keep_alive"] == "30m"
+
+
+@pytest.mark.parametrize("load_in_first_frame", [True, False])
+async def test_cold_start_is_logged_for_streams_closed_early(caplog, load_in_first_frame):
+    import asyncio
+    import logging
+
+    async def handler(request):
+        await asyncio.sleep(0.05)
+        resp = web.StreamResponse()
+        await resp.prepare(request)
+        first = {"response": '{"title"', "done": False}
+        if load_in_first_frame:
+            first["load_duration"] = 2_500_000_000
+        await resp.write((json.dumps(first) + "\n").encode())
+        await asyncio.sleep(0.2)
+        return resp
+
+    runner, base_url = await _start_server(handler)
+    client = OllamaClient(base_url, "phi3:mini")
+    client.cold_start_sec = 0.01
+    try:
+        with caplog.at_level(logging.INFO, logger="productcard"):
+            stream = client.generate_stream("hi")
+            async for _ in stream:
+                break
+            await stream.aclose()
+    finally:
+        await client.close()
+        await runner.cleanup()
+    expected = "load_duration=2.5s" if load_in_first_frame else "possible cold start"
+    assert expected in caplog.text
+
+
+async def test_stop_sequences_are_sent_in_options():
+    bodies = []
+
+    async def handler(request):
+        bodies.append(await request.json())
+        return web.json_response({"response": "{}", "done": True})
+
+    runner, base_url = await _start_server(handler)
+    client = OllamaClient(base_url, "phi3:mini")
+    try:
+        await client.generate("hi", max_new_tokens=300, stop=["\nNote:"])
+    finally:
+        await client.close()
+        await runner.cleanup()
+    assert bodies[0]["options"]["stop"] == ["\nNote:"]
+    assert bodies[0]["options"]["num_predict"] == 300
+    assert "stop" not in bodies[0]
+
+
+async def test_keeper_hours_window():
+    import datetime as dt
+
+    from services.model_keeper import in_window, parse_hours
+
+    hours = parse_hours("9-21")
+    assert in_window(hours, dt.datetime(2024, 1, 1, 10))
+    assert not in_window(hours, dt.datetime(2024, 1, 1, 22))
+    overnight = parse_hours("20-6")
+    assert in_window(overnight, dt.datetime(2024, 1, 1, 23))
+    assert in_window(parse_hours(""), dt.datetime(2024, 1, 1, 3))
+
+
+async def test_requests_skip_dead_backend_until_probe_recovers_it():
+    hits = []
+
+    async def handler(request):
+        hits.append(request.host)
+        return web.json_response({"response": "ok", "done": True})
+
+    runner, live_url = await _start_server(handler)
+    dead_url = "http://127.0.0.1:9"  # discard port: connection refused
+    client = OllamaClient(f"{dead_url},{live_url}", "phi3:mini")
+    try:
+        assert client.base_urls == [dead_url, live_url]
+        # Probe marks the dead host unhealthy; traffic goes to the live one
+        assert await client.health_check(timeout=1.0)
+        status = {b["url"]: b for b in client.backend_status()}
+        assert status[dead_url]["healthy"] is False
+        assert status[live_url]["healthy"] is True
+        for _ in range(3):
+            assert await client.generate("hi") == "ok"
+        assert len(hits) == 3
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+
+async def test_pool_prefers_least_outstanding_backend():
+    from services.llm_backends import BackendPool
+
+    pool = BackendPool(["http://a", "http://b"])
+    a, b = pool.backends
+    with pool.track(a):
+        assert pool.pick() is b
+    a.latency, b.latency = 0.5, 0.1
+    assert pool.pick() is b
+    pool.mark_failure(b, "down")
+    assert pool.pick() is a
+
+
+async def test_stalled_stream_fails_on_idle_deadline_and_opens_breaker():
+    import asyncio
+    import time
+
+    from services.circuit_breaker import CircuitBreaker
+    from services.llm_backends import LLMStallError
+
+    async def handler(request):
+        resp = web.StreamResponse()
+        await resp.prepare(request)
+        await resp.write((json.dumps({"response": "{", "done": False}) + "\n").encode())
+        await asyncio.sleep(1)  # model hangs mid-generation
+        return resp
+
+    runner, base_url = await _start_server(handler)
+    client = OllamaClient(
+        base_url,
+        "phi3:mini",
+        breaker=CircuitBreaker(failure_threshold=1),
+        timeouts=PhaseTimeouts(first_token=2.0, idle=0.2),
+    )
+    started = time.monotonic()
+    try:
+        with pytest.raises(LLMStallError) as err:
+            await client.generate("hi", timeout=30)
+        elapsed = time.monotonic() - started
+    finally:
+        await client.close()
+        await runner.cleanup()
+    assert err.value.phase == "idle"
+    assert elapsed < 2.0
+    assert client.breaker.state == "open"
+    assert client.pool.backends[0].outstanding == 0
+
+
+async def test_stream_closed_early_counts_as_breaker_success():
+    import asyncio
+
+    from services.circuit_breaker import CircuitBreaker
+
+    async def handler(request):
+        resp = web.StreamResponse()
+        await resp.prepare(request)
+        for chunk in ("{", '"title": "x"', "}"):
+            await resp.write((json.dumps({"response": chunk, "done": False}) + "\n").encode())
+            await asyncio.sleep(0.05)
+        await resp.write((json.dumps({"response": "", "done": True}) + "\n").encode())
+        return resp
+
+    runner, base_url = await _start_server(handler)
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.0)
+    client = OllamaClient(base_url, "phi3:mini", breaker=breaker)
+    try:
+        for _ in range(3):
+            breaker.record_failure()
+        assert breaker.state == "half_open"
+        stream = client.generate_stream("hi")
+        # Stop after the first chunk, as the bot does once the card JSON closes
+        async for _ in stream:
+            break
+        await stream.aclose()
+    finally:
+        await client.close()
+        await runner.cleanup()
+    assert breaker.state == "closed"
+    assert breaker.status()["failures"] == 0
+
+
+async def test_first_token_deadline_and_adaptive_budget():
+    import asyncio
+
+    from services import metrics
+    from services.llm_backends import LLMStallError
+
+    async def handler(request):
+        await asyncio.sleep(1)  # never produces a first token in time
+        return web.json_response({"response": "late", "done": True})
+
+    runner, base_url = await _start_server(handler)
+    client = OllamaClient(base_url, "phi3:mini", timeouts=PhaseTimeouts(first_token=0.2))
+    try:
+        with pytest.raises(LLMStallError) as err:
+            await client.generate("hi")
+    finally:
+        await client.close()
+        await runner.cleanup()
+    assert err.value.phase == "first_token"
+
+    metrics.reset()
+    adaptive = PhaseTimeouts(first_token=60.0, idle=15.0, adaptive=True, min_samples=5)
+    assert adaptive.resolve() == (60.0, 15.0)  # not enough samples yet: configured caps
+    for _ in range(10):
+        metrics.observe("llm_ttft", 3.0)
+        metrics.observe("llm_chunk_gap", 0.1)
+    assert adaptive.resolve() == (pytest.approx(9.0), pytest.approx(2.0))
+    metrics.reset()
+
+
+async def test_slow_first_token_is_hedged_to_second_backend():
+    import asyncio
+
+    from services import metrics
+
+    hits = {"slow": 0, "fast": 0}
+
+    def _handler(name, delay):
+        async def handler(request):
+            hits[name] += 1
+            resp = web.StreamResponse()
+            await resp.prepare(request)
+            await asyncio.sleep(delay)
+            await resp.write((json.dumps({"response": name, "done": False}) + "\n").encode())
+            await resp.write((json.dumps({"response": "", "done": True}) + "\n").encode())
+            return resp
+
+        return handler
+
+    metrics.reset()
+    slow_runner, slow_url = await _start_server(_handler("slow", 1.0))
+    fast_runner, fast_url = await _start_server(_handler("fast", 0.0))
+    client = OllamaClient([slow_url, fast_url], "phi3:mini", hedge_percentile=95, hedge_min_delay=0.1)
+    # Make the slow node the primary pick
+    client.pool.backends[1].outstanding = 1
+    try:
+        text = await client.generate("hi")
+    finally:
+        client.pool.backends[1].outstanding = 0
+        await client.close()
+        await slow_runner.cleanup()
+        await fast_runner.cleanup()
+    assert text == "fast"
+    assert hits == {"slow": 1, "fast": 1}
+    assert metrics.get("llm_hedges") == 1 and metrics.get("llm_hedge_wins") == 1
+    assert client.pool.backends[0].outstanding == 0
+    metrics.reset()
+
+
+async def test_done_frame_timings_are_captured_and_aggregated():
+    from services import telemetry
+
+    async def handler(request):
+        resp = web.StreamResponse()
+        await resp.prepare(request)
+        for part in ('{"title"', ': "x"}'):
+            await resp.write((json.dumps({"response": part, "done": False}) + "\n").encode())
+        done = {
+            "response": "",
+            "done": True,
+            "done_reason": "stop",
+            "eval_count": 40,
+            "eval_duration": 2_000_000_000,
+            "prompt_eval_count": 300,
+            "prompt_eval_duration": 1_000_000_000,
+            "load_duration": 500_000_000,
+            "total_duration": 4_000_000_000,
+        }
+        await resp.write((json.dumps(done) + "\n").encode())
+        return resp
+
+    runner, base_url = await _start_server(handler)
+    client = OllamaClient(base_url, "phi3:mini")
+    results = []
+    try:
+        text = await client.generate("hi", on_done=results.append)
+        stream = client.generate_stream("hi", on_done=results.append)
+        async for _ in stream:
+            break
+        await stream.aclose()
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+    full, partial = results
+    assert text == full.text == '{"title": "x"}'
+    assert (full.eval_rate, full.prompt_eval_rate) == (20.0, 300.0)
+    assert full.done_reason == "stop" and not full.estimated
+    assert partial.estimated and partial.eval_count == 1 and partial.done_reason == "aborted"
+
+    telemetry.reset()
+    telemetry.record(full, platform="ozon", language="ru")
+    telemetry.record(full, platform="ozon", language="ru")
+    (row,) = telemetry.summary()
+    assert (row["model"], row["platform"], row["language"], row["calls"]) == ("phi3:mini", "ozon", "ru", 2)
+    assert row["eval_rate"] == 20.0
+    assert (row["load_share"], row["prompt_share"], row["eval_share"]) == (0.125, 0.25, 0.5)
+    # Estimates are counted but kept out of the measured averages
+    telemetry.record(partial, platform="ozon", language="ru")
+    (row,) = telemetry.summary()
+    assert (row["calls"], row["measured"], row["estimated"]) == (3, 2, 1)
+    assert row["eval_rate"] == 20.0 and row["avg_eval_tokens"] == 40.0
+    assert row["est_avg_eval_tokens"] == 1.0
+    telemetry.reset()
@@ -0,0 +1,29 @@
+import pytest
+
+from bench import load_test
+
+
+@pytest.mark.asyncio
+async def test_load_test_drives_handler_flow_for_all_users(monkeypatch):
+    from app import config
+    from bot import handlers
+    from storage import sqlite_repo
+
+    # Another test may have imported handlers while these were stubbed
+    monkeypatch.setattr(handlers, "get_settings", config.get_settings)
+    for name in ("add_generation", "get_generation", "prune_history"):
+        monkeypatch.setattr(handlers, name, getattr(sqlite_repo, name))
+    args = load_test.build_parser().parse_args(
+        ["--users", "3", "--iterations", "2", "--tps", "1000", "--ttft", "0", "--seed", "1"]
+    )
+    result = await load_test.run(args)
+    assert result["errors"] == {}
+    assert result["flows_completed"] == 6
+    assert result["stages"]["generate"]["n"] == 6
+    assert result["stages"]["export"]["n"] == 6
+    calls = result["telegram_calls"]
+    assert calls["sendDocument"] == 6
+    assert calls["editMessageText"] >= 6  # at least the final card per generation
+    # Progress edits are throttled per chat; the rest are the final cards
+    assert result["max_edits_per_chat_second"] <= 4
+    assert result["llm_requests"] == 6
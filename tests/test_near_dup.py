@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+import services.generation_service as gen
+from services.near_dup import NearDupIndex
+
+
+def test_index_matches_reordered_text_within_scope_only():
+    index = NearDupIndex(threshold=0.8)
+    index.add("k1", "ozon|ru", "мышь logitech m185 тихие клики 2.4 ггц")
+    index.add("k2", "ozon|ru", "клавиатура logitech k380")
+    match = index.query("ozon|ru", "logitech m185 мышь 2.4 ггц тихие клики")
+    assert match == ("k1", 1.0)
+    # Same text but other platform/tone/language scope
+    assert index.query("wb|ru", "мышь logitech m185 тихие клики 2.4 ггц") is None
+    # Too different
+    assert index.query("ozon|ru", "мышь razer viper") is None
+    index.remove("k1")
+    assert index.query("ozon|ru", "logitech m185 мышь 2.4 ггц тихие клики") is None
+
+
+def test_index_is_bounded():
+    index = NearDupIndex(max_entries=2)
+    for i in range(3):
+        index.add(f"k{i}", "s", f"item number {i}")
+    assert len(index) == 2
+    assert index.query("s", "item number 0") is None
+
+
+@pytest.mark.asyncio
+async def test_near_duplicate_request_is_served_from_cache(monkeypatch):
+    class Client:
+        calls = 0
+
+        async def generate(self, *args, **kwargs):
+            self.calls += 1
+            return json.dumps({"title": "Logitech M185", "short_description": "Мышь", "bullets": ["a", "b", "c"]})
+
+    settings = type("S", (), {
+        "llm_base_url": "http://x", "llm_model": "phi3:mini", "llm_temperature": 0.6,
+        "llm_max_new_tokens": 100, "llm_timeout": 5.0, "gen_max_retries": 0, "gen_retry_delay_sec": 0.0,
+        "cache_ttl_sec": 60.0, "cache_size": 8, "cache_near_dup": True, "cache_near_dup_threshold": 0.8,
+    })()
+    client = Client()
+    monkeypatch.setattr(gen, "get_client", lambda: client)
+    monkeypatch.setattr(gen, "get_settings", lambda: settings)
+    gen._CACHE.clear()
+    gen._NEAR.clear()
+
+    first = await gen.generate_product_card(
+        product_name="Мышь Logitech M185", features="тихие клики; 2.4 ГГц", platform="ozon", language="ru"
+    )
+    before = gen._CACHE.stats()
+    second = await gen.generate_product_card(
+        product_name="Logitech M185 мышь", features="2.4 ГГц, тихие клики!", platform="ozon", language="ru"
+    )
+    after = gen._CACHE.stats()
+    # Only the exact-key miss is counted, not the near-duplicate probe
+    assert (after["hits"], after["misses"]) == (before["hits"], before["misses"] + 1)
+    other_tone = await gen.generate_product_card(
+        product_name="Logitech M185 мышь", features="2.4 ГГц, тихие клики!", platform="ozon", language="ru",
+        tone="selling",
+    )
+    assert client.calls == 2
+    assert "near_hit" not in first
+    assert second["near_hit"] is True and second["title"] == first["title"]
+    assert "near_hit" not in other_tone
+    gen._CACHE.clear()
+    gen._NEAR.clear()
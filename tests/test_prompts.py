@@ -0,0 +1,32 @@
+import os
+
+from app.prompts import PromptRegistry, Slot
+
+
+def test_registry_hot_reloads_on_mtime_change_and_bumps_version(tmp_path):
+    path = tmp_path / "card.txt"
+    path.write_text("[ru]\nПривет\n\n[en]\nHello\n", encoding="utf-8")
+    reg = PromptRegistry(tmp_path, reload_interval=0.0)
+    v1 = reg.version()
+    assert reg.text("card", language="ru") == "Привет"
+    assert reg.text("card", language="de", default="x") == "x"
+    assert reg.text("missing", default="fallback") == "fallback"
+
+    builds = []
+
+    def build():
+        builds.append(1)
+        return ["Fixed", Slot("name", "Name: "), Slot("extra", "Extra: ", optional=True), "Tail"]
+
+    tpl = reg.template(("card", "ru"), build)
+    assert tpl.render(name="A") == "Fixed\nName: A\nTail"
+    assert reg.template(("card", "ru"), build).render(name="B", extra="e") == "Fixed\nName: B\nExtra: e\nTail"
+    assert len(builds) == 1  # compiled once
+
+    path.write_text("[ru]\nЗдравствуйте\n\n[en]\nHello\n", encoding="utf-8")
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert reg.text("card", language="ru") == "Здравствуйте"
+    assert reg.version() != v1 and reg.reloads == 1
+    reg.template(("card", "ru"), build)
+    assert len(builds) == 2  # recompiled for the new prompt version
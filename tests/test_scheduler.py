@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from services.scheduler import LLMScheduler
+
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_scheduler_bounds_in_flight_and_is_fair():
+    sched = LLMScheduler(max_in_flight=1)
+    order = []
+    positions = {}
+    release = asyncio.Event()
+
+    async def job(user, name):
+        async def on_queue(pos):
+            positions.setdefault(name, []).append(pos)
+
+        async with sched.slot(user, on_queue=on_queue):
+            order.append(name)
+            assert sched.in_flight == 1
+            await release.wait()
+
+    # User "a" floods the queue, user "b" submits once afterwards
+    tasks = [asyncio.create_task(job("a", f"a{i}")) for i in range(4)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(job("b", "b0")))
+    await asyncio.sleep(0.01)
+    assert order == ["a0"]
+    assert sched.queued == 4
+    # Round-robin: b0 gets the next turn after a1 instead of waiting for a3
+    assert positions["b0"][-1] == 2
+    release.set()
+    await asyncio.gather(*tasks)
+    assert order == ["a0", "a1", "b0", "a2", "a3"]
+    assert positions["b0"][-1] == 0  # admission is signalled with position 0
+    assert sched.in_flight == 0 and sched.queued == 0
+
+
+async def test_scheduler_cancelled_waiter_leaves_queue():
+    sched = LLMScheduler(max_in_flight=1)
+    hold = asyncio.Event()
+
+    async def job(user):
+        async with sched.slot(user):
+            await hold.wait()
+
+    first = asyncio.create_task(job(1))
+    await asyncio.sleep(0)
+    waiting = asyncio.create_task(job(2))
+    await asyncio.sleep(0)
+    assert sched.queued == 1
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert sched.queued == 0
+    hold.set()
+    await first
+    assert sched.in_flight == 0
+
+
+async def test_cancel_during_grant_notification_releases_slot():
+    sched = LLMScheduler(max_in_flight=1)
+    release = asyncio.Event()
+    granted = asyncio.Event()
+
+    async def holder():
+        async with sched.slot("a"):
+            await release.wait()
+
+    async def on_queue(pos):
+        if pos == 0:
+            granted.set()
+            await asyncio.sleep(10)  # slow Telegram edit
+
+    async def waiter():
+        async with sched.slot("b", on_queue=on_queue):
+            pass
+
+    first = asyncio.create_task(holder())
+    await asyncio.sleep(0)
+    second = asyncio.create_task(waiter())
+    await asyncio.sleep(0.01)
+    release.set()
+    await first
+    await granted.wait()
+    second.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await second
+    assert sched.in_flight == 0
@@ -41,3 +41,21 @@ async def test_sqlite_repo_crud(tmp_path):
     items = await recent_generations(str(db), tg_id=123, limit=10)
     assert len(items) <= 3
 
+
+
+@pytest.mark.asyncio
+async def test_card_cache_ttl_and_lru_eviction(tmp_path):
+    from storage.sqlite_repo import cache_get, cache_put, cache_stats
+
+    db = str(tmp_path / "cache.db")
+    await init_db(db)
+    card = {"title": "Mouse", "short_description": "Quiet", "bullets": ["a"]}
+    for i, key in enumerate(("a", "b", "c")):
+        await cache_put(db, key=key, payload=card, model="m", ttl_sec=100, max_entries=2, now=1000.0 + i)
+    # Only the two most recently used rows survive
+    assert await cache_get(db, key="a", ttl_sec=100, now=1003.0) is None
+    assert await cache_get(db, key="b", ttl_sec=100, now=1003.0) == card
+    assert (await cache_stats(db))["entries"] == 2
+    # Expired on read
+    assert await cache_get(db, key="c", ttl_sec=100, now=1200.0) is None
+    assert (await cache_stats(db))["entries"] == 1